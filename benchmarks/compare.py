@@ -0,0 +1,91 @@
+"""Compare two benchmark reports and flag regressions.
+
+Works on the output of suite.py or any single benchmark run with --output.
+Latencies, wall time and RSS regress when they grow; throughput regresses
+when it shrinks. Exits 1 when anything moved the wrong way by more than
+--threshold.
+
+    python benchmarks/compare.py bench-main.json bench-branch.json --threshold 0.15
+"""
+
+import argparse
+import json
+import sys
+
+# Leaf names where a larger value is better; every other tracked metric is a cost
+HIGHER_IS_BETTER = {"throughput_rps", "mb_per_s"}
+TRACKED = HIGHER_IS_BETTER | {
+    "p50", "p95", "p99", "mean", "ms_per_run", "wall_s", "peak_rss_mb", "median_ms",
+}
+
+
+def _identity(result: dict) -> str:
+    parts = [result["benchmark"]] if "benchmark" in result else []
+    for key in ("scenario", "module", "blocks", "nodes_per_block"):
+        if key in result:
+            parts.append(f"{key}={result[key]}")
+    return "[" + ",".join(parts) + "]"
+
+
+def flatten(value, prefix: str = "") -> dict[str, float]:
+    """Map dotted metric paths to numbers, naming list entries by their identity"""
+    metrics = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            metrics.update(flatten(item, f"{prefix}.{key}" if prefix else key))
+    elif isinstance(value, list):
+        for item in value:
+            name = _identity(item) if isinstance(item, dict) else str(len(metrics))
+            metrics.update(flatten(item, f"{prefix}{name}"))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        if prefix.rsplit(".", 1)[-1] in TRACKED:
+            metrics[prefix] = float(value)
+    return metrics
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    old, new = flatten(baseline), flatten(current)
+    rows = []
+    for path in sorted(old.keys() & new.keys()):
+        before, after = old[path], new[path]
+        if before == 0:
+            continue
+        change = (after - before) / before
+        worse = -change if path.rsplit(".", 1)[-1] in HIGHER_IS_BETTER else change
+        rows.append({
+            "metric": path,
+            "baseline": before,
+            "current": after,
+            "change": round(change, 4),
+            "regression": worse > threshold,
+        })
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change that counts")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold)
+    regressions = [r for r in rows if r["regression"]]
+
+    if args.json:
+        print(json.dumps({"threshold": args.threshold, "rows": rows}, indent=2))
+    else:
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else ""
+            print(f"{r['metric']:90} {r['baseline']:12.3f} -> {r['current']:12.3f} {r['change']:+8.1%}  {flag}")
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Import-time benchmark for the cold-start path.
+
+Runs `python -X importtime -c "import <module>"` in fresh interpreters,
+parses the cumulative time of the module from stderr and compares the
+median against the budgets in import_budget.json.
+
+    python benchmarks/import_time.py                 # all budgeted modules
+    python benchmarks/import_time.py workflow_project.graph --runs 7 --json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BENCHMARK_DIR = Path(__file__).parent
+BUDGET_FILE = BENCHMARK_DIR / "import_budget.json"
+SRC_DIR = BENCHMARK_DIR.parent / "src"
+
+
+def parse_importtime(stderr: str) -> dict[str, int]:
+    """Map module name -> cumulative import time in microseconds"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3:
+            continue
+        cumulative_us, name = parts[1].strip(), parts[2].strip()
+        if cumulative_us.isdigit():
+            timings[name] = int(cumulative_us)
+    return timings
+
+
+def measure(module: str) -> int:
+    pythonpath = [str(SRC_DIR), os.environ.get("PYTHONPATH", "")]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, pythonpath)))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {module} failed:\n{proc.stderr[-2000:]}")
+    timings = parse_importtime(proc.stderr)
+    if module not in timings:
+        raise RuntimeError(f"no importtime entry for {module}")
+    return timings[module]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", help="modules to measure (default: all budgeted)")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args(argv)
+
+    budgets = json.loads(BUDGET_FILE.read_text())
+    modules = args.modules or list(budgets)
+
+    results = []
+    for module in modules:
+        samples = [measure(module) / 1000 for _ in range(args.runs)]
+        median_ms = statistics.median(samples)
+        budget_ms = budgets.get(module)
+        results.append(
+            {
+                "module": module,
+                "median_ms": round(median_ms, 2),
+                "min_ms": round(min(samples), 2),
+                "budget_ms": budget_ms,
+                "within_budget": budget_ms is None or median_ms <= budget_ms,
+            }
+        )
+
+    if args.json:
+        report = {"benchmark": "import_time", "python": sys.version.split()[0], "results": results}
+        print(json.dumps(report, indent=2))
+    else:
+        for r in results:
+            status = "ok" if r["within_budget"] else "OVER BUDGET"
+            print(f"{r['module']:40} {r['median_ms']:8.1f} ms  (budget {r['budget_ms']} ms)  {status}")
+    return 0 if all(r["within_budget"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""Load driver for diagram generation and the export paths.
+
+In-process (default) it starts the stub LLM server, points the app's OpenAI
+client at it and calls chat_fn / the export renderers directly. With --url
+it drives a running Gradio app through gradio_client instead. Either way it
+reports throughput, p50/p95/p99 latency and peak RSS as JSON.
+
+    python benchmarks/load_test.py generate --requests 50 --concurrency 10
+    python benchmarks/load_test.py export-png --requests 40 --concurrency 4
+    python benchmarks/load_test.py generate --url http://127.0.0.1:7870 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+from report import emit, latency_summary, peak_rss_mb
+from stub_llm_server import DIAGRAMS, start_stub_server
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+SCENARIOS = ("generate", "export-png", "export-pdf", "export-svg", "export-bundle")
+
+AS_IS = (
+    "After billing and coding, some claims are reworked and assigned back manually to the same "
+    "associate. Missing claim data is filled in by hand and statuses are tracked in Excel or email."
+)
+PROPOSED = (
+    "Bulk-upload claims via Excel with pre-assigned associates, select work queue types from a "
+    "dropdown, map skill groups and update statuses in real time."
+)
+
+
+def diagram_code(index: int, unique: bool) -> str:
+    """Mermaid code for request `index`; unique code defeats the render cache"""
+    text = DIAGRAMS[index % len(DIAGRAMS)]
+    code = text[text.index("```mermaid") + len("```mermaid") : text.rindex("```")].strip()
+    return f"{code}\n%% load-test {index}" if unique else code
+
+
+def _no_progress(*args, **kwargs):
+    pass
+
+
+async def _drive(requests: int, concurrency: int, call) -> tuple[list[dict], float]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> dict:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await call(index, start)
+                result.setdefault("ok", True)
+            except Exception as e:
+                result = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            result["latency_s"] = time.perf_counter() - start
+            return result
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(requests)))
+    return results, time.perf_counter() - start
+
+
+def _setup_in_process(args) -> dict | None:
+    """Point the app at a stub LLM for generation; must run before workflow_project is imported"""
+    if args.scenario != "generate":
+        return None
+    stub = {"url": args.llm_url}
+    if not args.llm_url:
+        _, url, config = start_stub_server(
+            latency=args.latency, tokens_per_second=args.tokens_per_second, error_rate=args.error_rate
+        )
+        stub = {
+            "url": url,
+            "latency_s": config.latency,
+            "tokens_per_second": config.tokens_per_second,
+            "error_rate": config.error_rate,
+        }
+    os.environ["OPENAI_BASE_URL"] = os.environ["OPENAI_API_BASE"] = stub["url"]
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+    # Measure the real work, not the caches or the background pre-render
+    os.environ.setdefault("LLM_CACHE", "off")
+    os.environ.setdefault("PRERENDER_FORMATS", "")
+    return stub
+
+
+async def _in_process_call(args):
+    if args.scenario == "generate":
+        import workflow_project.app as app_module
+
+        if not args.langfuse:
+            from langchain_core.callbacks import BaseCallbackHandler
+
+            app_module.get_langfuse_handler = BaseCallbackHandler
+
+        async def call(index: int, start: float) -> dict:
+            first = None
+            last = None
+            async for update in app_module.chat_fn(f"{AS_IS} (case {index})", PROPOSED, _no_progress):
+                first = first or time.perf_counter() - start
+                last = update
+            # chat_fn reports failures as a 3-tuple instead of raising
+            return {"ok": last is not None and len(last) == 2, "ttfb_s": first}
+
+        return call
+
+    from workflow_project import export
+
+    fmt = args.scenario.split("-", 1)[1]
+    render = {
+        "png": export.render_png,
+        "pdf": export.render_pdf,
+        "svg": export.render_diagram_svg,
+        "bundle": export.render_bundle,
+    }[fmt]
+
+    async def call(index: int, start: float) -> dict:
+        data = await render(diagram_code(index, not args.reuse))
+        return {"bytes": len(data)}
+
+    return call
+
+
+async def _http_call(args):
+    from gradio_client import Client
+
+    client = await asyncio.to_thread(Client, args.url, verbose=False)
+    if args.scenario == "generate":
+        api_name, inputs = "/generate_mermaid", lambda i: (f"{AS_IS} (case {i})", PROPOSED)
+    else:
+        fmt = args.scenario.split("-", 1)[1]
+        api_name = {
+            "png": "/download_diagram_as_png",
+            "pdf": "/download_diagram_as_pdf",
+            "svg": "/download_diagram_as_svg",
+            "bundle": "/download_diagram_bundle",
+        }[fmt]
+
+        def inputs(i):
+            markdown = f"```mermaid\n{diagram_code(i, not args.reuse)}\n```"
+            return (markdown, 2) if fmt == "png" else (markdown,)
+
+    async def call(index: int, start: float) -> dict:
+        await asyncio.to_thread(client.predict, *inputs(index), api_name=api_name)
+        return {}
+
+    return call
+
+
+async def run(args) -> dict:
+    stub = None
+    if args.url:
+        call = await _http_call(args)
+    else:
+        stub = _setup_in_process(args)
+        call = await _in_process_call(args)
+
+    results, wall = await _drive(args.requests, args.concurrency, call)
+    ok = [r for r in results if r["ok"]]
+    errors = sorted({r["error"] for r in results if "error" in r})
+    report = {
+        "benchmark": "load_test",
+        "scenario": args.scenario,
+        "mode": "http" if args.url else "in-process",
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "ok": len(ok),
+        "errors": len(results) - len(ok),
+        "wall_s": round(wall, 3),
+        "throughput_rps": round(len(ok) / wall, 3) if wall else 0.0,
+        "latency_ms": latency_summary([r["latency_s"] for r in ok]),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    ttfb = [r["ttfb_s"] for r in ok if r.get("ttfb_s")]
+    if ttfb:
+        report["ttfb_ms"] = latency_summary(ttfb)
+    if stub:
+        report["stub"] = stub
+    if errors:
+        report["error_samples"] = errors[:5]
+    return report
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenario", choices=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--url", help="drive a running Gradio app instead of calling in-process")
+    parser.add_argument("--llm-url", help="use an already running stub/OpenAI-compatible server")
+    parser.add_argument("--latency", type=float, default=0.5, help="stub: seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="stub: streaming rate")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub: fraction of 500 responses")
+    parser.add_argument("--reuse", action="store_true", help="export the same diagrams (render cache hits)")
+    parser.add_argument("--langfuse", action="store_true", help="keep the Langfuse callback enabled")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    report = asyncio.run(run(args))
+    emit(report, args.output)
+    return 0 if report["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Throughput benchmark for the mermaid post-processor in workflow_project.utils.
+
+Builds synthetic LLM responses of increasing size (prose plus mermaid blocks
+with classDef lines and parenthesised labels) and reports MB/s for the
+one-shot parse, fix_mermaid, get_fixed_mermaid_data and incremental
+streaming, with per-run p50/p95/p99 latency and peak RSS.
+
+    python benchmarks/mermaid_postprocess.py --json
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from report import emit, latency_summary, peak_rss_mb  # noqa: E402
+from workflow_project.utils import (  # noqa: E402
+    MermaidStreamParser,
+    fix_mermaid,
+    get_fixed_mermaid_data,
+    parse_mermaid,
+)
+
+BLOCK_HEADER = """```mermaid
+flowchart TD
+classDef asis fill=#ffcccc,stroke=#b30000,stroke-width:2px,color=#000
+classDef tobe fill=#ccffcc,stroke=#006600,stroke-width:2px,color=#000
+"""
+
+
+def make_response(blocks: int, nodes_per_block: int) -> str:
+    parts = []
+    for b in range(blocks):
+        parts.append(f"Here is diagram {b} for the process (revision {b}).\n\n")
+        parts.append(BLOCK_HEADER)
+        for n in range(nodes_per_block):
+            parts.append(
+                f"N{n}[Step {n} (manual) - check (A)]:::asis --> N{n + 1}[Step {n + 1} (tool)]:::tobe\n"
+            )
+        parts.append("```\n\n")
+    return "".join(parts)
+
+
+def throughput(fn, text: str, min_time: float) -> dict:
+    durations = []
+    start = time.perf_counter()
+    while True:
+        run_start = time.perf_counter()
+        fn(text)
+        durations.append(time.perf_counter() - run_start)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+    per_run = elapsed / len(durations)
+    return {
+        "runs": len(durations),
+        "ms_per_run": round(per_run * 1000, 3),
+        "mb_per_s": round(len(text) / per_run / 1e6, 2),
+        "latency_ms": latency_summary(durations),
+    }
+
+
+def stream(text: str, chunk_size: int = 16):
+    parser = MermaidStreamParser()
+    for i in range(0, len(text), chunk_size):
+        parser.feed(text[i : i + chunk_size])
+        parser.partial_code()
+    return parser.result()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per measurement")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    results = []
+    for blocks, nodes in ((1, 30), (5, 200), (20, 1000)):
+        text = make_response(blocks, nodes)
+        case = {"blocks": blocks, "nodes_per_block": nodes, "bytes": len(text)}
+        case["parse_mermaid"] = throughput(parse_mermaid, text, args.min_time)
+        code = parse_mermaid(text).last_block.code
+        case["fix_mermaid"] = throughput(fix_mermaid, code, args.min_time)
+        case["get_fixed_mermaid_data"] = throughput(get_fixed_mermaid_data, text, args.min_time)
+        case["stream_16b_chunks"] = throughput(stream, text, args.min_time)
+        results.append(case)
+
+    if args.json or args.output:
+        emit(
+            {"benchmark": "mermaid_postprocess", "results": results, "peak_rss_mb": peak_rss_mb()},
+            args.output,
+        )
+    else:
+        for case in results:
+            print(f"{case['bytes']:>10} bytes ({case['blocks']} blocks x {case['nodes_per_block']} nodes)")
+            for name in ("parse_mermaid", "fix_mermaid", "get_fixed_mermaid_data", "stream_16b_chunks"):
+                r = case[name]
+                print(
+                    f"    {name:24} {r['ms_per_run']:10.3f} ms  {r['mb_per_s']:8.2f} MB/s"
+                    f"  p95 {r['latency_ms']['p95']:.3f} ms"
+                )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""Shared helpers so every benchmark reports latency, throughput and memory the same way."""
+
+import json
+import math
+import resource
+import sys
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Nearest-rank percentile, q in [0, 100]"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def latency_summary(seconds: list[float]) -> dict:
+    """p50/p95/p99/mean/max in milliseconds"""
+    ms = [s * 1000 for s in seconds]
+    return {
+        "p50": round(percentile(ms, 50), 3),
+        "p95": round(percentile(ms, 95), 3),
+        "p99": round(percentile(ms, 99), 3),
+        "mean": round(sum(ms) / len(ms), 3) if ms else 0.0,
+        "max": round(max(ms), 3) if ms else 0.0,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def emit(result: dict, output: str | None = None):
+    """Print a result (or list of results) as JSON and optionally write it to `output`"""
+    text = json.dumps(result, indent=2)
+    print(text)
+    if output:
+        with open(output, "w") as f:
+            f.write(text + "\n")
@@ -0,0 +1,238 @@
+"""OpenAI-compatible stub server for load tests that must not spend real tokens.
+
+Answers /v1/chat/completions (streaming and not) with canned mermaid
+responses, after a configurable latency and at a configurable token rate.
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+    python benchmarks/stub_llm_server.py --port 8808 --latency 0.5 --tokens-per-second 80
+"""
+
+import argparse
+import itertools
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DIAGRAMS = (
+    """Here is the combined workflow.
+
+```mermaid
+flowchart TD
+classDef asis fill:#ffcccc,stroke:#b30000,stroke-width:2px,color:#000
+classDef tobe fill:#ccffcc,stroke:#006600,stroke-width:2px,color:#000
+classDef common fill:#cce5ff,stroke:#004080,stroke-width:2px,color:#000
+A[Claim Data Available]:::common --> B[Work Queues Created]:::common
+B --> C{{Claim Allocation}}
+C --> D[Manual Allocation of Rework Claims]:::asis
+D --> E[Missing Data Points - Filled Manually]:::asis
+E --> F[Associate Processes Claim]:::common
+F --> G[Update Status - Excel or Email]:::asis
+C --> H[Jobs Uploaded in Bulk via Excel]:::tobe
+H --> I[Work Queue Type Selected - Dropdown]:::tobe
+I --> J[Skill Groups Mapped]:::tobe
+J --> F
+F --> K[Update Status in ProHance]:::tobe
+G --> L[Process Complete]:::common
+K --> L
+subgraph Legend
+M1[As-Is Manual]:::asis
+M2[To-Be Workflow Tool]:::tobe
+M3[Common Steps]:::common
+end
+```
+""",
+    # Exercises the post-processor: `=` in classDef and parentheses in labels
+    """```mermaid
+flowchart TD
+classDef asis fill=#ffcccc,stroke=#b30000,color=#000
+A[Receive Invoice (email)]:::asis --> B{Approved?}
+B -- Yes --> C[Post to ERP (manual)]:::asis
+B -- No --> D[Return to Vendor]:::asis
+```
+""",
+    """```mermaid
+flowchart TD
+classDef asis fill:#ffcccc,stroke:#b30000,color:#000
+A[Ticket Raised]:::asis --> B[Triage by Supervisor]:::asis
+B --> C[Assign to Agent]:::asis
+C --> D[Resolve Ticket]:::asis
+D --> E[Close and Notify]:::asis
+```
+""",
+)
+
+_TOKEN = re.compile(r"\s*\S{1,4}|\s+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Rough ~4-character tokens, enough to pace a realistic stream"""
+    return _TOKEN.findall(text)
+
+
+class StubConfig:
+    def __init__(
+        self, latency: float, tokens_per_second: float, error_rate: float, responses, seed: int
+    ):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.responses = tuple(responses)
+        self._cycle = itertools.cycle(self.responses)
+        self._lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.requests = 0
+
+    def next_response(self) -> str:
+        with self._lock:
+            self.requests += 1
+            return next(self._cycle)
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self.random.random() < self.error_rate
+
+
+def _make_handler(config: StubConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                self._json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+            else:
+                self._json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self._json(404, {"error": {"message": "not found"}})
+                return
+            if config.should_fail():
+                time.sleep(config.latency)
+                self._json(500, {"error": {"message": "stub failure", "type": "server_error"}})
+                return
+
+            content = config.next_response()
+            tokens = tokenize(content)
+            usage = {
+                "prompt_tokens": len(json.dumps(request.get("messages", []))) // 4,
+                "completion_tokens": len(tokens),
+            }
+            usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+            model = request.get("model", "stub")
+            time.sleep(config.latency)
+            if request.get("stream"):
+                include_usage = (request.get("stream_options") or {}).get("include_usage")
+                self._stream(model, tokens, usage if include_usage else None)
+            else:
+                if config.tokens_per_second > 0:
+                    time.sleep(len(tokens) / config.tokens_per_second)
+                self._json(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }],
+                    "usage": usage,
+                })
+
+        def _stream(self, model: str, tokens: list[str], usage: dict | None):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            base = {
+                "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+            }
+
+            def send(choices, **extra):
+                chunk = {**base, "choices": choices, **extra}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            delay = 1 / config.tokens_per_second if config.tokens_per_second > 0 else 0
+            send([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            for token in tokens:
+                if delay:
+                    time.sleep(delay)
+                send([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+            send([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if usage is not None:
+                send([], usage=usage)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+            self.close_connection = True
+
+    return Handler
+
+
+def start_stub_server(
+    port: int = 0,
+    latency: float = 0.5,
+    tokens_per_second: float = 80,
+    error_rate: float = 0.0,
+    responses=DIAGRAMS,
+    seed: int = 0,
+    host: str = "127.0.0.1",
+):
+    """Start the stub in a daemon thread; returns (server, base_url, config)"""
+    config = StubConfig(latency, tokens_per_second, error_rate, responses, seed)
+    server = ThreadingHTTPServer((host, port), _make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="stub-llm", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1", config
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8808)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=80, help="0 sends everything at once")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--responses", help="JSON file with a list of canned response strings")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    responses = DIAGRAMS
+    if args.responses:
+        with open(args.responses) as f:
+            responses = json.load(f)
+    server, url, _ = start_stub_server(
+        args.port, args.latency, args.tokens_per_second, args.error_rate, responses, args.seed, args.host
+    )
+    print(f"Stub LLM listening on {url}  (OPENAI_BASE_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Run the benchmark suite and collect every result into one JSON report.
+
+Each benchmark runs in its own interpreter so peak RSS is per benchmark.
+Compare two reports with benchmarks/compare.py to spot regressions.
+
+    python benchmarks/suite.py --output bench-main.json
+    python benchmarks/suite.py --exports svg,png,pdf --output bench-branch.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from report import emit
+
+BENCHMARK_DIR = Path(__file__).parent
+
+
+def run_benchmark(script: str, *args: str) -> list[dict]:
+    with tempfile.NamedTemporaryFile(suffix=".json") as output:
+        proc = subprocess.run(
+            [sys.executable, str(BENCHMARK_DIR / script), *args, "--output", output.name],
+            capture_output=True,
+            text=True,
+        )
+        text = Path(output.name).read_text()
+    if not text:
+        return [{"benchmark": script, "failed": True, "stderr": proc.stderr[-2000:]}]
+    result = json.loads(text)
+    return result if isinstance(result, list) else [result]
+
+
+def git_revision() -> str | None:
+    proc = subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=BENCHMARK_DIR
+    )
+    return proc.stdout.strip() or None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.5, help="stub LLM latency in seconds")
+    parser.add_argument("--exports", default="svg", help="comma-separated export formats to load test")
+    parser.add_argument("--output", help="also write the combined report to this file")
+    args = parser.parse_args(argv)
+
+    load = ["--requests", str(args.requests), "--concurrency", str(args.concurrency)]
+    results = run_benchmark("mermaid_postprocess.py", "--min-time", "0.2")
+    results += run_benchmark("load_test.py", "generate", *load, "--latency", str(args.latency))
+    for fmt in filter(None, args.exports.split(",")):
+        results += run_benchmark("load_test.py", f"export-{fmt}", *load)
+
+    report = {
+        "suite": "workflow_project",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    emit(report, args.output)
+    return 0 if not any(r.get("failed") or r.get("errors") for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
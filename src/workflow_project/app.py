@@ -4,43 +4,146 @@ import logging
 import uuid
 import asyncio
 import tempfile
+import threading
 import os
 from pathlib import Path
 
-# There are tools set here dependent on environment variables
-from workflow_project.graph import app as graph  # noqa
-from workflow_project.graph import langfuse_handler
-from workflow_project.utils import get_fixed_mermaid_data
+# There are tools set here dependent on environment variables, so .env is
+# loaded before any of our modules read it; the graph is only built on first use.
+from dotenv import load_dotenv
+
+load_dotenv()
+from workflow_project.graph import get_app, get_checkpointer, get_langfuse_handler, memory_usage
+from workflow_project.utils import get_fixed_mermaid_data, extract_mermaid_code, close_subgraphs, MermaidStreamParser
+from workflow_project.artifacts import get_artifact_store, ARTIFACT_GC_INTERVAL, ARTIFACT_TTL
+from workflow_project.batch import generate_batch, BATCH_CONCURRENCY
+from workflow_project.browser_pool import shutdown_browser_pool
+from workflow_project.export import (
+    check_mermaid_js,
+    render_png,
+    render_pdf,
+    render_diagram_svg,
+    render_bundle,
+    render_paged_pdf,
+    render_png_tiles,
+    export_limiter,
+    PNG_SCALE,
+    PNG_SCALES,
+)
+from workflow_project.limiter import QueueFullError
+from workflow_project.tiling import needs_paging
+from workflow_project.queues import (
+    DEFAULT_CONCURRENCY_LIMIT,
+    EXPORT_CONCURRENCY_ID,
+    EXPORT_CONCURRENCY_LIMIT,
+    GENERATE_CONCURRENCY_ID,
+    GENERATE_CONCURRENCY_LIMIT,
+    QUEUE_MAX_SIZE,
+    QUEUE_STATUS_INTERVAL,
+    queue_status,
+    queue_status_markdown,
+)
+from workflow_project.prerender import get_prerenderer
+from workflow_project.metrics import (
+    ERRORS,
+    IN_FLIGHT,
+    MERMAID_FIX_SECONDS,
+    register_collector,
+    metrics_route,
+)
+from workflow_project.logging_config import configure_logging
 
 
 logger = logging.getLogger(__name__)
 
 
-async def chat_fn(as_is_solution: str, proposed_solution: str, progress=gr.Progress()):
+async def chat_fn(
+    as_is_solution: str, proposed_solution: str, progress=gr.Progress(), request: gr.Request = None
+):
     if not as_is_solution:
         raise gr.Error("As-Is solution cannot be blank")
 
+    prerenderer = get_prerenderer()
+    # A new generation supersedes any pre-render of the previous diagram
+    prerenderer.cancel(_session_id(request))
+    final_code = None
+
     try:
         progress(0, desc="Initializing workflow generation...")
         
-        async for msg in graph.astream(
-            {"proposed_solution": proposed_solution, "as_is_solution": as_is_solution},
-            config={
-                "callbacks": [langfuse_handler],
-                "configurable": {"thread_id": str(uuid.uuid4())},
-            },
-            stream_mode="updates",
-        ):
-            progress(0.5, desc="Processing with AI model...")
-            print(f"The msg from LLM {msg}")
-            content = msg.get("generate_graph", {}).get("messages", {}).content
-            content, code = get_fixed_mermaid_data(content)
-            print(f"Fixed content is {content}\n\n")
-            if content:
-                progress(1.0, desc="Diagram generation complete!")
-                yield content, code
+        parser = MermaidStreamParser()
+        preview = None
+        # Retries, hedges and route fallbacks each stream their own message; the
+        # preview follows the newest one and ignores the ones it moved away from
+        stream_id = None
+        abandoned = set()
+        # "messages" streams LLM tokens as they arrive, "updates" delivers the
+        # complete node output once generation is finished.
+        with prerenderer.generating(), IN_FLIGHT.track(endpoint="generate"):
+            async for mode, msg in get_app().astream(
+                {
+                    "proposed_solution": proposed_solution,
+                    "as_is_solution": as_is_solution,
+                    # Each click is a fresh request, not a chat follow-up; only the
+                    # session's last diagram carries over between runs
+                    "messages": [_remove_all_messages()],
+                },
+                config={
+                    "callbacks": [get_langfuse_handler()],
+                    "configurable": {"thread_id": _thread_id(request)},
+                },
+                stream_mode=["messages", "updates"],
+            ):
+                if mode == "messages":
+                    chunk, metadata = msg
+                    if metadata.get("langgraph_node") != "generate_graph":
+                        continue
+                    if not isinstance(chunk.content, str) or not chunk.content:
+                        continue
+                    if chunk.id != stream_id:
+                        if chunk.id in abandoned:
+                            continue
+                        if stream_id is not None:
+                            abandoned.add(stream_id)
+                            parser = MermaidStreamParser()
+                            preview = None
+                        stream_id = chunk.id
+                    if not parser.length:
+                        progress(0.5, desc="Receiving diagram from AI model...")
+                    lines = parser.lines
+                    parser.feed(chunk.content)
+                    # Update the outputs once per complete line, not per token: joining
+                    # the text on every token would make a long answer quadratic
+                    if parser.lines == lines:
+                        continue
+                    code = parser.partial_code()
+                    if code and code != preview:
+                        preview = code
+                        # A subgraph still being written would make the whole preview unparsable
+                        yield parser.text, f"```mermaid\n{close_subgraphs(code)}\n```"
+                    else:
+                        yield parser.text, gr.skip()
+                    continue
+
+                content = msg.get("generate_graph", {}).get("messages", {}).content
+                logger.debug("Graph update received", extra={"content": content})
+                with MERMAID_FIX_SECONDS.time():
+                    content, code = get_fixed_mermaid_data(content)
+                logger.info(
+                    "Diagram generated",
+                    extra={"content_chars": len(content or ""), "has_diagram": bool(code)},
+                )
+                if content:
+                    progress(1.0, desc="Diagram generation complete!")
+                    yield content, code
+                    final_code = code
+
+        if final_code:
+            # Render the exports now so the download buttons serve a cache hit
+            prerenderer.schedule(_session_id(request), extract_mermaid_code(final_code))
 
     except Exception:
+        ERRORS.inc(stage="generate")
         logger.exception("Exception occurred")
         user_error_message = (
             "There was an error processing your request. Please try again."
@@ -48,282 +151,183 @@ async def chat_fn(as_is_solution: str, proposed_solution: str, progress=gr.Progr
         yield user_error_message, gr.skip(), False
 
 
-def download_mermaid_code(mermaid_output):
+async def batch_fn(items: list[list[str]], concurrency: int = BATCH_CONCURRENCY):
+    """Generate diagrams for many (as_is, proposed) pairs, streaming results as they finish"""
+    results = []
+    try:
+        with IN_FLIGHT.track(endpoint="batch"):
+            async for result in generate_batch(items, concurrency):
+                results.append(result)
+                yield list(results)
+    except ValueError as e:
+        ERRORS.inc(stage="batch")
+        raise gr.Error(str(e))
+
+
+def _session_id(request: gr.Request | None) -> str | None:
+    return getattr(request, "session_hash", None)
+
+
+def _thread_id(request: gr.Request | None) -> str:
+    """One graph thread per browser session, so a regeneration can edit the last diagram"""
+    session_id = _session_id(request)
+    return f"session-{session_id}" if session_id else str(uuid.uuid4())
+
+
+def _remove_all_messages():
+    from langchain_core.messages import RemoveMessage
+    from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+    return RemoveMessage(id=REMOVE_ALL_MESSAGES)
+
+
+def download_mermaid_code(mermaid_output, request: gr.Request = None):
     """Generate downloadable mermaid code file"""
     if not mermaid_output:
         return None
     
     # Extract just the mermaid code from the markdown format
-    if "```mermaid" in mermaid_output:
-        start = mermaid_output.find("```mermaid") + 10
-        end = mermaid_output.find("```", start)
-        mermaid_code = mermaid_output[start:end].strip()
-    else:
-        mermaid_code = mermaid_output
-    
-    # Create a temporary file
-    import tempfile
-    import os
+    mermaid_code = extract_mermaid_code(mermaid_output)
     
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.mmd', delete=False) as f:
-        f.write(mermaid_code)
-        return f.name
+    # Stored per session and cleaned up by the artifact store
+    return get_artifact_store().write(_session_id(request), mermaid_code, ".mmd")
+
+async def _export(mermaid_output, session_id, render, suffix: str, label: str, streamed: bool = False):
+    """Render the diagram with `render(code)` and store the result for download
 
-async def convert_mermaid_to_png(mermaid_output):
-    """Convert mermaid diagram to PNG using playwright"""
+    A `streamed` render is called as `render(code, out)` and writes straight
+    into the artifact file instead of returning the bytes.
+    """
     if not mermaid_output:
         return None
-    
+
     try:
-        from playwright.async_api import async_playwright
-        
         # Extract mermaid code
-        if "```mermaid" in mermaid_output:
-            start = mermaid_output.find("```mermaid") + 10
-            end = mermaid_output.find("```", start)
-            mermaid_code = mermaid_output[start:end].strip()
-        else:
-            mermaid_code = mermaid_output.strip()
-        
-        # Create HTML with mermaid diagram
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <script src="https://cdn.jsdelivr.net/npm/mermaid@10.9.1/dist/mermaid.min.js"></script>
-            <style>
-                body {{
-                    margin: 0;
-                    padding: 40px;
-                    background: white;
-                    font-family: Arial, sans-serif;
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    min-height: 100vh;
-                }}
-                .mermaid {{
-                    background: white !important;
-                    max-width: 100%;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="mermaid">
-                {mermaid_code}
-            </div>
-            <script>
-                mermaid.initialize({{
-                    startOnLoad: true,
-                    theme: 'default',
-                    background: '#ffffff',
-                    flowchart: {{
-                        useMaxWidth: true,
-                        htmlLabels: true
-                    }}
-                }});
-                
-                // Ensure the diagram is fully rendered before screenshot
-                setTimeout(() => {{
-                    document.body.setAttribute('data-ready', 'true');
-                }}, 2000);
-            </script>
-        </body>
-        </html>
-        """
-        
-        # Write HTML to temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False) as f:
-            f.write(html_content)
-            html_path = f.name
-        
-        try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page(viewport={'width': 1200, 'height': 800})
-                
-                # Load the HTML file
-                await page.goto(f"file://{html_path}")
-                
-                # Wait for mermaid to render completely
-                await page.wait_for_function("document.body.getAttribute('data-ready') === 'true'", timeout=15000)
-                
-                # Wait for the SVG to be present
-                await page.wait_for_selector('.mermaid svg', timeout=10000)
-                
-                # Create output PNG file
-                png_path = tempfile.mktemp(suffix='.png')
-                
-                # Take screenshot of the mermaid diagram only
-                mermaid_element = page.locator('.mermaid')
-                await mermaid_element.screenshot(path=png_path, omit_background=True)
-                
-                await browser.close()
-                
-                return png_path
-        finally:
-            # Clean up HTML file
-            if os.path.exists(html_path):
-                os.unlink(html_path)
-                
-    except ImportError:
-        gr.Warning("Playwright is not installed. Please install it to use PNG export.")
-        return None
-    except Exception as e:
-        print(f"PNG conversion error details: {e}")  # Debug info
-        gr.Warning(f"Error converting to PNG: {str(e)}")
-        return None
+        mermaid_code = extract_mermaid_code(mermaid_output)
 
+        with IN_FLIGHT.track(endpoint="export"):
+            # Join a background pre-render of this diagram rather than starting another
+            await get_prerenderer().wait(session_id, mermaid_code)
+            if streamed:
+                with get_artifact_store().open(session_id, suffix) as (out, path):
+                    await render(mermaid_code, out)
+                return path
+            data = await render(mermaid_code)
 
-async def convert_mermaid_to_pdf(mermaid_output):
-    """Convert mermaid diagram to PDF using playwright"""
-    if not mermaid_output:
-        return None
-    
-    try:
-        from playwright.async_api import async_playwright
-        
-        # Extract mermaid code
-        if "```mermaid" in mermaid_output:
-            start = mermaid_output.find("```mermaid") + 10
-            end = mermaid_output.find("```", start)
-            mermaid_code = mermaid_output[start:end].strip()
+        # Create the output file in the session's artifact directory
+        return await asyncio.to_thread(get_artifact_store().write, session_id, data, suffix)
+
+    except ImportError as e:
+        ERRORS.inc(stage="export")
+        if getattr(e, "name", None) == "playwright":
+            gr.Warning(f"Playwright is not installed. Please install it to use {label} export.")
         else:
-            mermaid_code = mermaid_output.strip()
-        
-        # Create HTML with mermaid diagram
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <script src="https://cdn.jsdelivr.net/npm/mermaid@10.9.1/dist/mermaid.min.js"></script>
-            <style>
-                body {{
-                    margin: 0;
-                    padding: 40px;
-                    background: white;
-                    font-family: Arial, sans-serif;
-                    display: flex;
-                    justify-content: center;
-                    align-items: center;
-                    min-height: 100vh;
-                }}
-                .mermaid {{
-                    background: white !important;
-                    max-width: 100%;
-                }}
-                @media print {{
-                    body {{
-                        min-height: auto;
-                    }}
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="mermaid">
-                {mermaid_code}
-            </div>
-            <script>
-                mermaid.initialize({{
-                    startOnLoad: true,
-                    theme: 'default',
-                    background: '#ffffff',
-                    flowchart: {{
-                        useMaxWidth: true,
-                        htmlLabels: true
-                    }}
-                }});
-                
-                // Ensure the diagram is fully rendered before PDF generation
-                setTimeout(() => {{
-                    document.body.setAttribute('data-ready', 'true');
-                }}, 2000);
-            </script>
-        </body>
-        </html>
-        """
-        
-        # Write HTML to temporary file
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False) as f:
-            f.write(html_content)
-            html_path = f.name
-        
-        try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True)
-                page = await browser.new_page()
-                
-                # Load the HTML file
-                await page.goto(f"file://{html_path}")
-                
-                # Wait for mermaid to render completely
-                await page.wait_for_function("document.body.getAttribute('data-ready') === 'true'", timeout=15000)
-                
-                # Wait for the SVG to be present
-                await page.wait_for_selector('.mermaid svg', timeout=10000)
-                
-                # Create output PDF file
-                pdf_path = tempfile.mktemp(suffix='.pdf')
-                
-                # Generate PDF
-                await page.pdf(
-                    path=pdf_path,
-                    format='A4',
-                    print_background=True,
-                    margin={'top': '20px', 'right': '20px', 'bottom': '20px', 'left': '20px'}
-                )
-                
-                await browser.close()
-                
-                return pdf_path
-        finally:
-            # Clean up HTML file
-            if os.path.exists(html_path):
-                os.unlink(html_path)
-                
-    except ImportError:
-        gr.Warning("Playwright is not installed. Please install it to use PDF export.")
+            gr.Warning(f"{label} export is unavailable: {e}")
+        return None
+    except QueueFullError as e:
+        # Too many exports in flight; fail fast rather than pile up
+        ERRORS.inc(stage="export_rejected")
+        logger.warning("Rejected %s export", label, extra={"limiter": export_limiter.stats()})
+        gr.Warning(str(e))
         return None
     except Exception as e:
-        print(f"PDF conversion error details: {e}")  # Debug info
-        gr.Warning(f"Error converting to PDF: {str(e)}")
+        ERRORS.inc(stage="export")
+        logger.exception("%s conversion failed", label)
+        gr.Warning(f"Error converting to {label}: {str(e)}")
         return None
 
 
-def download_diagram_as_png(mermaid_output):
+def _is_large(mermaid_output) -> bool:
+    return bool(mermaid_output) and needs_paging(extract_mermaid_code(mermaid_output))
+
+
+async def convert_mermaid_to_png(mermaid_output, session_id=None, scale=PNG_SCALE):
+    """Convert mermaid diagram to PNG at the given scale; large diagrams become a zip of page tiles"""
+    if _is_large(mermaid_output):
+        return await _export(
+            mermaid_output,
+            session_id,
+            lambda code, out: render_png_tiles(code, out, float(scale)),
+            ".zip",
+            "PNG",
+            streamed=True,
+        )
+    return await _export(
+        mermaid_output, session_id, lambda code: render_png(code, float(scale)), ".png", "PNG"
+    )
+
+
+async def convert_mermaid_to_pdf(mermaid_output, session_id=None):
+    """Convert mermaid diagram to PDF; large diagrams get one page per piece"""
+    if _is_large(mermaid_output):
+        return await _export(mermaid_output, session_id, render_paged_pdf, ".pdf", "PDF", streamed=True)
+    return await _export(mermaid_output, session_id, render_pdf, ".pdf", "PDF")
+
+
+async def convert_mermaid_to_svg(mermaid_output, session_id=None):
+    """Convert mermaid diagram to SVG"""
+    return await _export(
+        mermaid_output, session_id, render_diagram_svg, ".svg", "SVG"
+    )
+
+
+async def convert_mermaid_to_bundle(mermaid_output, session_id=None):
+    """Zip the mermaid source with SVG, PDF and PNGs at every offered scale"""
+    return await _export(mermaid_output, session_id, render_bundle, ".zip", "bundle")
+
+
+async def download_diagram_as_png(mermaid_output, scale=PNG_SCALE, request: gr.Request = None):
     """Wrapper function for gradio to download PNG"""
-    if not mermaid_output:
-        return None
-    
-    try:
-        import asyncio
-        # Run the async function
-        png_path = asyncio.run(convert_mermaid_to_png(mermaid_output))
-        return png_path
-    except Exception as e:
-        gr.Warning(f"Failed to convert diagram to PNG: {str(e)}")
-        return None
+    # The diagram is rendered once to SVG; every format is derived from that render
+    return await convert_mermaid_to_png(mermaid_output, _session_id(request), scale)
 
 
-def download_diagram_as_pdf(mermaid_output):
+async def download_diagram_as_pdf(mermaid_output, request: gr.Request = None):
     """Wrapper function for gradio to download PDF"""
-    if not mermaid_output:
-        return None
-    
-    try:
-        import asyncio
-        # Run the async function
-        pdf_path = asyncio.run(convert_mermaid_to_pdf(mermaid_output))
-        return pdf_path
-    except Exception as e:
-        gr.Warning(f"Failed to convert diagram to PDF: {str(e)}")
-        return None
+    return await convert_mermaid_to_pdf(mermaid_output, _session_id(request))
+
+
+async def download_diagram_as_svg(mermaid_output, request: gr.Request = None):
+    """Wrapper function for gradio to download SVG"""
+    return await convert_mermaid_to_svg(mermaid_output, _session_id(request))
+
+
+async def download_diagram_bundle(mermaid_output, request: gr.Request = None):
+    """Wrapper function for gradio to download every format as one zip"""
+    return await convert_mermaid_to_bundle(mermaid_output, _session_id(request))
 
-def clear_inputs():
+async def clear_inputs(request: gr.Request = None):
+    # async so it runs on the event loop: pre-render tasks may only be cancelled from there
+    get_prerenderer().cancel(_session_id(request))
+    checkpointer = get_checkpointer()
+    if checkpointer is not None and _session_id(request):
+        # Start the next diagram from scratch
+        await checkpointer.adelete_thread(_thread_id(request))
     return "", "", "", "", None
 
 
+def register_metrics_collectors(blocks=None):
+    """Expose the caches', limiter's, stores' and Gradio queue's own counters on /metrics"""
+    from workflow_project.llm_cache import get_llm_cache
+    from workflow_project.render_cache import get_render_cache
+
+    def llm_cache_stats():
+        cache = get_llm_cache()
+        return {"hits": cache.hits, "misses": cache.misses} if cache is not None else {}
+
+    register_collector("render_cache", lambda: get_render_cache().stats())
+    register_collector("llm_cache", llm_cache_stats)
+    register_collector("export_limiter", export_limiter.stats)
+    register_collector("checkpointer", memory_usage)
+    register_collector("prerender", get_prerenderer().stats)
+    register_collector("artifacts", get_artifact_store().usage)
+    if blocks is not None:
+        register_collector("queue", lambda: queue_status(blocks))
+
+
 if __name__ == "__main__":
+    configure_logging()
+    check_mermaid_js()
     logger.info("Starting the interface")
     
     # Custom CSS for professional styling with dynamic text color support
@@ -448,7 +452,9 @@ if __name__ == "__main__":
             secondary_hue="purple",
             neutral_hue="slate"
         ),
-        css=custom_css
+        css=custom_css,
+        # Gradio keeps its own copy of every served file; expire those as well
+        delete_cache=(int(ARTIFACT_GC_INTERVAL), int(ARTIFACT_TTL))
     ) as app:
         
         # Header Section
@@ -457,6 +463,16 @@ if __name__ == "__main__":
                 <h1>ProHance Workflow Process Generator</h1>
             </div>
         """)
+
+        # Live load indicator, refreshed outside the queue so it never waits behind work
+        queue_status_md = gr.Markdown(visible=QUEUE_STATUS_INTERVAL > 0)
+        if QUEUE_STATUS_INTERVAL > 0:
+            gr.Timer(QUEUE_STATUS_INTERVAL).tick(
+                fn=lambda: queue_status_markdown(app),
+                outputs=[queue_status_md],
+                queue=False,
+                show_progress="hidden",
+            )
         
         with gr.Row():
             with gr.Column(scale=1):
@@ -528,6 +544,22 @@ if __name__ == "__main__":
                     variant="secondary", 
                     visible=False
                 )
+                download_svg_btn = gr.Button(
+                    "✏️ Download as SVG",
+                    variant="secondary",
+                    visible=False
+                )
+                download_bundle_btn = gr.Button(
+                    "📦 Download All (zip)",
+                    variant="secondary",
+                    visible=False
+                )
+                png_scale = gr.Radio(
+                    choices=[(f"{scale:g}x", scale) for scale in PNG_SCALES],
+                    value=PNG_SCALE if PNG_SCALE in PNG_SCALES else PNG_SCALES[0],
+                    label="PNG scale",
+                    visible=False
+                )
             
             download_file = gr.File(
                 label="Download File",
@@ -540,11 +572,21 @@ if __name__ == "__main__":
             inputs=[as_is, proposed_solution],
             outputs=[llm_out, mermaid_diag_out],
             api_name="generate_mermaid",
-            show_progress="full"
+            show_progress="full",
+            concurrency_limit=GENERATE_CONCURRENCY_LIMIT,
+            concurrency_id=GENERATE_CONCURRENCY_ID
         ).then(
             # Show download buttons after diagram is generated
-            lambda: [gr.update(visible=True), gr.update(visible=True), gr.update(visible=True)],
-            outputs=[ download_png_btn, download_pdf_btn]
+            lambda: [gr.update(visible=True)] * 5,
+            outputs=[download_png_btn, download_pdf_btn, download_svg_btn, download_bundle_btn, png_scale]
+        )
+        
+        # API-only endpoint for generating many diagrams in one call
+        gr.api(
+            batch_fn,
+            api_name="generate_mermaid_batch",
+            concurrency_limit=GENERATE_CONCURRENCY_LIMIT,
+            concurrency_id=GENERATE_CONCURRENCY_ID
         )
         
         custom_clear_btn.click(
@@ -552,8 +594,8 @@ if __name__ == "__main__":
             outputs=[as_is, proposed_solution, llm_out, mermaid_diag_out, download_file]
         ).then(
             # Hide download buttons when clearing
-            lambda: [gr.update(visible=False), gr.update(visible=False), gr.update(visible=False)],
-            outputs=[download_png_btn, download_pdf_btn]
+            lambda: [gr.update(visible=False)] * 5,
+            outputs=[download_png_btn, download_pdf_btn, download_svg_btn, download_bundle_btn, png_scale]
         )
         '''
         download_code_btn.click(
@@ -567,8 +609,10 @@ if __name__ == "__main__":
         
         download_png_btn.click(
             fn=download_diagram_as_png,
-            inputs=[mermaid_diag_out],
-            outputs=[download_file]
+            inputs=[mermaid_diag_out, png_scale],
+            outputs=[download_file],
+            concurrency_limit=EXPORT_CONCURRENCY_LIMIT,
+            concurrency_id=EXPORT_CONCURRENCY_ID
         ).then(
             lambda: gr.update(visible=True),
             outputs=[download_file]
@@ -577,7 +621,31 @@ if __name__ == "__main__":
         download_pdf_btn.click(
             fn=download_diagram_as_pdf,
             inputs=[mermaid_diag_out],
+            outputs=[download_file],
+            concurrency_limit=EXPORT_CONCURRENCY_LIMIT,
+            concurrency_id=EXPORT_CONCURRENCY_ID
+        ).then(
+            lambda: gr.update(visible=True),
             outputs=[download_file]
+        )
+
+        download_svg_btn.click(
+            fn=download_diagram_as_svg,
+            inputs=[mermaid_diag_out],
+            outputs=[download_file],
+            concurrency_limit=EXPORT_CONCURRENCY_LIMIT,
+            concurrency_id=EXPORT_CONCURRENCY_ID
+        ).then(
+            lambda: gr.update(visible=True),
+            outputs=[download_file]
+        )
+
+        download_bundle_btn.click(
+            fn=download_diagram_bundle,
+            inputs=[mermaid_diag_out],
+            outputs=[download_file],
+            concurrency_limit=EXPORT_CONCURRENCY_LIMIT,
+            concurrency_id=EXPORT_CONCURRENCY_ID
         ).then(
             lambda: gr.update(visible=True),
             outputs=[download_file]
@@ -585,23 +653,46 @@ if __name__ == "__main__":
         
 
 
+    register_metrics_collectors(app)
+
+    # Separate concurrency groups per event kind (set on the listeners above); a full
+    # queue rejects new events immediately instead of letting them pile up
+    app.queue(
+        max_size=QUEUE_MAX_SIZE or None,
+        default_concurrency_limit=DEFAULT_CONCURRENCY_LIMIT,
+    )
+
+    # Keep exported files (ours and Gradio's cached copies) from piling up on disk
+    get_artifact_store().start_gc()
+
+    # Build the model and graph in the background so the first request does not pay for it
+    threading.Thread(target=get_app, name="graph-warmup", daemon=True).start()
+
     # For Vercel deployment
     import os
     port = int(os.environ.get("PORT", 7870))
+    # Prometheus scrape endpoint (METRICS_PATH) served by Gradio's own FastAPI app
+    app_kwargs = {"routes": [metrics_route()]}
     
     
-    if os.environ.get("VERCEL"):
-        # Running on Vercel
-        app.launch(
-            server_name="0.0.0.0",
-            server_port=port,
-            share=False,
-            show_error=True
-        )
-    else:
-        # Running locally
-        app.launch(
-            server_name="0.0.0.0",
-            server_port=7870,
-            share=True
-        )
+    try:
+        if os.environ.get("VERCEL"):
+            # Running on Vercel
+            app.launch(
+                server_name="0.0.0.0",
+                server_port=port,
+                share=False,
+                show_error=True,
+                app_kwargs=app_kwargs
+            )
+        else:
+            # Running locally
+            app.launch(
+                server_name="0.0.0.0",
+                server_port=7870,
+                share=True,
+                app_kwargs=app_kwargs
+            )
+    finally:
+        # Close the warm Chromium instances used for exports
+        shutdown_browser_pool()
@@ -0,0 +1,151 @@
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = os.environ.get(
+    "ARTIFACT_DIR", os.path.join(tempfile.gettempdir(), "workflow_project_artifacts")
+)
+ARTIFACT_TTL = float(os.environ.get("ARTIFACT_TTL", 60 * 60))
+ARTIFACT_MAX_BYTES = int(os.environ.get("ARTIFACT_MAX_BYTES", 256 * 1024 * 1024))
+ARTIFACT_GC_INTERVAL = float(os.environ.get("ARTIFACT_GC_INTERVAL", 60))
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+class ArtifactStore:
+    """Per-session directories for exported files, with TTL and size-based cleanup.
+
+    Every file written here is removed again by `gc`, either once it is older
+    than `ttl` or, oldest first, while the store is over `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        root: str = ARTIFACT_DIR,
+        ttl: float = ARTIFACT_TTL,
+        max_bytes: int = ARTIFACT_MAX_BYTES,
+        gc_interval: float = ARTIFACT_GC_INTERVAL,
+    ):
+        self.root = Path(root)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.gc_interval = gc_interval
+        self.removed_files = 0
+        self._stop = threading.Event()
+        self._gc_thread = None
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def session_dir(self, session_id: str | None) -> Path:
+        name = _UNSAFE.sub("_", session_id or "anonymous")[:64]
+        path = self.root / name
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    @contextmanager
+    def open(self, session_id: str | None, suffix: str, stem: str = "workflow", mode: str = "wb"):
+        """Stream a new file for a session; yields `(file, path)`.
+
+        The data goes to a temporary file that is moved to `path` (the path to
+        hand to Gradio) only when the block exits without an error.
+        """
+        for attempt in range(2):
+            directory = self.session_dir(session_id)
+            try:
+                f = tempfile.NamedTemporaryFile(mode, dir=directory, suffix=".part", delete=False)
+                break
+            except FileNotFoundError:
+                # gc removed the (empty) session directory under us; recreate it once
+                if attempt:
+                    raise
+        path = directory / f"{stem}-{uuid.uuid4().hex[:8]}{suffix}"
+        try:
+            with f:
+                yield f, str(path)
+            os.replace(f.name, path)
+        except BaseException:
+            Path(f.name).unlink(missing_ok=True)
+            raise
+
+    def write(self, session_id: str | None, data: bytes | str, suffix: str, stem: str = "workflow") -> str:
+        """Store `data` for a session and return the file path to hand to Gradio"""
+        with self.open(session_id, suffix, stem, "w" if isinstance(data, str) else "wb") as (f, path):
+            f.write(data)
+        return path
+
+    def usage(self) -> dict:
+        files = list(self._files())
+        return {"files": len(files), "bytes": sum(size for _, size, _ in files)}
+
+    def _files(self):
+        for path in self.root.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.is_file():
+                yield stat.st_mtime, stat.st_size, path
+
+    def gc(self) -> int:
+        """Delete expired files, then the oldest ones while over budget; returns files removed"""
+        now = time.time()
+        removed = 0
+        kept = []
+        total = 0
+        for mtime, size, path in self._files():
+            if now - mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                kept.append((mtime, size, path))
+                total += size
+        kept.sort()
+        for _, size, path in kept:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        for directory in self.root.iterdir():
+            if directory.is_dir() and not any(directory.iterdir()):
+                try:
+                    directory.rmdir()
+                except OSError:
+                    pass  # a new export landed in it meanwhile
+        self.removed_files += removed
+        return removed
+
+    def _gc_loop(self):
+        while not self._stop.wait(self.gc_interval):
+            try:
+                removed = self.gc()
+                if removed:
+                    logger.info("Removed %d expired export files", removed)
+            except Exception:
+                logger.exception("Artifact cleanup failed")
+
+    def start_gc(self):
+        """Run `gc` every `gc_interval` seconds in a daemon thread"""
+        if self._gc_thread is None:
+            self._gc_thread = threading.Thread(target=self._gc_loop, name="artifact-gc", daemon=True)
+            self._gc_thread.start()
+
+    def stop_gc(self):
+        self._stop.set()
+
+
+_store: ArtifactStore | None = None
+
+
+def get_artifact_store() -> ArtifactStore:
+    global _store
+    if _store is None:
+        _store = ArtifactStore()
+    return _store
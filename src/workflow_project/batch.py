@@ -0,0 +1,65 @@
+import asyncio
+import logging
+import os
+
+from workflow_project.graph import get_batch_app, get_langfuse_handler
+from workflow_project.metrics import ERRORS, IN_FLIGHT, MERMAID_FIX_SECONDS
+from workflow_project.utils import get_fixed_mermaid_data
+
+logger = logging.getLogger(__name__)
+
+BATCH_CONCURRENCY = int(os.environ.get("BATCH_CONCURRENCY", 4))
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", 100))
+
+
+def _as_pair(item) -> tuple[str, str]:
+    if isinstance(item, dict):
+        return item.get("as_is_solution") or "", item.get("proposed_solution") or ""
+    as_is_solution, proposed_solution = item
+    return as_is_solution or "", proposed_solution or ""
+
+
+async def _generate_one(index: int, item, semaphore: asyncio.Semaphore) -> dict:
+    try:
+        as_is_solution, proposed_solution = _as_pair(item)
+        if not as_is_solution.strip():
+            raise ValueError("As-Is solution cannot be blank")
+        async with semaphore:
+            with IN_FLIGHT.track(endpoint="batch_item"):
+                result = await get_batch_app().ainvoke(
+                    {"proposed_solution": proposed_solution, "as_is_solution": as_is_solution},
+                    config={"callbacks": [get_langfuse_handler()]},
+                )
+        with MERMAID_FIX_SECONDS.time():
+            content, code = get_fixed_mermaid_data(result["messages"][-1].content)
+        return {"index": index, "ok": True, "content": content, "code": code}
+    except Exception as e:
+        # One bad item must not take the rest of the batch down with it
+        ERRORS.inc(stage="batch_item")
+        logger.exception("Batch item %d failed", index)
+        return {"index": index, "ok": False, "error": str(e) or type(e).__name__}
+
+
+async def generate_batch(items, concurrency: int = BATCH_CONCURRENCY):
+    """Generate diagrams for (as_is, proposed) pairs, yielding each result as it finishes.
+
+    Items may be 2-item sequences or dicts with `as_is_solution` and
+    `proposed_solution` keys. Results carry the item's `index` since they
+    arrive in completion order.
+    """
+    items = list(items)
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f"A batch can contain at most {BATCH_MAX_ITEMS} items")
+    # Callers may ask for less parallelism than BATCH_CONCURRENCY, never more
+    semaphore = asyncio.Semaphore(min(max(1, int(concurrency)), BATCH_CONCURRENCY))
+    tasks = [
+        asyncio.create_task(_generate_one(index, item, semaphore))
+        for index, item in enumerate(items)
+    ]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        # Stop outstanding work if the consumer goes away early
+        for task in tasks:
+            task.cancel()
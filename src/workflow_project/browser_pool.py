@@ -0,0 +1,206 @@
+import asyncio
+import atexit
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+
+logger = logging.getLogger(__name__)
+
+# Number of browser contexts kept warm, and how many renders a context (and its
+# one reused page) serves before it is thrown away and replaced with a fresh one.
+BROWSER_POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", 2))
+BROWSER_CONTEXT_MAX_USES = int(os.environ.get("BROWSER_CONTEXT_MAX_USES", 50))
+# Viewport a page is reset to when the caller does not ask for one
+DEFAULT_VIEWPORT = {"width": 1280, "height": 720}
+
+
+class _PooledContext:
+    def __init__(self, context, generation: int, queue: asyncio.Queue):
+        self.context = context
+        self.generation = generation
+        self.queue = queue
+        self.page = None  # kept warm across uses, so page setup is paid once
+        self.uses = 0
+        self.broken = False
+
+
+class BrowserPool:
+    """A long-lived headless Chromium that hands out pages from warm contexts.
+
+    Playwright objects are bound to the event loop that created them, so the
+    pool owns a dedicated loop running in a daemon thread. Callers on any
+    loop (or no loop at all) submit work through `run`.
+    """
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_uses: int = BROWSER_CONTEXT_MAX_USES):
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self._loop = None
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._playwright = None
+        self._browser = None
+        self._idle = None
+        self._start_lock = None
+        self._generation = 0
+        self._closed = False
+
+    # ---- loop management -------------------------------------------------
+
+    def _ensure_loop(self):
+        with self._thread_lock:
+            if self._closed:
+                raise RuntimeError("Browser pool has been shut down")
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="browser-pool", daemon=True
+                )
+                self._thread.start()
+        return self._loop
+
+    def run(self, fn, **page_options):
+        """Run `await fn(page)` on a pooled page; returns an awaitable for the caller's loop."""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self._run(fn, page_options), loop)
+        return asyncio.wrap_future(future)
+
+    def run_sync(self, fn, **page_options):
+        """Blocking variant of `run` for callers without an event loop."""
+        loop = self._ensure_loop()
+        return asyncio.run_coroutine_threadsafe(self._run(fn, page_options), loop).result()
+
+    # ---- pool internals (run on the pool loop) ---------------------------
+
+    async def _run(self, fn, page_options):
+        async with self.page(**page_options) as page:
+            return await fn(page)
+
+    async def _start(self):
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            from playwright.async_api import async_playwright
+
+            await self._stop_browser()
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._generation += 1
+            self._idle = asyncio.Queue()
+            for _ in range(self.size):
+                self._idle.put_nowait(await self._new_context())
+            logger.info(
+                "Browser pool started with %d contexts (generation %d)",
+                self.size,
+                self._generation,
+            )
+
+    async def _new_context(self):
+        context = await self._browser.new_context()
+        return _PooledContext(context, self._generation, self._idle)
+
+    def _is_live(self, slot: _PooledContext) -> bool:
+        return (
+            slot.generation == self._generation
+            and self._browser is not None
+            and self._browser.is_connected()
+        )
+
+    async def _acquire(self) -> _PooledContext:
+        while True:
+            await self._start()
+            slot = await self._idle.get()
+            if self._is_live(slot):
+                return slot
+            # Left over from a crashed browser: pass it on so other waiters on
+            # the old queue wake up too, then retry against a relaunched browser.
+            slot.queue.put_nowait(slot)
+
+    async def _release(self, slot: _PooledContext):
+        if slot.broken or slot.uses >= self.max_uses or not self._is_live(slot):
+            try:
+                await slot.context.close()
+            except Exception:
+                logger.debug("Ignoring error while closing browser context", exc_info=True)
+            if self._is_live(slot):
+                try:
+                    slot = await self._new_context()
+                except Exception:
+                    logger.exception("Could not replace browser context")
+                    slot.broken = True
+        slot.queue.put_nowait(slot)
+
+    @asynccontextmanager
+    async def page(self, viewport: dict | None = None):
+        """Borrow the warm page of a pooled context. Must run on the pool loop.
+
+        The page is reused until its context is recycled, so whatever a caller
+        loads into it stays there for the next one; callers reset what they use.
+        A failed use discards the context together with its page.
+        """
+        slot = await self._acquire()
+        try:
+            if slot.page is None or slot.page.is_closed():
+                slot.page = await slot.context.new_page()
+            await slot.page.set_viewport_size(viewport or DEFAULT_VIEWPORT)
+            yield slot.page
+        except Exception:
+            slot.broken = True
+            raise
+        finally:
+            slot.uses += 1
+            await self._release(slot)
+
+    async def _stop_browser(self):
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                logger.debug("Ignoring error while closing browser", exc_info=True)
+            self._browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception:
+                logger.debug("Ignoring error while stopping playwright", exc_info=True)
+            self._playwright = None
+
+    # ---- shutdown --------------------------------------------------------
+
+    def shutdown(self, timeout: float = 10):
+        with self._thread_lock:
+            self._closed = True
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._stop_browser(), loop).result(timeout)
+        except Exception:
+            logger.warning("Browser pool did not shut down cleanly", exc_info=True)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+
+
+_pool: BrowserPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def shutdown_browser_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
@@ -0,0 +1,184 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+
+logger = logging.getLogger(__name__)
+
+# CHECKPOINTER selects where graph state is kept: "memory" (default), "sqlite" or "off"
+CHECKPOINTER = os.environ.get("CHECKPOINTER", "memory").lower()
+CHECKPOINTER_MAX_THREADS = int(os.environ.get("CHECKPOINTER_MAX_THREADS", 128))
+CHECKPOINTER_TTL = float(os.environ.get("CHECKPOINTER_TTL", 60 * 60))
+CHECKPOINTER_SQLITE_PATH = os.environ.get("CHECKPOINTER_SQLITE_PATH", "checkpoints.sqlite3")
+
+
+class _ThreadEvictionMixin:
+    """Forget whole threads once there are too many or they sit idle too long.
+
+    Subclasses call `_touch` whenever a thread is read or written; evicted
+    threads are removed with the saver's own `delete_thread`.
+    """
+
+    def _init_eviction(self, max_threads: int, ttl: float):
+        self.max_threads = max(1, max_threads)
+        self.ttl = ttl
+        self.evicted_threads = 0
+        self._threads = OrderedDict()  # thread_id -> last used (monotonic)
+        self._threads_lock = threading.Lock()
+
+    def _touch(self, config):
+        thread_id = config.get("configurable", {}).get("thread_id")
+        if thread_id is None:
+            return
+        now = time.monotonic()
+        expired = []
+        with self._threads_lock:
+            self._threads[thread_id] = now
+            self._threads.move_to_end(thread_id)
+            while len(self._threads) > 1:
+                oldest, last_used = next(iter(self._threads.items()))
+                if len(self._threads) <= self.max_threads and now - last_used <= self.ttl:
+                    break
+                del self._threads[oldest]
+                expired.append(oldest)
+        for expired_id in expired:
+            self.delete_thread(expired_id)
+            self.evicted_threads += 1
+
+    def _forget(self, thread_id):
+        with self._threads_lock:
+            self._threads.pop(thread_id, None)
+
+    def delete_thread(self, thread_id):
+        # Deleted by the app, not evicted: stop counting it, or it would later be
+        # "evicted" again and hold a slot in the LRU until then
+        self._forget(thread_id)
+        return super().delete_thread(thread_id)
+
+    async def adelete_thread(self, thread_id):
+        self._forget(thread_id)
+        return await super().adelete_thread(thread_id)
+
+    @property
+    def thread_count(self) -> int:
+        return len(self._threads)
+
+
+def _approx_size(obj) -> int:
+    if isinstance(obj, (bytes, bytearray, str)):
+        return len(obj)
+    if isinstance(obj, dict):
+        return sum(_approx_size(k) + _approx_size(v) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return sum(_approx_size(item) for item in obj)
+    return 8
+
+
+class BoundedMemorySaver(_ThreadEvictionMixin, MemorySaver):
+    """MemorySaver with LRU/TTL eviction of threads."""
+
+    def __init__(self, max_threads: int = CHECKPOINTER_MAX_THREADS, ttl: float = CHECKPOINTER_TTL):
+        super().__init__()
+        self._init_eviction(max_threads, ttl)
+
+    def get_tuple(self, config):
+        self._touch(config)
+        return super().get_tuple(config)
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        self._touch(config)
+        return super().put(config, checkpoint, metadata, new_versions)
+
+    def stats(self) -> dict:
+        return {
+            "threads": self.thread_count,
+            "evicted_threads": self.evicted_threads,
+            "bytes": _approx_size(self.storage) + _approx_size(self.writes) + _approx_size(self.blobs),
+        }
+
+
+def _sqlite_saver(path: str, max_threads: int, ttl: float):
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError as e:
+        raise ImportError(
+            "CHECKPOINTER=sqlite needs the langgraph-checkpoint-sqlite package"
+        ) from e
+    import sqlite3
+
+    class BoundedSqliteSaver(_ThreadEvictionMixin, SqliteSaver):
+        """SqliteSaver with thread eviction and async methods run in worker threads.
+
+        The stock async SQLite saver binds itself to the event loop it was
+        created on; running the sync implementation off-loop avoids that.
+        """
+
+        def __init__(self):
+            super().__init__(sqlite3.connect(path, check_same_thread=False))
+            self._init_eviction(max_threads, ttl)
+            self.path = path
+
+        def get_tuple(self, config):
+            self._touch(config)
+            return super().get_tuple(config)
+
+        def put(self, config, checkpoint, metadata, new_versions):
+            self._touch(config)
+            return super().put(config, checkpoint, metadata, new_versions)
+
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            items = await asyncio.to_thread(
+                lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+            )
+            for item in items:
+                yield item
+
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+        async def aput_writes(self, config, writes, task_id, task_path=""):
+            return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+        def stats(self) -> dict:
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            return {
+                "threads": self.thread_count,
+                "evicted_threads": self.evicted_threads,
+                "bytes": size,
+            }
+
+    return BoundedSqliteSaver()
+
+
+def make_checkpointer(kind: str = CHECKPOINTER):
+    """Build the checkpointer selected by CHECKPOINTER, or None when it is off"""
+    if kind in ("off", "none", "0", "false"):
+        return None
+    if kind == "sqlite":
+        saver = _sqlite_saver(CHECKPOINTER_SQLITE_PATH, CHECKPOINTER_MAX_THREADS, CHECKPOINTER_TTL)
+    elif kind == "memory":
+        saver = BoundedMemorySaver()
+    else:
+        raise ValueError(f"Unknown CHECKPOINTER {kind!r}, expected memory, sqlite or off")
+    logger.info("Using %s checkpointer", type(saver).__name__)
+    return saver
+
+
+def checkpointer_stats(checkpointer) -> dict:
+    """Thread count and approximate memory/disk usage of a checkpointer"""
+    if checkpointer is None:
+        return {"threads": 0, "evicted_threads": 0, "bytes": 0}
+    return checkpointer.stats()
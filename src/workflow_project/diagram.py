@@ -0,0 +1,103 @@
+import re
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from workflow_project.utils import MERMAID_FENCE, CODE_FENCE
+
+# Styles used by the comparison prompt's example diagram
+COMPARISON_STYLES = {
+    "asis": "fill:#ffcccc,stroke:#b30000,stroke-width:2px,color:#000",
+    "tobe": "fill:#ccffcc,stroke:#006600,stroke-width:2px,color:#000",
+    "common": "fill:#cce5ff,stroke:#004080,stroke-width:2px,color:#000",
+}
+# The As-Is prompt's example draws every step in green
+AS_IS_STYLES = {
+    "asis": "fill:#f1f8e9,stroke:#388e3c,stroke-width:2px,color:#1b5e20",
+    "tobe": COMPARISON_STYLES["tobe"],
+    "common": COMPARISON_STYLES["common"],
+}
+LEGEND = {"asis": "As-Is Manual", "tobe": "To-Be Workflow Tool", "common": "Common Steps"}
+
+
+class DiagramNode(BaseModel):
+    id: str = Field(description="Short unique node id such as A, B, C")
+    label: str = Field(description="Concise step description")
+    kind: Literal["asis", "tobe", "common"]
+    shape: Literal["process", "decision"] = "process"
+
+
+class DiagramEdge(BaseModel):
+    source: str = Field(description="Id of the node the edge starts at")
+    target: str = Field(description="Id of the node the edge ends at")
+    label: str = Field(default="", description="Optional branch label")
+
+
+class WorkflowDiagram(BaseModel):
+    """A process flowchart as nodes and edges; styling is added when it is compiled."""
+
+    summary: str = Field(description="One or two sentence overview")
+    nodes: list[DiagramNode]
+    edges: list[DiagramEdge]
+
+
+_UNSAFE_ID = re.compile(r"[^A-Za-z0-9_]")
+# Characters that end or confuse a mermaid label
+_LABEL_DROP = str.maketrans({c: " " for c in '[]{}|"<>;`'})
+
+
+def _label(text: str) -> str:
+    # Same rule fix_mermaid applies to free-form output: no parentheses in labels
+    text = text.translate(_LABEL_DROP).replace("(", "-").replace(")", "-")
+    return " ".join(text.split()) or "Step"
+
+
+def _node_ids(nodes: list[DiagramNode]) -> dict[str, str]:
+    """Map the model's ids to unique, mermaid-safe ones"""
+    ids = {}
+    used = set()
+    for index, node in enumerate(nodes):
+        safe = _UNSAFE_ID.sub("_", node.id.strip()) or f"N{index}"
+        # mermaid misreads ids that start with a digit or with the keyword "end";
+        # Legend_* ids are reserved for the legend
+        if safe[0].isdigit() or safe.lower().startswith(("end", "graph", "subgraph", "legend_")):
+            safe = f"N{safe}"
+        while safe in used:
+            safe = f"{safe}_{index}"
+        used.add(safe)
+        ids.setdefault(node.id, safe)
+    return ids
+
+
+def compile_mermaid(diagram: WorkflowDiagram, as_is_only: bool = False) -> str:
+    """Deterministic mermaid flowchart code for a structured diagram"""
+    styles = AS_IS_STYLES if as_is_only else COMPARISON_STYLES
+    ids = _node_ids(diagram.nodes)
+    kinds = sorted({node.kind for node in diagram.nodes}, key=list(LEGEND).index)
+
+    lines = ["flowchart TD", ""]
+    lines += [f"classDef {kind} {styles[kind]}" for kind in kinds]
+    lines.append("")
+    for node in diagram.nodes:
+        label = _label(node.label)
+        shape = f"{{{{{label}}}}}" if node.shape == "decision" else f"[{label}]"
+        lines.append(f"{ids[node.id]}{shape}:::{node.kind}")
+    lines.append("")
+    for edge in diagram.edges:
+        # Edges to nodes the model never declared would create unstyled placeholders
+        if edge.source not in ids or edge.target not in ids:
+            continue
+        arrow = f"-->|{_label(edge.label)}|" if edge.label.strip() else "-->"
+        lines.append(f"{ids[edge.source]} {arrow} {ids[edge.target]}")
+
+    if not as_is_only and len(kinds) > 1:
+        lines += ["", "subgraph Legend"]
+        lines += [f"Legend_{kind}[{LEGEND[kind]}]:::{kind}" for kind in kinds]
+        lines.append("end")
+    return "\n".join(lines)
+
+
+def diagram_markdown(diagram: WorkflowDiagram, as_is_only: bool = False) -> str:
+    """The summary followed by the compiled diagram, shaped like a free-form model answer"""
+    code = compile_mermaid(diagram, as_is_only)
+    return f"{diagram.summary.strip()}\n\n{MERMAID_FENCE}\n{code}\n{CODE_FENCE}"
@@ -0,0 +1,349 @@
+import asyncio
+import collections
+import io
+import itertools
+import logging
+import os
+import zipfile
+from pathlib import Path
+
+from workflow_project.browser_pool import get_browser_pool, BROWSER_POOL_SIZE
+from workflow_project.limiter import ConcurrencyLimiter
+from workflow_project.metrics import EXPORT_RENDER_SECONDS
+from workflow_project.pdf_pages import PagedPdfWriter
+from workflow_project.native_render import UnsupportedDiagram, render_svg, svg_to_pdf, svg_to_png
+from workflow_project.render_cache import get_render_cache, render_cache_key
+from workflow_project.tiling import split_flowchart
+
+logger = logging.getLogger(__name__)
+
+MERMAID_VERSION = "10.9.1"
+MERMAID_CDN_URL = f"https://cdn.jsdelivr.net/npm/mermaid@{MERMAID_VERSION}/dist/mermaid.min.js"
+
+# mermaid.js is shipped inside the package so exports work without network
+# access. See the Dockerfile / Pipfile `vendor-mermaid` script for how it is fetched.
+MERMAID_JS_PATH = Path(
+    os.environ.get("MERMAID_JS_PATH", Path(__file__).parent / "static" / "mermaid.min.js")
+)
+# Load mermaid.js from MERMAID_CDN_URL (with a warning) when the bundled copy is
+# missing; set to 0 to make a missing copy a startup error instead
+MERMAID_ALLOW_CDN = os.environ.get("MERMAID_ALLOW_CDN", "1").lower() not in ("0", "false", "no")
+
+# Renders allowed at once, and how many more may wait before new ones are rejected
+EXPORT_CONCURRENCY = int(os.environ.get("EXPORT_CONCURRENCY", BROWSER_POOL_SIZE))
+EXPORT_MAX_QUEUE = int(os.environ.get("EXPORT_MAX_QUEUE", 8))
+
+export_limiter = ConcurrencyLimiter("export", EXPORT_CONCURRENCY, EXPORT_MAX_QUEUE)
+
+# "auto" renders the flowchart subset natively and falls back to the browser for
+# anything else; "native" and "browser" force one renderer.
+EXPORT_RENDERER = os.environ.get("EXPORT_RENDERER", "auto")
+
+PNG_VIEWPORT = {"width": 1200, "height": 800}
+# Default PNG scale and the scales offered in the UI / export bundle
+PNG_SCALE = float(os.environ.get("EXPORT_PNG_SCALE", 2))
+PNG_SCALES = tuple(float(s) for s in os.environ.get("EXPORT_PNG_SCALES", "1,2,3").split(","))
+# Paged PDF: margin and the height reserved for the "Page x of y" header, in points
+PAGED_PDF_MARGIN = 28
+PAGED_PDF_HEADER = 16
+PDF_OPTIONS = {
+    "format": "A4",
+    "print_background": True,
+    "margin": {"top": "20px", "right": "20px", "bottom": "20px", "left": "20px"},
+}
+
+EXPORT_HTML = """
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body {
+            margin: 0;
+            padding: 40px;
+            background: white;
+            font-family: Arial, sans-serif;
+            display: flex;
+            justify-content: center;
+            align-items: center;
+            min-height: 100vh;
+        }
+        .mermaid {
+            background: white !important;
+            max-width: 100%;
+        }
+        .diagram { display: inline-block; background: white; }
+        @media print {
+            body {
+                min-height: auto;
+            }
+            .diagram svg { max-width: 100%; height: auto; }
+        }
+    </style>
+</head>
+<body>
+    <div class="mermaid"></div>
+    <div class="diagram"></div>
+</body>
+</html>
+"""
+
+# Resolves once mermaid has finished rendering, so there is no need for a timer.
+RENDER_SCRIPT = """
+async (code) => {
+    document.querySelector('.diagram').innerHTML = '';
+    const el = document.querySelector('.mermaid');
+    // The page is reused: mermaid skips elements it has already processed
+    el.removeAttribute('data-processed');
+    el.textContent = code;
+    mermaid.initialize({
+        startOnLoad: false,
+        theme: 'default',
+        background: '#ffffff',
+        flowchart: {
+            useMaxWidth: true,
+            htmlLabels: true
+        }
+    });
+    await mermaid.run({ nodes: [el] });
+}
+"""
+
+
+def check_mermaid_js():
+    """Warn at startup when mermaid.js is not bundled; raise if the CDN is not allowed either"""
+    if MERMAID_JS_PATH.is_file() or EXPORT_RENDERER == "native":
+        return
+    if not MERMAID_ALLOW_CDN:
+        raise FileNotFoundError(
+            f"Bundled mermaid.js {MERMAID_VERSION} not found at {MERMAID_JS_PATH}. "
+            "Run `pipenv run vendor-mermaid`, or drop MERMAID_ALLOW_CDN=0 to load it from the CDN."
+        )
+    logger.warning(
+        "Bundled mermaid.js not found at %s, loading it from %s", MERMAID_JS_PATH, MERMAID_CDN_URL
+    )
+
+
+def _mermaid_script_tag() -> dict:
+    if MERMAID_JS_PATH.is_file():
+        return {"path": str(MERMAID_JS_PATH)}
+    if not MERMAID_ALLOW_CDN:
+        raise FileNotFoundError(f"Bundled mermaid.js not found at {MERMAID_JS_PATH}")
+    return {"url": MERMAID_CDN_URL}
+
+
+SHOW_SVG_SCRIPT = """
+([svg, scale]) => {
+    document.querySelector('.mermaid').innerHTML = '';
+    const el = document.querySelector('.diagram');
+    el.innerHTML = svg;
+    el.style.zoom = scale;
+}
+"""
+
+SERIALIZE_SVG_SCRIPT = "el => new XMLSerializer().serializeToString(el)"
+
+
+PAGE_READY_SCRIPT = "() => window.__workflowExport === true"
+
+
+async def prepare_page(page, timeout: float = 15000):
+    """Load the export document and mermaid.js into a pooled page, once per page.
+
+    Pooled pages are reused, so the ~3 MB script is parsed once rather than
+    on every render. RENDER_SCRIPT and SHOW_SVG_SCRIPT clear what the
+    previous render left behind.
+    """
+    page.set_default_timeout(timeout)
+    if await page.evaluate(PAGE_READY_SCRIPT):
+        return
+    await page.set_content(EXPORT_HTML)
+    await page.add_script_tag(**_mermaid_script_tag())
+    await page.evaluate("() => { window.__workflowExport = true; }")
+
+
+async def render_mermaid(page, mermaid_code: str, timeout: float = 15000):
+    """Render `mermaid_code` into `page` and return once the SVG is in the DOM."""
+    await prepare_page(page, timeout)
+    await page.evaluate(RENDER_SCRIPT, mermaid_code)
+
+
+_cairo_unavailable = False
+
+
+async def _render_native(mermaid_code: str) -> str | None:
+    """SVG from the built-in renderer, or None when the browser has to do it"""
+    if EXPORT_RENDERER == "browser":
+        return None
+    try:
+        return await asyncio.to_thread(render_svg, mermaid_code)
+    except UnsupportedDiagram as e:
+        if EXPORT_RENDERER == "native":
+            raise
+        logger.info("Using the browser renderer: %s", e)
+        return None
+
+
+async def _convert_svg(svg: str, convert, browser_render, **page_options) -> bytes:
+    """Turn rendered SVG into another format with cairosvg, or in a browser page.
+
+    SVG coming from mermaid itself uses HTML labels (foreignObject), which
+    only a browser draws correctly.
+    """
+    global _cairo_unavailable
+    if EXPORT_RENDERER != "browser" and not _cairo_unavailable and "<foreignObject" not in svg:
+        try:
+            return await asyncio.to_thread(convert, svg)
+        except (ImportError, OSError) as e:
+            # cairosvg or the cairo library itself is missing
+            if EXPORT_RENDERER == "native":
+                raise
+            logger.warning("cairosvg unavailable, converting SVG in the browser: %s", e)
+            _cairo_unavailable = True
+
+    async def render(page):
+        await prepare_page(page)
+        return await browser_render(page)
+
+    return await get_browser_pool().run(render, **page_options)
+
+
+async def _cached_render(mermaid_code: str, fmt: str, options: dict, render) -> bytes:
+    """Return cached bytes for this diagram/format/options, rendering on a miss"""
+    cache = get_render_cache()
+    key = render_cache_key(
+        mermaid_code, fmt, {**options, "mermaid": MERMAID_VERSION, "renderer": EXPORT_RENDERER}
+    )
+    # Disk tier I/O stays off the event loop
+    data = await asyncio.to_thread(cache.get, key)
+    if data is None:
+        # Only actual renders take an export slot; cache hits never queue
+        async with export_limiter.slot():
+            with EXPORT_RENDER_SECONDS.time(format=fmt):
+                data = await render()
+        await asyncio.to_thread(cache.put, key, data)
+    return data
+
+
+async def render_diagram_svg(mermaid_code: str) -> str:
+    """Render a diagram once to standalone SVG; every other format is derived from it"""
+
+    async def render(page):
+        await render_mermaid(page, mermaid_code)
+        return await page.locator(".mermaid svg").evaluate(SERIALIZE_SVG_SCRIPT)
+
+    async def render_any():
+        svg = await _render_native(mermaid_code)
+        if svg is None:
+            svg = await get_browser_pool().run(render)
+        return svg.encode("utf-8")
+
+    data = await _cached_render(mermaid_code, "svg", {}, render_any)
+    return data.decode("utf-8")
+
+
+async def _png_from_svg(mermaid_code: str, svg: str, scale: float) -> bytes:
+    async def screenshot(page):
+        await page.evaluate(SHOW_SVG_SCRIPT, [svg, scale])
+        return await page.locator(".diagram").screenshot(omit_background=True)
+
+    return await _cached_render(
+        mermaid_code,
+        "png",
+        {"scale": scale},
+        lambda: _convert_svg(svg, lambda s: svg_to_png(s, scale), screenshot, viewport=PNG_VIEWPORT),
+    )
+
+
+async def _pdf_from_svg(mermaid_code: str, svg: str, pdf_options: dict) -> bytes:
+    async def print_pdf(page):
+        await page.evaluate(SHOW_SVG_SCRIPT, [svg, 1])
+        return await page.pdf(**pdf_options)
+
+    # The cairosvg PDF is sized to the diagram; pdf_options apply to the browser path
+    return await _cached_render(
+        mermaid_code, "pdf", pdf_options, lambda: _convert_svg(svg, svg_to_pdf, print_pdf)
+    )
+
+
+async def render_png(mermaid_code: str, scale: float = PNG_SCALE) -> bytes:
+    """Render a mermaid diagram to PNG bytes at `scale` times its natural size"""
+    svg = await render_diagram_svg(mermaid_code)
+    return await _png_from_svg(mermaid_code, svg, scale)
+
+
+async def render_pdf(mermaid_code: str, pdf_options: dict = PDF_OPTIONS) -> bytes:
+    """Render a mermaid diagram to PDF bytes"""
+    svg = await render_diagram_svg(mermaid_code)
+    return await _pdf_from_svg(mermaid_code, svg, pdf_options)
+
+
+async def render_bundle(mermaid_code: str, scales=PNG_SCALES) -> bytes:
+    """Zip of the .mmd source, SVG, PDF and a PNG per scale, all from a single render"""
+    svg = await render_diagram_svg(mermaid_code)
+    *pngs, pdf = await asyncio.gather(
+        *(_png_from_svg(mermaid_code, svg, scale) for scale in scales),
+        _pdf_from_svg(mermaid_code, svg, PDF_OPTIONS),
+    )
+
+    def pack() -> bytes:
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as bundle:
+            bundle.writestr("workflow.mmd", mermaid_code)
+            bundle.writestr("workflow.svg", svg)
+            bundle.writestr("workflow.pdf", pdf)
+            for scale, png in zip(scales, pngs):
+                bundle.writestr(f"workflow@{scale:g}x.png", png)
+        return buffer.getvalue()
+
+    return await asyncio.to_thread(pack)
+
+
+async def _render_pages(mermaid_code: str, render):
+    """Yield (page, render(page.code)) in page order, at most EXPORT_CONCURRENCY pages in flight.
+
+    Only the pages in the window are held at once, so memory does not grow
+    with the number of pages.
+    """
+    pages = await asyncio.to_thread(split_flowchart, mermaid_code)
+    pending = collections.deque()
+    remaining = iter(pages)
+    try:
+        for page in itertools.islice(remaining, max(1, EXPORT_CONCURRENCY)):
+            pending.append((page, asyncio.ensure_future(render(page.code))))
+        while pending:
+            page, task = pending.popleft()
+            data = await task
+            following = next(remaining, None)
+            if following is not None:
+                pending.append((following, asyncio.ensure_future(render(following.code))))
+            yield len(pages), page, data
+    finally:
+        for _, task in pending:
+            task.cancel()
+
+
+async def render_png_tiles(mermaid_code: str, out, scale: float = PNG_SCALE):
+    """Write a zip of one PNG per page of a large diagram, plus its .mmd source, to the binary file `out`
+
+    Each page is written as soon as it is rendered, so nothing but the
+    render window is held in memory.
+    """
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as tiles:
+        tiles.writestr("workflow.mmd", mermaid_code)
+        async for _, page, png in _render_pages(mermaid_code, lambda code: render_png(code, scale)):
+            await asyncio.to_thread(tiles.writestr, f"workflow-page{page.number:02d}.png", png)
+
+
+async def render_paged_pdf(mermaid_code: str, out, scale: float = PNG_SCALE):
+    """Write a multi-page PDF of a large diagram, one page per piece, to the binary file `out`"""
+    pdf = PagedPdfWriter(out, PAGED_PDF_MARGIN, PAGED_PDF_HEADER)
+    async for total, page, png in _render_pages(mermaid_code, lambda code: render_png(code, scale)):
+        # Shrink to fit, but never enlarge past the diagram's natural size (0.75pt per CSS px)
+        await asyncio.to_thread(pdf.add_page, png, 0.75 / scale, page.number, total)
+    await asyncio.to_thread(pdf.close)
+
+
+async def render_pages(mermaid_code: str, scale: float = PNG_SCALE):
+    """Render (and cache) every page PNG of a large diagram without assembling a file"""
+    async for _ in _render_pages(mermaid_code, lambda code: render_png(code, scale)):
+        pass
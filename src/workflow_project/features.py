@@ -0,0 +1,149 @@
+import math
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass
+
+# How many catalog entries are sent to the model per request
+FEATURES_TOP_K = int(os.environ.get("FEATURES_TOP_K", 6))
+
+
+@dataclass(frozen=True)
+class Feature:
+    number: int
+    category: str
+    name: str
+    description: str
+    # Extra words clients tend to use for this feature, to help the index
+    keywords: tuple[str, ...] = ()
+
+    @property
+    def text(self) -> str:
+        return " ".join((self.category, self.name, self.description, *self.keywords))
+
+
+FEATURE_CATALOG = (
+    Feature(1, "PROCESS DEFINTION", "Process Modify/Add New", "Create or modify an existing process.",
+            ("new process", "workflow", "setup")),
+    Feature(2, "PROCESS DEFINTION", "Process Details", "Define process details like job number, supervisor, and formatting.",
+            ("job id", "owner")),
+    Feature(3, "PROCESS DEFINTION", "Activity Details", "Configure activities and sub-activities for the process.",
+            ("steps", "tasks", "sub-task")),
+    Feature(4, "PROCESS DEFINTION", "Custom Attribute Mapping", "Create and map custom attribute groups, and define which attributes are visible during task creation.",
+            ("fields", "data points", "metadata", "missing data")),
+    Feature(5, "PROCESS DEFINTION", "State Definition", "Define state list (active/inactive), set state flow transitions, and manage state-level attribute visibility.",
+            ("status", "stage", "lifecycle", "pending", "complete")),
+    Feature(6, "PROCESS DEFINTION", "Skill Group Mapping", "Map skill groups to processes, set job targets (group/user), choose allocation algorithm & mode, and define transfer rules.",
+            ("team", "skills", "assign", "assignment", "transfer", "targets")),
+    Feature(7, "PROCESS DEFINTION", "Prioritization Rules", "Configure prioritization rules based on custom/standard attribute weights.",
+            ("priority", "urgent", "order", "weightage")),
+    Feature(8, "PROCESS DEFINTION", "Allocation Rules", "Define allocation rules using standard/custom attributes.",
+            ("assign", "assignment", "distribute", "work queue", "route", "routing", "auto allocation")),
+    Feature(9, "PROCESS DEFINTION", "Activity Mapping", "Map productive activities for the process.",
+            ("productive", "productivity", "time tracking")),
+    Feature(10, "PROCESS DEFINTION", "Custom Task Form", "Select standard attributes to be visible or hidden in the job form.",
+            ("form", "fields", "dropdown", "input screen")),
+    Feature(11, "PROCESS DEFINTION", "Quality Checklist", "Create a checklist of quality elements with severity and pass/fail criteria.",
+            ("qc", "audit", "review", "errors", "accuracy", "verification")),
+    Feature(12, "PROCESS DEFINTION", "SLA Conditions", "Define SLA conditions using date attributes.",
+            ("deadline", "due date", "turnaround", "tat", "delay", "overdue")),
+    Feature(13, "PROCESS DEFINTION", "Task Linking", "Set rules to link tasks across same/different processes based on attributes.",
+            ("link", "related", "dependency", "parent", "child", "rework")),
+    Feature(14, "PROCESS DEFINTION", "Notification", "Configure notifications with conditions, frequency, channels, and recipients.",
+            ("email", "alert", "notify", "reminder", "escalation", "message")),
+    Feature(15, "CUSTOM ATTRIBUTE", "Field Configurations", "Define field type (text, dropdown, checkbox, etc.), add options, set default values, specify value type/length, mark mandatory/optional, control editability, and activate/deactivate fields.",
+            ("validation", "mandatory", "picklist", "data entry")),
+    Feature(16, "TEAM AND SKILL GROUPS", "Team & Skill Group Details", "Define team name/description and add/remove users in skill groups.",
+            ("team", "members", "associates", "users")),
+    Feature(17, "SCHEDULER TEMPLATE", "Template Setup", "Configure recurrence patterns, schedule times, and set active/inactive status.",
+            ("recurring", "schedule", "daily", "weekly", "monthly", "automatic creation")),
+    Feature(18, "USER ROLE", "Administrator Role", "Manage users, menu permissions, action permissions, and display permissions.",
+            ("admin", "access", "security")),
+    Feature(19, "USER ROLE", "Supervisor Role", "Manage users, menu permissions, action permissions, and display permissions.",
+            ("supervisor", "manager", "team lead", "approval", "access")),
+    Feature(20, "USER ROLE", "Associate Role", "Manage menu permissions, action permissions, and display permissions.",
+            ("associate", "agent", "processor", "access")),
+)
+
+
+def format_features(selected=FEATURE_CATALOG) -> str:
+    """Render features in the catalog's original numbered, grouped text layout"""
+    lines = []
+    category = None
+    for feature in sorted(selected, key=lambda f: f.number):
+        if feature.category != category:
+            category = feature.category
+            lines.append(f"{category}:")
+        lines.append(f"    {feature.number}. {feature.name}: {feature.description}")
+    return "\n".join(lines)
+
+
+_WORD = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    """a an and are as at be by can for from has have in into is it its of on or so such
+    that the their them then there these they this to was we were will with our your
+    using use used based like etc via per all each which who when where what also""".split()
+)
+_SUFFIXES = ("ization", "ations", "ation", "izes", "ized", "ize", "ings", "ing",
+             "ates", "ated", "ate", "ies", "es", "ed", "s")
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    return [_stem(w) for w in _WORD.findall(text.lower()) if w not in _STOPWORDS]
+
+
+class FeatureIndex:
+    """A small in-process BM25 index over the feature catalog."""
+
+    def __init__(self, features=FEATURE_CATALOG, k1: float = 1.5, b: float = 0.75):
+        self.features = tuple(features)
+        self.k1 = k1
+        self.b = b
+        self._docs = [Counter(tokenize(f.text)) for f in self.features]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = sum(self._lengths) / max(1, len(self._lengths))
+        doc_freq = Counter(term for doc in self._docs for term in doc)
+        n = len(self._docs)
+        self._idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()
+        }
+
+    def scores(self, query: str) -> list[float]:
+        terms = [t for t in set(tokenize(query)) if t in self._idf]
+        results = []
+        for doc, length in zip(self._docs, self._lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self._avg_length)
+            for term in terms:
+                tf = doc.get(term)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+    def search(self, query: str, k: int = FEATURES_TOP_K) -> list[Feature]:
+        """Top-k matching features, best first; empty when nothing matches"""
+        ranked = sorted(
+            ((score, feature) for score, feature in zip(self.scores(query), self.features) if score > 0),
+            key=lambda pair: (-pair[0], pair[1].number),
+        )
+        return [feature for _, feature in ranked[:k]]
+
+
+_index: FeatureIndex | None = None
+
+
+def select_features(query: str, k: int = FEATURES_TOP_K) -> str:
+    """Formatted catalog entries relevant to `query`, or the whole catalog if none match"""
+    global _index
+    if _index is None:
+        _index = FeatureIndex()
+    selected = _index.search(query, k) if k > 0 else []
+    return format_features(selected or FEATURE_CATALOG)
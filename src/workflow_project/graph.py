@@ -1,88 +1,603 @@
-from dotenv import load_dotenv
+import functools
+import logging
+import os
+import threading
 
-load_dotenv()
-from langgraph.graph import StateGraph, MessagesState, START, END
-from langgraph.checkpoint.memory import MemorySaver
-from langchain_core.messages import SystemMessage
+from workflow_project.prompts import (
+    prompt_comparison,
+    prompt_comparison_inputs,
+    prompt_as_is,
+    prompt_as_is_inputs,
+    prompt_structured_as_is,
+    prompt_structured_comparison,
+    prompt_patch,
+    prompt_patch_inputs,
+    PROMPT_VERSION,
+)
+from workflow_project.metrics import (
+    ERRORS,
+    DIAGRAM_PATCHES,
+    LLM_CACHE_HITS,
+    LLM_LATENCY_SECONDS,
+    LLM_TOKENS,
+    LLM_TTFT_SECONDS,
+    ROUTE_FALLBACKS,
+    ROUTE_LATENCY_SECONDS,
+)
 
-from langchain.chat_models import init_chat_model
-from langchain_core.language_models import BaseChatModel
-from workflow_project.prompts import prompt_comparison, prompt_as_is
+# Everything expensive (dotenv, langchain/langgraph/langfuse imports, model
+# construction and graph compilation) happens on first use through the
+# accessors below, so importing this module stays cheap on cold starts.
 
 DEFAULT_MODEL = "gpt-4o"
 DEFAULT_PROVIDER = "openai"
 
+# "mermaid": the model writes mermaid text itself. "structured": it returns nodes and
+# edges that diagram.compile_mermaid turns into mermaid locally, which needs far fewer
+# completion tokens and no fix-up pass.
+DIAGRAM_OUTPUT = os.environ.get("DIAGRAM_OUTPUT", "mermaid")
 
-from langfuse.langchain import CallbackHandler
+LLM_MAX_CONNECTIONS = int(os.environ.get("LLM_MAX_CONNECTIONS", 20))
+LLM_HTTP_TIMEOUT = float(os.environ.get("LLM_HTTP_TIMEOUT", 120))
 
-# Initialize the Langfuse handler
-langfuse_handler = CallbackHandler()
+logger = logging.getLogger(__name__)
 
+_init_lock = threading.RLock()
 
-def load_chat_model(model: str, provider: str) -> BaseChatModel:
-    return init_chat_model(model, model_provider=provider)
 
+def _cached(fn):
+    """functools.cache that also serialises the first, constructing call"""
+    cached_fn = functools.cache(fn)
 
-llm = load_chat_model(DEFAULT_MODEL, DEFAULT_PROVIDER)
+    @functools.wraps(fn)
+    def wrapper():
+        with _init_lock:
+            return cached_fn()
 
+    wrapper.cache_clear = cached_fn.cache_clear
+    return wrapper
 
-class WorkflowState(MessagesState):
-    proposed_solution: str
-    as_is_solution: str
 
+@_cached
+def load_env():
+    from dotenv import load_dotenv
 
-features = """ 
-PROCESS DEFINTION:
-    1. Process Modify/Add New: Create or modify an existing process.
-    2. Process Details: Define process details like job number, supervisor, and formatting.
-    3. Activity Details: Configure activities and sub-activities for the process.
-    4. Custom Attribute Mapping: Create and map custom attribute groups, and define which attributes are visible during task creation.
-    5. State Definition: Define state list (active/inactive), set state flow transitions, and manage state-level attribute visibility.
-    6. Skill Group Mapping: Map skill groups to processes, set job targets (group/user), choose allocation algorithm & mode, and define transfer rules.
-    7. Prioritization Rules: Configure prioritization rules based on custom/standard attribute weights.
-    8. Allocation Rules: Define allocation rules using standard/custom attributes.
-    9. Activity Mapping: Map productive activities for the process.
-    10. Custom Task Form: Select standard attributes to be visible or hidden in the job form.
-    11. Quality Checklist: Create a checklist of quality elements with severity and pass/fail criteria.
-    12. SLA Conditions: Define SLA conditions using date attributes.
-    13. Task Linking: Set rules to link tasks across same/different processes based on attributes.
-    14. Notification: Configure notifications with conditions, frequency, channels, and recipients.
-CUSTOM ATTRIBUTE:
-    15. Field Configurations: Define field type (text, dropdown, checkbox, etc.), add options, set default values, specify value type/length, mark mandatory/optional, control editability, and activate/deactivate fields.
-TEAM AND SKILL GROUPS
-    16. Team & Skill Group Details: Define team name/description and add/remove users in skill groups.
-SCHEDULER TEMPLATE
-    17. Template Setup: Configure recurrence patterns, schedule times, and set active/inactive status.
-USER ROLE
-    18. Administrator Role: Manage users, menu permissions, action permissions, and display permissions.
-    19. Supervisor Role: Manage users, menu permissions, action permissions, and display permissions.
-    20. Associate Role: Manage menu permissions, action permissions, and display permissions.
-"""
+    load_dotenv()
 
 
-def generate_graph(state: WorkflowState):
-    # - Output only the Mermaid.js code — no extra explanation or comments.
-    prompt = prompt_comparison.format(
-        as_is_solution=state["as_is_solution"],
-        proposed_solution=state["proposed_solution"],
-        features=features,
+@_cached
+def get_langfuse_handler():
+    load_env()
+    from langfuse.langchain import CallbackHandler
+
+    # Initialize the Langfuse handler
+    return CallbackHandler()
+
+
+@_cached
+def get_http_async_client():
+    """Shared httpx.AsyncClient so concurrent LLM calls reuse pooled connections"""
+    import httpx
+
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_CONNECTIONS,
+        ),
+        timeout=httpx.Timeout(LLM_HTTP_TIMEOUT, connect=10.0),
+    )
+
+
+@_cached
+def get_metrics_handler():
+    """Callback handler recording time-to-first-token, latency and token counts of every LLM call"""
+    import asyncio
+    import time
+
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    class LLMMetricsHandler(BaseCallbackHandler):
+        # Called for every streamed token: run the cheap bookkeeping inline instead
+        # of dispatching each callback through the default thread-pool executor
+        run_inline = True
+
+        def __init__(self):
+            # run id -> [start time, model name, first token seen]
+            self._runs = {}
+
+        def _start(self, run_id, kwargs):
+            model = (kwargs.get("metadata") or {}).get("ls_model_name") or "unknown"
+            self._runs[run_id] = [time.perf_counter(), model, False]
+
+        def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+            self._start(run_id, kwargs)
+
+        def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+            self._start(run_id, kwargs)
+
+        def on_llm_new_token(self, token, *, run_id, **kwargs):
+            run = self._runs.get(run_id)
+            if run and token and not run[2]:
+                run[2] = True
+                LLM_TTFT_SECONDS.observe(time.perf_counter() - run[0], model=run[1])
+
+        def on_llm_end(self, response, *, run_id, **kwargs):
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            LLM_LATENCY_SECONDS.observe(time.perf_counter() - run[0], model=run[1])
+            for generations in response.generations:
+                for generation in generations:
+                    usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if usage:
+                        LLM_TOKENS.observe(usage.get("input_tokens", 0), model=run[1], kind="prompt")
+                        LLM_TOKENS.observe(usage.get("output_tokens", 0), model=run[1], kind="completion")
+
+        def on_llm_error(self, error, *, run_id, **kwargs):
+            self._runs.pop(run_id, None)
+            # Cancelled hedge losers and timed-out attempts are not provider errors
+            if not isinstance(error, asyncio.CancelledError):
+                ERRORS.inc(stage="llm")
+
+    return LLMMetricsHandler()
+
+
+def load_chat_model(model: str, provider: str) -> "BaseChatModel":  # noqa: F821
+    load_env()
+    from langchain.chat_models import init_chat_model
+
+    kwargs = {"callbacks": [get_metrics_handler()]}
+    if provider == "openai":
+        # Include token usage (and cached prompt tokens) in streamed responses too
+        kwargs["stream_usage"] = True
+        # One pooled async HTTP client for every model instance
+        kwargs["http_async_client"] = get_http_async_client()
+        # Retries are owned by llm_policy; the SDK's own would multiply them
+        kwargs["max_retries"] = 0
+    return init_chat_model(model, model_provider=provider, **kwargs)
+
+
+@_cached
+def get_llm():
+    return load_chat_model(DEFAULT_MODEL, DEFAULT_PROVIDER)
+
+
+@_cached
+def get_structured_llm():
+    """The chat model returning a WorkflowDiagram, plus the raw message for usage data"""
+    from workflow_project.diagram import WorkflowDiagram
+
+    return get_chat_model(DEFAULT_MODEL, DEFAULT_PROVIDER, WorkflowDiagram)
+
+
+_route_models = {}
+
+
+def get_chat_model(model: str, provider: str, schema=None):
+    """The shared chat model for a route, returning `schema` (plus the raw message) when given.
+
+    The default model is get_llm() itself.
+    """
+    if schema is None and (model, provider) == (DEFAULT_MODEL, DEFAULT_PROVIDER):
+        return get_llm()
+    key = (model, provider, schema)
+    with _init_lock:
+        if key not in _route_models:
+            if schema is not None:
+                llm = get_chat_model(model, provider)
+                _route_models[key] = llm.with_structured_output(schema, include_raw=True)
+            else:
+                _route_models[key] = load_chat_model(model, provider)
+        return _route_models[key]
+
+
+@_cached
+def get_router() -> "ModelRouter":
+    """Route table from MODEL_ROUTES; unmatched requests and fallbacks use the default model"""
+    from workflow_project.router import ModelRouter, Route, load_routes
+
+    return ModelRouter(
+        load_routes(model=DEFAULT_MODEL, provider=DEFAULT_PROVIDER),
+        Route("default", "*", DEFAULT_MODEL, DEFAULT_PROVIDER),
     )
+
+
+@functools.cache
+def comparison_system_prompt() -> str:
+    """The static comparison prompt; identical for every request"""
+    return prompt_comparison.format()
+
+
+def build_prompt_messages(state, structured: bool = False) -> list:
+    """Static system prompt first, then this request's inputs, then any history"""
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    from workflow_project.features import select_features
+
     if not state["proposed_solution"].strip():
-        print("AS IS PROCESS................")
-        prompt = prompt_as_is.format(
+        logger.info("Using the As-Is only prompt")
+        system = prompt_structured_as_is if structured else prompt_as_is
+        inputs = prompt_as_is_inputs.format(as_is_solution=state["as_is_solution"])
+    else:
+        system = prompt_structured_comparison if structured else comparison_system_prompt()
+        inputs = prompt_comparison_inputs.format(
             as_is_solution=state["as_is_solution"],
+            proposed_solution=state["proposed_solution"],
+            # Only the catalog entries relevant to this request
+            features=select_features(
+                state["proposed_solution"] + "\n" + state["as_is_solution"]
+            ),
+        )
+    return [SystemMessage(content=system), HumanMessage(content=inputs)] + state["messages"]
+
+
+def log_usage(response):
+    """Log token usage, including prompt tokens served from the provider's cache"""
+    usage = getattr(response, "usage_metadata", None)
+    if not usage:
+        return
+    cached = usage.get("input_token_details", {}).get("cache_read", 0)
+    logger.info(
+        "LLM usage: %d input tokens (%d cached), %d output tokens",
+        usage.get("input_tokens", 0),
+        cached,
+        usage.get("output_tokens", 0),
+    )
+
+
+def _cache_key(state, route: "Route") -> str:
+    from workflow_project.llm_cache import LLM_CACHE_FUZZY, llm_cache_key
+
+    return llm_cache_key(
+        {
+            "as_is_solution": state["as_is_solution"],
+            "proposed_solution": state["proposed_solution"],
+        },
+        model=route.model,
+        provider=route.provider,
+        # Structured answers are compiled differently, so they never share entries
+        prompt_version=PROMPT_VERSION if DIAGRAM_OUTPUT == "mermaid" else f"{PROMPT_VERSION}-{DIAGRAM_OUTPUT}",
+        fuzzy=LLM_CACHE_FUZZY,
+    )
+
+
+def _cache_lookup(state, route: "Route"):
+    """Returns (cache, cached message); cache is None when caching does not apply"""
+    from langchain_core.messages import AIMessage
+
+    from workflow_project.llm_cache import get_llm_cache
+
+    # Follow-up turns depend on the conversation so far and are never cached
+    cache = get_llm_cache() if not state["messages"] else None
+    if cache is None:
+        return None, None
+    cached = cache.get(_cache_key(state, route))
+    return cache, AIMessage(content=cached) if cached is not None else None
+
+
+def _update(state, response, diagram=None, code=None) -> dict:
+    """The node's output; also remembers the diagram and its inputs for the next edit.
+
+    `code` is the free-form mermaid a patched diagram was drawn with. A
+    free-form answer (diagram None) is read back here, keeping its code.
+    """
+    from workflow_project.incremental import INCREMENTAL_REGENERATION, diagram_from_mermaid
+    from workflow_project.utils import parse_mermaid
+
+    update = {"messages": response}
+    if INCREMENTAL_REGENERATION and isinstance(response.content, str):
+        if diagram is None:
+            diagram = diagram_from_mermaid(response.content)
+            block = parse_mermaid(response.content).last_block
+            code = block.code if block is not None and diagram is not None else None
+        update["diagram"] = diagram.model_dump() if diagram is not None else None
+        # Patches edit this code in place, keeping its subgraphs and styling
+        update["diagram_code"] = code
+        update["diagram_inputs"] = {
+            "as_is_solution": state["as_is_solution"],
+            "proposed_solution": state["proposed_solution"],
+        }
+    return update
+
+
+def _finish(response, cache, state, *routes: "Route"):
+    """Caches the answer under every route's key: the routed one, which later lookups
+    use, and after an escalation also the model that actually produced it"""
+    log_usage(response)
+    if cache is not None and isinstance(response.content, str):
+        for key in dict.fromkeys(_cache_key(state, route) for route in routes):
+            cache.set(key, response.content)
+    return _update(state, response)
+
+
+def _patch_request(state):
+    """(previous diagram, input diff) when this run can edit the session's last diagram"""
+    from workflow_project.diagram import WorkflowDiagram
+    from workflow_project.incremental import (
+        INCREMENTAL_MAX_CHANGE,
+        INCREMENTAL_REGENERATION,
+        input_changes,
+    )
+    from workflow_project.router import request_type
+
+    previous, previous_inputs = state.get("diagram"), state.get("diagram_inputs")
+    if not INCREMENTAL_REGENERATION or not previous or not previous_inputs or state["messages"]:
+        return None
+    # Switching between As-Is only and comparison changes the whole diagram
+    if request_type(previous_inputs) != request_type(state):
+        return None
+    changes, ratio = input_changes(previous_inputs, state)
+    if not changes:
+        return None
+    if ratio > INCREMENTAL_MAX_CHANGE:
+        DIAGRAM_PATCHES.inc(outcome="redraw")
+        return None
+    return WorkflowDiagram.model_validate(previous), changes
+
+
+def build_patch_messages(previous, changes: str) -> list:
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from workflow_project.incremental import diagram_outline
+
+    inputs = prompt_patch_inputs.format(diagram=diagram_outline(previous), changes=changes)
+    return [SystemMessage(content=prompt_patch), HumanMessage(content=inputs)]
+
+
+def _patched_message(result: dict, previous, state):
+    """(AIMessage, updated diagram, its free-form code), or (None, None, None) when the
+    patch is unusable"""
+    from langchain_core.messages import AIMessage
+    from workflow_project.diagram import diagram_markdown
+    from workflow_project.incremental import apply_patch, patch_mermaid
+    from workflow_project.utils import CODE_FENCE, MERMAID_FENCE
+
+    patch = result.get("parsed")
+    updated = apply_patch(previous, patch) if patch is not None else None
+    if updated is None or not updated.nodes:
+        DIAGRAM_PATCHES.inc(outcome="failed")
+        logger.warning(
+            "Diagram patch unusable, redrawing the diagram",
+            extra={"error": str(result.get("parsing_error"))},
+        )
+        return None, None, None
+    DIAGRAM_PATCHES.inc(outcome="applied")
+    logger.info("Applied diagram patch", extra={"edits": patch.size, "nodes": len(updated.nodes)})
+    # Edit the previous mermaid in place when there is one; otherwise compile afresh
+    code = patch_mermaid(state["diagram_code"], updated) if state.get("diagram_code") else None
+    if code is not None:
+        content = f"{updated.summary.strip()}\n\n{MERMAID_FENCE}\n{code}\n{CODE_FENCE}"
+    else:
+        content = diagram_markdown(updated, not state["proposed_solution"].strip())
+    message = AIMessage(content=content, usage_metadata=getattr(result.get("raw"), "usage_metadata", None))
+    return message, updated, code
+
+
+def _patch(route: "Route", state, previous, changes: str):
+    from workflow_project.incremental import DiagramPatch
+    from workflow_project.llm_policy import invoke_with_policy
+
+    with ROUTE_LATENCY_SECONDS.time(route=f"{route.name}_patch", model=route.model):
+        llm, hedge = _models(route, DiagramPatch)
+        result = invoke_with_policy(llm, build_patch_messages(previous, changes), hedge)
+    return _patched_message(result, previous, state)
+
+
+async def _apatch(route: "Route", state, previous, changes: str):
+    """Async twin of _patch"""
+    from workflow_project.incremental import DiagramPatch
+    from workflow_project.llm_policy import ainvoke_with_policy
+
+    with ROUTE_LATENCY_SECONDS.time(route=f"{route.name}_patch", model=route.model):
+        llm, hedge = _models(route, DiagramPatch)
+        result = await ainvoke_with_policy(llm, build_patch_messages(previous, changes), hedge)
+    return _patched_message(result, previous, state)
+
+
+def _structured_message(result: dict, state):
+    """AIMessage carrying the compiled diagram, or None when the output did not parse"""
+    from langchain_core.messages import AIMessage
+    from workflow_project.diagram import diagram_markdown
+
+    if result.get("parsed") is None:
+        ERRORS.inc(stage="structured_output")
+        logger.warning(
+            "Structured output did not parse, asking for mermaid text instead",
+            extra={"error": str(result.get("parsing_error"))},
         )
+        return None
+    as_is_only = not state["proposed_solution"].strip()
+    return AIMessage(
+        content=diagram_markdown(result["parsed"], as_is_only),
+        usage_metadata=getattr(result.get("raw"), "usage_metadata", None),
+    )
+
+
+def _needs_fallback(response, route: "Route") -> bool:
+    """A cheaper route's answer without a mermaid block is retried on the default model"""
+    from workflow_project.utils import MERMAID_FENCE
+
+    if get_router().is_fallback_model(route) or MERMAID_FENCE in str(response.content):
+        return False
+    ROUTE_FALLBACKS.inc(route=route.name)
+    logger.warning(
+        "Routed answer has no mermaid block, retrying on the default model",
+        extra={"route": route.name, "model": route.model},
+    )
+    return True
+
+
+def _models(route: "Route", schema=None):
+    """The route's model and, when hedging is enabled, the model for the hedged request"""
+    from workflow_project.llm_policy import LLM_HEDGE_AFTER, LLM_HEDGE_MODEL, LLM_HEDGE_PROVIDER
+
+    llm = get_chat_model(route.model, route.provider, schema)
+    if not LLM_HEDGE_AFTER:
+        return llm, None
+    hedge = get_chat_model(
+        LLM_HEDGE_MODEL or route.model, LLM_HEDGE_PROVIDER or route.provider, schema
+    )
+    return llm, hedge
+
+
+def _invoke(route: "Route", state):
+    """One generation on the route's model: structured first when enabled, then free-form"""
+    from workflow_project.diagram import WorkflowDiagram
+    from workflow_project.llm_policy import invoke_with_policy
+
+    with ROUTE_LATENCY_SECONDS.time(route=route.name, model=route.model):
+        if DIAGRAM_OUTPUT == "structured":
+            llm, hedge = _models(route, WorkflowDiagram)
+            result = invoke_with_policy(llm, build_prompt_messages(state, structured=True), hedge)
+            response = _structured_message(result, state)
+            if response is not None:
+                return response
+        llm, hedge = _models(route)
+        return invoke_with_policy(llm, build_prompt_messages(state), hedge)
+
+
+async def _ainvoke(route: "Route", state):
+    """Async twin of _invoke"""
+    from workflow_project.diagram import WorkflowDiagram
+    from workflow_project.llm_policy import ainvoke_with_policy
+
+    with ROUTE_LATENCY_SECONDS.time(route=route.name, model=route.model):
+        if DIAGRAM_OUTPUT == "structured":
+            llm, hedge = _models(route, WorkflowDiagram)
+            result = await ainvoke_with_policy(llm, build_prompt_messages(state, structured=True), hedge)
+            response = _structured_message(result, state)
+            if response is not None:
+                return response
+        llm, hedge = _models(route)
+        return await ainvoke_with_policy(llm, build_prompt_messages(state), hedge)
+
+
+def generate_graph(state: "WorkflowState"):
+    router = get_router()
+    route = router.select(state)
+    patch_request = _patch_request(state)
+    if patch_request is not None:
+        response, diagram, code = _patch(route, state, *patch_request)
+        if response is not None:
+            log_usage(response)
+            return _update(state, response, diagram, code)
+
+    cache, cached = _cache_lookup(state, route)
+    if cached is not None:
+        LLM_CACHE_HITS.inc()
+        return _update(state, cached)
+
+    response = _invoke(route, state)
+    if _needs_fallback(response, route):
+        log_usage(response)
+        escalated = router.escalate(route)
+        response = _invoke(escalated, state)
+        return _finish(response, cache, state, route, escalated)
+    return _finish(response, cache, state, route)
+
+
+async def agenerate_graph(state: "WorkflowState"):
+    """Async twin of generate_graph; awaits the model so concurrent requests overlap"""
+    import asyncio
+
+    router = get_router()
+    route = router.select(state)
+    patch_request = _patch_request(state)
+    if patch_request is not None:
+        response, diagram, code = await _apatch(route, state, *patch_request)
+        if response is not None:
+            log_usage(response)
+            return _update(state, response, diagram, code)
+
+    # The LLM cache may be SQLite: keep its reads and writes off the event loop
+    cache, cached = await asyncio.to_thread(_cache_lookup, state, route)
+    if cached is not None:
+        LLM_CACHE_HITS.inc()
+        return _update(state, cached)
+
+    response = await _ainvoke(route, state)
+    if _needs_fallback(response, route):
+        log_usage(response)
+        escalated = router.escalate(route)
+        response = await _ainvoke(escalated, state)
+        return await asyncio.to_thread(_finish, response, cache, state, route, escalated)
+    return await asyncio.to_thread(_finish, response, cache, state, route)
+
+
+@_cached
+def get_workflow_state():
+    from langgraph.graph import MessagesState
+
+    class WorkflowState(MessagesState):
+        proposed_solution: str
+        as_is_solution: str
+        # The session's last diagram (a WorkflowDiagram dump), its mermaid code when it
+        # was free-form, and the inputs it was drawn from, so the next run with edited
+        # inputs can patch it instead of redrawing
+        diagram: dict | None
+        diagram_code: str | None
+        diagram_inputs: dict | None
+
+    return WorkflowState
+
+
+@_cached
+def get_checkpointer():
+    # Bounded and configurable through CHECKPOINTER; every browser session gets its
+    # own thread, so an unbounded saver would keep every session's diagram forever.
+    from workflow_project.checkpoint import make_checkpointer
+
+    return make_checkpointer()
+
+
+def _build_workflow():
+    load_env()
+    from langgraph.graph import StateGraph, START, END
+
+    from langchain_core.runnables import RunnableLambda
+
+    workflow = StateGraph(state_schema=get_workflow_state())
+    # Sync callers (invoke/stream) get generate_graph, async ones (ainvoke/astream)
+    # get agenerate_graph, so the server's event loop is never blocked on the LLM.
+    workflow.add_node(
+        "generate_graph", RunnableLambda(generate_graph, afunc=agenerate_graph, name="generate_graph")
+    )
+
+    workflow.add_edge(START, "generate_graph")
+    workflow.add_edge("generate_graph", END)
+    return workflow
+
+
+@_cached
+def get_app():
+    """The compiled workflow graph, built on first use"""
+    return _build_workflow().compile(checkpointer=get_checkpointer())
+
+
+@_cached
+def get_batch_app():
+    """The same graph without a checkpointer: batch items are one-shot and must not
+    push interactive sessions' threads out of the bounded checkpointer"""
+    return _build_workflow().compile()
+
+
+def memory_usage() -> dict:
+    """Checkpoint store size, for monitoring"""
+    from workflow_project.checkpoint import checkpointer_stats
 
-    messages = [SystemMessage(content=prompt)] + state["messages"]
-    response = llm.invoke(messages)
-    return {"messages": response}
+    return checkpointer_stats(get_checkpointer())
 
 
-workflow = StateGraph(state_schema=WorkflowState)
-workflow.add_node("generate_graph", generate_graph)
+_LAZY_ATTRIBUTES = {
+    "app": get_app,
+    "llm": get_llm,
+    "langfuse_handler": get_langfuse_handler,
+    "memory": get_checkpointer,
+    "WorkflowState": get_workflow_state,
+}
 
-workflow.add_edge(START, "generate_graph")
-workflow.add_edge("generate_graph", END)
 
-memory = MemorySaver()
-app = workflow.compile(checkpointer=memory)
+def __getattr__(name):
+    # Keep `from workflow_project.graph import app` working without paying for it at import
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
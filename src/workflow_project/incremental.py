@@ -0,0 +1,203 @@
+"""Incremental regeneration: patch the session's previous diagram instead of redrawing it.
+
+The previous diagram is kept in the session's graph thread as a WorkflowDiagram.
+When the inputs change, the model gets an outline of that diagram and a
+sentence-level diff of the inputs, and answers with a DiagramPatch that is
+applied here. Completion tokens then scale with the edit, not the diagram.
+A free-form diagram's mermaid code is kept as well and edited in place, so
+its subgraphs, classDefs and styles survive the patch.
+"""
+
+import difflib
+import os
+import re
+
+from pydantic import BaseModel, Field
+
+from workflow_project.diagram import DiagramEdge, DiagramNode, WorkflowDiagram
+
+# "on" patches the previous diagram when the inputs change, "off" (the default) always redraws
+INCREMENTAL_REGENERATION = os.environ.get("INCREMENTAL_REGENERATION", "off").lower() == "on"
+# Redraw from scratch once more than this share of the input sentences changed
+INCREMENTAL_MAX_CHANGE = float(os.environ.get("INCREMENTAL_MAX_CHANGE", 0.5))
+
+INPUT_FIELDS = (("as_is_solution", "AS-IS"), ("proposed_solution", "PROPOSED"))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?;])\s+|\n+")
+_KINDS = ("asis", "tobe", "common")
+
+
+class DiagramPatch(BaseModel):
+    """Edits to an existing diagram; ids refer to the diagram's nodes."""
+
+    summary: str = Field(description="One or two sentence overview of the updated process")
+    remove_nodes: list[str] = Field(default_factory=list, description="Ids of nodes to delete")
+    add_nodes: list[DiagramNode] = Field(
+        default_factory=list, description="New nodes; reusing an existing id replaces that node"
+    )
+    remove_edges: list[DiagramEdge] = Field(default_factory=list)
+    add_edges: list[DiagramEdge] = Field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.remove_nodes) + len(self.add_nodes) + len(self.remove_edges) + len(self.add_edges)
+
+
+def _sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text or "") if s.strip()]
+
+
+def input_changes(previous: dict, current: dict) -> tuple[str, float]:
+    """A compact sentence-level diff of the inputs, and the share of sentences it touches"""
+    lines = []
+    changed = total = 0
+    for field, title in INPUT_FIELDS:
+        old, new = _sentences(previous.get(field, "")), _sentences(current.get(field, ""))
+        total += max(len(old), len(new))
+        matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag == "equal":
+                continue
+            changed += max(i2 - i1, j2 - j1)
+            lines += [f"{title} - {sentence}" for sentence in old[i1:i2]]
+            lines += [f"{title} + {sentence}" for sentence in new[j1:j2]]
+    return "\n".join(lines), changed / total if total else 0.0
+
+
+def diagram_outline(diagram: WorkflowDiagram) -> str:
+    """The diagram as one short line per node and edge, the cheapest form to send back"""
+    lines = [
+        f"{node.id}: {node.label} [{node.kind}{', decision' if node.shape == 'decision' else ''}]"
+        for node in diagram.nodes
+    ]
+    lines += [
+        f"{edge.source} -> {edge.target}{f' ({edge.label})' if edge.label else ''}"
+        for edge in diagram.edges
+    ]
+    return "\n".join(lines)
+
+
+def _legend(chart) -> set[str]:
+    return {
+        member
+        for subgraph in chart.subgraphs
+        if "legend" in (subgraph.id.lower(), subgraph.title.lower())
+        for member in subgraph.members
+    }
+
+
+def diagram_from_mermaid(text: str) -> WorkflowDiagram | None:
+    """Recover nodes and edges from a free-form answer; None when its diagram cannot be read"""
+    from workflow_project.native_render import UnsupportedDiagram, parse_flowchart
+    from workflow_project.utils import parse_mermaid
+
+    result = parse_mermaid(text)
+    block = result.last_block
+    if block is None:
+        return None
+    try:
+        chart = parse_flowchart(block.code)
+    except (UnsupportedDiagram, ValueError):
+        return None
+
+    legend = _legend(chart)
+    nodes = [
+        DiagramNode(
+            id=node.id,
+            label=" ".join(node.label.split()) or node.id,
+            kind=next((c for c in reversed(node.classes) if c in _KINDS), "common"),
+            shape="decision" if node.shape in ("rhombus", "hexagon") else "process",
+        )
+        for node in chart.nodes.values()
+        if node.id not in legend
+    ]
+    edges = [
+        DiagramEdge(source=edge.source, target=edge.target, label=edge.label)
+        for edge in chart.edges
+        if edge.source not in legend and edge.target not in legend
+    ]
+    start, end = block.span
+    summary = " ".join((result.source[:start] + " " + result.source[end:]).split())
+    return WorkflowDiagram(summary=summary, nodes=nodes, edges=edges)
+
+
+def apply_patch(diagram: WorkflowDiagram, patch: DiagramPatch) -> WorkflowDiagram:
+    """The diagram with the patch applied; edges left dangling by removed nodes are dropped"""
+    removed = set(patch.remove_nodes)
+    nodes = {node.id: node for node in diagram.nodes if node.id not in removed}
+    for node in patch.add_nodes:
+        nodes[node.id] = node
+
+    dropped = {(edge.source, edge.target) for edge in patch.remove_edges}
+    kept = [edge for edge in diagram.edges if (edge.source, edge.target) not in dropped]
+    edges = {}
+    for edge in [*kept, *patch.add_edges]:
+        if edge.source in nodes and edge.target in nodes:
+            edges[(edge.source, edge.target)] = edge
+    return WorkflowDiagram(
+        summary=patch.summary.strip() or diagram.summary, nodes=list(nodes.values()), edges=list(edges.values())
+    )
+
+
+def _style(text: str) -> dict:
+    return dict(part.split(":", 1) for part in text.split(","))
+
+
+def _restyle(node, wanted: DiagramNode):
+    """`node` showing `wanted`: its shape, classes and style are only touched where they must change"""
+    if " ".join(node.label.split()) != wanted.label:
+        node.label = wanted.label
+    if (node.shape in ("rhombus", "hexagon")) != (wanted.shape == "decision"):
+        node.shape = "rhombus" if wanted.shape == "decision" else "rect"
+    if next((c for c in reversed(node.classes) if c in _KINDS), "common") != wanted.kind:
+        node.classes = [c for c in node.classes if c not in _KINDS] + [wanted.kind]
+    return node
+
+
+def patch_mermaid(code: str, diagram: WorkflowDiagram) -> str | None:
+    """The mermaid `code` of a free-form diagram edited to show the patched `diagram`.
+
+    Subgraphs, the legend, classDefs, styles and edge kinds are kept for
+    everything that is still there. New nodes get their kind's class at the
+    top level. None when the code cannot be read.
+    """
+    from dataclasses import replace
+
+    from workflow_project.diagram import COMPARISON_STYLES
+    from workflow_project.native_render import Edge, Node, UnsupportedDiagram, flowchart_code, parse_flowchart
+
+    try:
+        chart = parse_flowchart(code)
+    except (UnsupportedDiagram, ValueError):
+        return None
+
+    legend = _legend(chart)
+    wanted = {node.id: node for node in diagram.nodes}
+    nodes = {
+        node_id: node if node_id in legend else _restyle(node, wanted[node_id])
+        for node_id, node in chart.nodes.items()
+        if node_id in legend or node_id in wanted
+    }
+    for node in diagram.nodes:
+        if node.id not in nodes:
+            shape = "rhombus" if node.shape == "decision" else "rect"
+            nodes[node.id] = Node(node.id, node.label, shape, [node.kind])
+        chart.class_defs.setdefault(node.kind, _style(COMPARISON_STYLES[node.kind]))
+
+    existing = {}
+    for edge in chart.edges:
+        existing.setdefault((edge.source, edge.target), edge)
+    edges = [edge for edge in chart.edges if edge.source in legend and edge.target in legend]
+    for edge in diagram.edges:
+        old = existing.get((edge.source, edge.target))
+        edges.append(Edge(edge.source, edge.target, edge.label) if old is None else replace(old, label=edge.label))
+
+    # Nested subgraphs come before the ones around them, so one pass finds the empty ones
+    subgraphs, kept = [], set()
+    for subgraph in chart.subgraphs:
+        subgraph.members = [m for m in subgraph.members if m in nodes]
+        if subgraph.members or subgraph.id in kept:
+            subgraphs.append(subgraph)
+            kept.add(subgraph.parent)
+    chart.nodes, chart.edges, chart.subgraphs = nodes, edges, subgraphs
+    return flowchart_code(chart)
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class QueueFullError(Exception):
+    """Raised when a limiter's wait queue is full and the request is turned away."""
+
+
+class ConcurrencyLimiter:
+    """asyncio semaphore with a bounded wait queue and wait-time bookkeeping.
+
+    At most `concurrency` holders run at once and at most `max_queue` wait
+    behind them; anything beyond that fails fast with QueueFullError instead
+    of piling up.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int):
+        self.name = name
+        self.concurrency = max(1, concurrency)
+        self.max_queue = max(0, max_queue)
+        self._semaphore = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        if self._semaphore is None:
+            # Created lazily so it binds to the loop that actually uses it
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        if self.waiting >= self.max_queue and self._semaphore.locked():
+            self.rejected += 1
+            raise QueueFullError(f"The {self.name} queue is full, please try again shortly.")
+
+        self.waiting += 1
+        start = time.perf_counter()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        wait = time.perf_counter() - start
+        self.last_wait = wait
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+        self.in_flight += 1
+        try:
+            yield wait
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        served = self.completed + self.in_flight
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "avg_wait_s": self.total_wait / served if served else 0.0,
+            "max_wait_s": self.max_wait,
+            "last_wait_s": self.last_wait,
+        }
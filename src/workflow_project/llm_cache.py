@@ -0,0 +1,169 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# LLM_CACHE selects the backend: "memory" (default), "sqlite" or "off"
+LLM_CACHE = os.environ.get("LLM_CACHE", "memory").lower()
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_TTL = float(os.environ.get("LLM_CACHE_TTL", 7 * 24 * 60 * 60))
+LLM_CACHE_MAX_ITEMS = int(os.environ.get("LLM_CACHE_MAX_ITEMS", 256))
+# Treat inputs that only differ in whitespace or letter case as the same request
+LLM_CACHE_FUZZY = os.environ.get("LLM_CACHE_FUZZY", "").lower() in ("1", "true", "yes")
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_input(text: str, fuzzy: bool = False) -> str:
+    text = (text or "").replace("\r\n", "\n").strip()
+    if fuzzy:
+        text = _WHITESPACE.sub(" ", text).casefold()
+    return text
+
+
+def llm_cache_key(
+    inputs: dict, model: str, provider: str, prompt_version: str, fuzzy: bool = False
+) -> str:
+    payload = json.dumps(
+        {
+            "inputs": {name: normalize_input(value, fuzzy) for name, value in inputs.items()},
+            "model": model,
+            "provider": provider,
+            "prompt_version": prompt_version,
+            "fuzzy": fuzzy,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Interface for LLM response caches: `get` returns the cached text or None."""
+
+    def __init__(self, ttl: float = LLM_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> str | None:
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: str):
+        self._set(key, value)
+
+    def _get(self, key: str) -> str | None:
+        raise NotImplementedError
+
+    def _set(self, key: str, value: str):
+        raise NotImplementedError
+
+
+class InMemoryLLMCache(LLMCache):
+    def __init__(self, max_items: int = LLM_CACHE_MAX_ITEMS, ttl: float = LLM_CACHE_TTL):
+        super().__init__(ttl)
+        self.max_items = max_items
+        self._items = OrderedDict()  # key -> (created_at, value)
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            created_at, value = entry
+            if time.time() - created_at > self.ttl:
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def _set(self, key, value):
+        with self._lock:
+            self._items[key] = (time.time(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+class SQLiteLLMCache(LLMCache):
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        max_items: int = LLM_CACHE_MAX_ITEMS,
+        ttl: float = LLM_CACHE_TTL,
+    ):
+        super().__init__(ttl)
+        self.path = path
+        self.max_items = max_items
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " created_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def _get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE llm_cache SET used_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def _set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, used_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,))
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key NOT IN"
+                " (SELECT key FROM llm_cache ORDER BY used_at DESC LIMIT ?)",
+                (self.max_items,),
+            )
+            self._conn.commit()
+
+
+_llm_cache: LLMCache | None = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache | None:
+    """The configured response cache, or None when LLM_CACHE=off"""
+    global _llm_cache
+    if LLM_CACHE in ("off", "none", "0", "false"):
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            if LLM_CACHE == "sqlite":
+                _llm_cache = SQLiteLLMCache()
+            else:
+                _llm_cache = InMemoryLLMCache()
+            logger.info("Using %s LLM response cache", type(_llm_cache).__name__)
+        return _llm_cache
@@ -0,0 +1,168 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+
+from workflow_project.metrics import LLM_HEDGES, LLM_RETRIES
+
+# Seconds one attempt (including its hedge) may take before it is abandoned; 0 disables
+LLM_ATTEMPT_TIMEOUT = float(os.environ.get("LLM_ATTEMPT_TIMEOUT", 90))
+# Extra attempts after a retryable failure
+LLM_RETRIES_MAX = int(os.environ.get("LLM_RETRIES", 2))
+# Full-jitter exponential backoff: sleep uniform(0, min(cap, base * 2**attempt))
+LLM_RETRY_BACKOFF = float(os.environ.get("LLM_RETRY_BACKOFF", 0.5))
+LLM_RETRY_BACKOFF_MAX = float(os.environ.get("LLM_RETRY_BACKOFF_MAX", 8))
+# Fire a second request when the first has not finished after this many seconds; 0 disables
+LLM_HEDGE_AFTER = float(os.environ.get("LLM_HEDGE_AFTER", 0))
+# Model and provider for the hedged request; empty means the same model again
+LLM_HEDGE_MODEL = os.environ.get("LLM_HEDGE_MODEL", "")
+LLM_HEDGE_PROVIDER = os.environ.get("LLM_HEDGE_PROVIDER", "")
+# Threads for sync attempts. A thread cannot be cancelled, so an attempt abandoned on
+# timeout or lost to its hedge keeps running (and is billed) until the provider answers
+# or LLM_HTTP_TIMEOUT; while it does it holds one of these, and new attempts queue
+# behind it once all are busy
+LLM_ATTEMPT_THREADS = int(os.environ.get("LLM_ATTEMPT_THREADS", 16))
+
+# Request timeout, conflict, rate limit; every 5xx is retried too
+RETRYABLE_STATUS = {408, 409, 429}
+_RETRYABLE_NAMES = ("Timeout", "Connection", "RateLimit", "Overloaded", "ServiceUnavailable")
+
+logger = logging.getLogger(__name__)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient provider or network failures; bad requests and auth errors are not retried"""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    if isinstance(status, int):
+        return status in RETRYABLE_STATUS or status >= 500
+    return any(part in type(error).__name__ for part in _RETRYABLE_NAMES)
+
+
+def backoff(attempt: int) -> float:
+    return random.uniform(0, min(LLM_RETRY_BACKOFF_MAX, LLM_RETRY_BACKOFF * 2**attempt))
+
+
+def _should_retry(error: BaseException, attempt: int) -> bool:
+    if attempt >= LLM_RETRIES_MAX or not is_retryable(error):
+        return False
+    LLM_RETRIES.inc(reason=type(error).__name__)
+    logger.warning(
+        "LLM attempt failed, retrying",
+        extra={"attempt": attempt + 1, "error": f"{type(error).__name__}: {error}"},
+    )
+    return True
+
+
+async def _ahedged(llm, hedge, messages):
+    first = asyncio.create_task(llm.ainvoke(messages))
+    tasks = {first}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=LLM_HEDGE_AFTER if hedge is not None else None)
+        if not done:
+            LLM_HEDGES.inc(outcome="fired")
+            tasks.add(asyncio.create_task(hedge.ainvoke(messages)))
+        error = None
+        while tasks:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not first:
+                        LLM_HEDGES.inc(outcome="won")
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # The loser (or everything, on timeout) is cancelled rather than left running
+        for task in tasks:
+            task.cancel()
+
+
+async def ainvoke_with_policy(llm, messages, hedge=None):
+    """llm.ainvoke with a per-attempt timeout, jittered retries and optional hedging"""
+    attempt = 0
+    while True:
+        try:
+            return await asyncio.wait_for(
+                _ahedged(llm, hedge, messages), timeout=LLM_ATTEMPT_TIMEOUT or None
+            )
+        except Exception as e:
+            if not _should_retry(e, attempt):
+                raise
+            await asyncio.sleep(backoff(attempt))
+            attempt += 1
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=max(1, LLM_ATTEMPT_THREADS), thread_name_prefix="llm-attempt"
+            )
+        return _executor
+
+
+def _submit(executor, fn, messages):
+    # Run in a copy of the caller's context, so callbacks and tracing that live in
+    # context variables (the graph's run config among them) follow the attempt
+    return executor.submit(contextvars.copy_context().run, fn, messages)
+
+
+def _hedged(llm, hedge, messages):
+    # Threads cannot be cancelled: an abandoned attempt runs until LLM_HTTP_TIMEOUT
+    # (see LLM_ATTEMPT_THREADS)
+    executor = _get_executor()
+    deadline = time.monotonic() + LLM_ATTEMPT_TIMEOUT if LLM_ATTEMPT_TIMEOUT else None
+    first = _submit(executor, llm.invoke, messages)
+    futures = {first}
+    if hedge is not None:
+        done, _ = concurrent.futures.wait(futures, timeout=LLM_HEDGE_AFTER)
+        if not done:
+            LLM_HEDGES.inc(outcome="fired")
+            futures.add(_submit(executor, hedge.invoke, messages))
+    error = None
+    while futures:
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        done, futures = concurrent.futures.wait(
+            futures, timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        if not done:
+            raise TimeoutError(f"LLM attempt exceeded {LLM_ATTEMPT_TIMEOUT:g}s")
+        for future in done:
+            if future.exception() is None:
+                if future is not first:
+                    LLM_HEDGES.inc(outcome="won")
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+def invoke_with_policy(llm, messages, hedge=None):
+    """Sync twin of ainvoke_with_policy"""
+    if not LLM_ATTEMPT_TIMEOUT and hedge is None:
+        call = llm.invoke
+    else:
+        def call(messages):
+            return _hedged(llm, hedge, messages)
+
+    attempt = 0
+    while True:
+        try:
+            return call(messages)
+        except Exception as e:
+            if not _should_retry(e, attempt):
+                raise
+            time.sleep(backoff(attempt))
+            attempt += 1
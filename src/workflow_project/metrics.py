@@ -0,0 +1,228 @@
+"""In-process metrics with a Prometheus text endpoint.
+
+A deliberately small stand-in for prometheus_client: counters, gauges and
+histograms with labels, plus collectors that expose the `stats()` dicts of
+our caches and limiters as gauges. `metrics_route` serves them all on
+/metrics from the Gradio server itself, so no extra port has to be exposed.
+"""
+
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Path of the scrape endpoint on the Gradio server
+METRICS_PATH = os.environ.get("METRICS_PATH", "/metrics")
+METRICS_PREFIX = "workflow_"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+FAST_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000, 32000)
+
+_lock = threading.Lock()
+_metrics: list["_Metric"] = []
+_collectors: dict[str, callable] = {}
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = METRICS_PREFIX + name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        with _lock:
+            _metrics.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        with _lock:
+            lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        with _lock:
+            return self._values.get(key, 0)
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track(self, **labels):
+        """Count the block as in progress while it runs"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with _lock:
+            counts, total = self._values.get(key, (None, 0.0))
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall time of the block, also when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+LLM_TTFT_SECONDS = Histogram("llm_ttft_seconds", "Time to the first streamed LLM token", ("model",))
+LLM_LATENCY_SECONDS = Histogram("llm_latency_seconds", "Total LLM call latency", ("model",))
+LLM_TOKENS = Histogram("llm_tokens", "Tokens per LLM call", ("model", "kind"), TOKEN_BUCKETS)
+LLM_RETRIES = Counter("llm_retries_total", "LLM attempts retried, by error type", ("reason",))
+LLM_HEDGES = Counter(
+    "llm_hedges_total", "Hedged LLM requests fired, and how many of them finished first", ("outcome",)
+)
+LLM_CACHE_HITS = Counter(
+    "llm_response_cache_hits_total", "Requests answered from the LLM response cache"
+)
+MERMAID_FIX_SECONDS = Histogram(
+    "mermaid_fix_seconds", "Time spent in get_fixed_mermaid_data", buckets=FAST_BUCKETS
+)
+EXPORT_RENDER_SECONDS = Histogram(
+    "export_render_seconds", "Export render time (cache misses)", ("format",)
+)
+ROUTE_LATENCY_SECONDS = Histogram(
+    "route_latency_seconds", "Diagram generation latency per model route", ("route", "model")
+)
+ROUTE_FALLBACKS = Counter(
+    "route_fallbacks_total", "Routed answers without a mermaid block, retried on the default model", ("route",)
+)
+DIAGRAM_PATCHES = Counter(
+    "diagram_patches_total", "Regenerations that edited the previous diagram, by outcome", ("outcome",)
+)
+IN_FLIGHT = Gauge("requests_in_flight", "Requests currently being handled", ("endpoint",))
+ERRORS = Counter("errors_total", "Errors by stage", ("stage",))
+
+
+def register_collector(name: str, fn):
+    """Expose every numeric value of the dict returned by `fn()` as a `<name>_<key>` gauge"""
+    with _lock:
+        _collectors[name] = fn
+
+
+def _collect() -> list[str]:
+    lines = []
+    with _lock:
+        collectors = list(_collectors.items())
+    for name, fn in collectors:
+        try:
+            stats = fn() or {}
+        except Exception:
+            logger.exception("Metrics collector %s failed", name)
+            continue
+        for key, value in stats.items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            metric = f"{METRICS_PREFIX}{name}_{key}"
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"{metric} {_format_value(value)}")
+    return lines
+
+
+def render_latest() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    with _lock:
+        metrics = list(_metrics)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.expose())
+    lines.extend(_collect())
+    return "\n".join(lines) + "\n"
+
+
+def metrics_route():
+    """A starlette route serving render_latest, for Blocks.launch(app_kwargs={"routes": [...]})"""
+    # Imported here: starlette comes with gradio and only the app process needs it
+    from starlette.responses import Response
+    from starlette.routing import Route
+
+    def metrics(request):
+        # A sync endpoint runs in the threadpool, so collectors never block the event loop
+        return Response(render_latest(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    return Route(METRICS_PATH, metrics, methods=["GET"])
@@ -0,0 +1,741 @@
+"""Browserless renderer for the mermaid flowchart subset our prompts produce.
+
+Supports `flowchart`/`graph` diagrams (TD/TB/LR) with plain, rounded,
+stadium, circle, decision (`{}`) and hexagon (`{{}}`) nodes, `classDef` /
+`class` / `:::class` / `style` styling, labeled edges and subgraphs.
+Anything else raises UnsupportedDiagram so callers can fall back to the
+browser renderer.
+
+The layout is a small layered (Sugiyama-style) one: cycle breaking, longest
+path ranking, dummy nodes for long edges, barycenter ordering and a simple
+coordinate pass. PNG and PDF are produced from the SVG with cairosvg.
+"""
+
+import re
+from dataclasses import dataclass, field
+from html import escape, unescape
+
+FONT_SIZE = 14
+LINE_HEIGHT = 18
+CHAR_WIDTH = 0.6 * FONT_SIZE  # average glyph width for a sans-serif font
+WRAP_CHARS = 28
+NODE_PADDING_X = 16
+NODE_PADDING_Y = 10
+NODE_GAP = 40
+RANK_GAP = 60
+MARGIN = 30
+DUMMY_WIDTH = 12
+
+DEFAULT_STYLE = {"fill": "#ECECFF", "stroke": "#9370DB", "stroke-width": "1px", "color": "#333333"}
+
+
+class UnsupportedDiagram(ValueError):
+    """The diagram uses syntax outside the subset this renderer handles."""
+
+
+@dataclass
+class Node:
+    id: str
+    label: str
+    shape: str = "rect"
+    classes: list[str] = field(default_factory=list)
+    style: dict = field(default_factory=dict)
+
+
+@dataclass
+class Edge:
+    source: str
+    target: str
+    label: str = ""
+    arrow: bool = True
+    line: str = "solid"  # solid | dotted | thick
+    head: str = "arrow"  # arrow | circle | cross, when `arrow` is set
+
+
+@dataclass
+class Subgraph:
+    id: str
+    title: str
+    members: list[str] = field(default_factory=list)
+    parent: str = ""  # id of the enclosing subgraph, "" at the top level
+
+
+@dataclass
+class Flowchart:
+    direction: str = "TD"
+    nodes: dict[str, Node] = field(default_factory=dict)
+    edges: list[Edge] = field(default_factory=list)
+    class_defs: dict[str, dict] = field(default_factory=dict)
+    subgraphs: list[Subgraph] = field(default_factory=list)
+
+
+# ---- parsing ---------------------------------------------------------------
+
+_HEADER = re.compile(r"^(flowchart|graph)(?:\s+(TD|TB|LR|BT|RL))?\s*$", re.IGNORECASE)
+_NODE_ID = re.compile(r"\s*([A-Za-z0-9_]+(?:-[A-Za-z0-9_]+)*)")
+_CLASS_SUFFIX = re.compile(r":::([\w-]+)")
+_EDGE = re.compile(
+    r"\s*(?:(?:--|==|-\.)\s+(?P<text>[^|>]+?)\s+)?"
+    # ".->" and ".-" close a dotted edge with inline text: A -. text .-> B
+    r"(?P<arrow><?(?:-{2,}>|-{3,}|={2,}>|={3,}|-?\.+->|-?\.+-|--[xo]))"
+    r"(?:\s*\|(?P<label>[^|]*)\|)?\s*"
+)
+# Longest openers first so "((" wins over "("
+_SHAPES = (
+    ("([", "])", "stadium"),
+    ("((", "))", "circle"),
+    ("[[", "]]", "subroutine"),
+    ("[(", ")]", "cylinder"),
+    ("{{", "}}", "hexagon"),
+    ("[", "]", "rect"),
+    ("(", ")", "round"),
+    ("{", "}", "rhombus"),
+)
+_UNSUPPORTED = ("linkStyle", "click", "callback", "accTitle", "accDescr")
+
+
+def _parse_style(text: str) -> dict:
+    style = {}
+    for part in text.strip().rstrip(";").split(","):
+        if ":" in part:
+            key, value = part.split(":", 1)
+            style[key.strip()] = value.strip()
+    return style
+
+
+_ENTITY = re.compile(r"#(\w+);")
+
+
+def _entity(match: re.Match) -> str:
+    name = match.group(1)
+    if name.isdigit():
+        return chr(int(name))
+    decoded = unescape(f"&{name};")
+    return match.group(0) if decoded.startswith("&") else decoded
+
+
+def _clean_label(label: str) -> str:
+    label = label.strip()
+    if len(label) >= 2 and label[0] == label[-1] == '"':
+        label = label[1:-1]
+    return _ENTITY.sub(_entity, re.sub(r"<br\s*/?>", "\n", label))
+
+
+_OPENERS = {"[": "]", "(": ")", "{": "}"}
+
+
+def _split_statements(line: str) -> list[str]:
+    """Split a line on ";" except inside quotes, node shapes, edge labels and #entity; codes"""
+    statements = []
+    start = 0
+    closers = []
+    in_quotes = in_pipes = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif in_quotes:
+            continue
+        elif char == "|":
+            in_pipes = not in_pipes
+        elif char in _OPENERS:
+            closers.append(_OPENERS[char])
+        elif closers and char == closers[-1]:
+            closers.pop()
+        elif char == ";" and not closers and not in_pipes:
+            if re.search(r"#\w+$", line[start:index]):
+                continue  # the end of a #35; style entity code
+            statements.append(line[start:index])
+            start = index + 1
+    statements.append(line[start:])
+    return [s.strip() for s in statements if s.strip()]
+
+
+class _Parser:
+    def __init__(self, code: str):
+        self.chart = Flowchart()
+        self.code = code
+        self._subgraph_stack: list[Subgraph] = []
+
+    def parse(self) -> Flowchart:
+        statements = []
+        for line in self.code.splitlines():
+            line = line.strip()
+            if not line or line.startswith("%%"):
+                continue
+            statements.extend(_split_statements(line))
+        if not statements:
+            raise UnsupportedDiagram("empty diagram")
+
+        header = _HEADER.match(statements[0])
+        if not header:
+            raise UnsupportedDiagram(f"not a flowchart: {statements[0]!r}")
+        direction = (header.group(2) or "TD").upper()
+        if direction not in ("TD", "TB", "LR"):
+            raise UnsupportedDiagram(f"direction {direction} is not supported")
+        self.chart.direction = "LR" if direction == "LR" else "TD"
+
+        for statement in statements[1:]:
+            self._statement(statement)
+        if self._subgraph_stack:
+            raise UnsupportedDiagram("subgraph without end")
+        return self.chart
+
+    def _statement(self, statement: str):
+        keyword = statement.split(None, 1)[0]
+        if keyword in _UNSUPPORTED:
+            raise UnsupportedDiagram(f"{keyword} is not supported")
+        if keyword == "classDef":
+            _, names, *rest = statement.split(None, 2)
+            style = _parse_style(rest[0] if rest else "")
+            for name in names.split(","):
+                self.chart.class_defs[name] = style
+        elif keyword == "class":
+            _, ids, name = statement.split(None, 2)
+            for node_id in ids.split(","):
+                self._node(node_id.strip()).classes.append(name.strip())
+        elif keyword == "style":
+            _, node_id, *rest = statement.split(None, 2)
+            self._node(node_id).style.update(_parse_style(rest[0] if rest else ""))
+        elif keyword == "subgraph":
+            self._open_subgraph(statement[len("subgraph") :].strip())
+        elif keyword == "end" and statement == "end":
+            if not self._subgraph_stack:
+                raise UnsupportedDiagram("end without subgraph")
+            self.chart.subgraphs.append(self._subgraph_stack.pop())
+        elif keyword == "direction":
+            pass  # per-subgraph direction is ignored
+        else:
+            self._chain(statement)
+
+    def _open_subgraph(self, spec: str):
+        match = re.match(r"^([\w-]+)\s*\[(.*)\]$", spec)
+        if match:
+            subgraph = Subgraph(match.group(1), _clean_label(match.group(2)))
+        else:
+            title = _clean_label(spec) or f"subgraph{len(self.chart.subgraphs)}"
+            subgraph = Subgraph(title, title)
+        if self._subgraph_stack:
+            subgraph.parent = self._subgraph_stack[-1].id
+        self._subgraph_stack.append(subgraph)
+
+    def _node(self, node_id: str) -> Node:
+        node = self.chart.nodes.get(node_id)
+        if node is None:
+            node = self.chart.nodes[node_id] = Node(node_id, node_id)
+            if self._subgraph_stack:
+                self._subgraph_stack[-1].members.append(node_id)
+        return node
+
+    def _node_ref(self, text: str, pos: int) -> tuple[str, int]:
+        match = _NODE_ID.match(text, pos)
+        if not match:
+            raise UnsupportedDiagram(f"cannot parse {text[pos:]!r}")
+        node = self._node(match.group(1))
+        pos = match.end()
+        for opener, closer, shape in _SHAPES:
+            if text.startswith(opener, pos):
+                start = pos + len(opener)
+                search_from = start
+                if text.startswith('"', start):
+                    quote_end = text.find('"', start + 1)
+                    if quote_end != -1:
+                        search_from = quote_end + 1
+                end = text.find(closer, search_from)
+                if end == -1:
+                    raise UnsupportedDiagram(f"unterminated node label in {text!r}")
+                node.label = _clean_label(text[start:end])
+                node.shape = shape
+                pos = end + len(closer)
+                break
+        suffix = _CLASS_SUFFIX.match(text, pos)
+        if suffix:
+            node.classes.append(suffix.group(1))
+            pos = suffix.end()
+        return node.id, pos
+
+    def _node_group(self, text: str, pos: int) -> tuple[list[str], int]:
+        ids = []
+        while True:
+            node_id, pos = self._node_ref(text, pos)
+            ids.append(node_id)
+            amp = re.match(r"\s*&", text[pos:])
+            if not amp:
+                return ids, pos
+            pos += amp.end()
+
+    def _chain(self, statement: str):
+        sources, pos = self._node_group(statement, 0)
+        while pos < len(statement) and statement[pos:].strip():
+            edge = _EDGE.match(statement, pos)
+            if not edge:
+                raise UnsupportedDiagram(f"cannot parse {statement!r}")
+            targets, pos = self._node_group(statement, edge.end())
+            arrow = edge.group("arrow")
+            label = _clean_label(edge.group("label") or edge.group("text") or "")
+            line = "thick" if "=" in arrow else "dotted" if "." in arrow else "solid"
+            head = {"o": "circle", "x": "cross"}.get(arrow[-1], "arrow")
+            for source in sources:
+                for target in targets:
+                    self.chart.edges.append(
+                        Edge(
+                            source,
+                            target,
+                            label,
+                            arrow=not arrow.endswith("-") and not arrow.endswith("="),
+                            line=line,
+                            head=head,
+                        )
+                    )
+            sources = targets
+
+
+def parse_flowchart(code: str) -> Flowchart:
+    return _Parser(code).parse()
+
+
+# ---- writing ---------------------------------------------------------------
+
+_BRACKETS = {
+    "stadium": ("([", "])"),
+    "circle": ("((", "))"),
+    "subroutine": ("[[", "]]"),
+    "cylinder": ("[(", ")]"),
+    "hexagon": ("{{", "}}"),
+    "rect": ("[", "]"),
+    "round": ("(", ")"),
+    "rhombus": ("{", "}"),
+}
+_ARROWS = {
+    ("solid", True): "-->",
+    ("solid", False): "---",
+    ("dotted", True): "-.->",
+    ("dotted", False): "-.-",
+    ("thick", True): "==>",
+    ("thick", False): "===",
+}
+
+
+def quote_label(text: str) -> str:
+    return '"' + text.replace('"', "#quot;").replace("\n", "<br/>") + '"'
+
+
+def node_code(node: Node) -> str:
+    opener, closer = _BRACKETS.get(node.shape, _BRACKETS["rect"])
+    return f"{node.id}{opener}{quote_label(node.label)}{closer}"
+
+
+def edge_arrow(edge: Edge) -> str:
+    """The arrow of an edge, with its label"""
+    arrow = _ARROWS[(edge.line, edge.arrow)]
+    if edge.arrow and edge.head != "arrow":
+        arrow = "--o" if edge.head == "circle" else "--x"
+    return f"{arrow}|{quote_label(edge.label)}|" if edge.label else arrow
+
+
+def style_code(style: dict) -> str:
+    return ",".join(f"{key}:{value}" for key, value in style.items())
+
+
+def flowchart_code(chart: Flowchart) -> str:
+    """Mermaid code for a parsed flowchart; parsing it again gives the same chart"""
+    lines = [f"flowchart {chart.direction}"]
+    lines += [f"classDef {name} {style_code(style)}" for name, style in chart.class_defs.items()]
+
+    children = {}
+    for subgraph in chart.subgraphs:
+        children.setdefault(subgraph.parent, []).append(subgraph)
+
+    def declare(subgraph: Subgraph):
+        lines.append(f"subgraph {subgraph.id}[{quote_label(subgraph.title)}]")
+        for child in children.get(subgraph.id, []):
+            declare(child)
+        lines.extend(node_code(chart.nodes[m]) for m in subgraph.members if m in chart.nodes)
+        lines.append("end")
+
+    for subgraph in children.get("", []):
+        declare(subgraph)
+    grouped = {m for subgraph in chart.subgraphs for m in subgraph.members}
+    lines += [node_code(node) for node in chart.nodes.values() if node.id not in grouped]
+    lines += [f"{edge.source} {edge_arrow(edge)} {edge.target}" for edge in chart.edges]
+    for node in chart.nodes.values():
+        lines += [f"class {node.id} {name}" for name in dict.fromkeys(node.classes)]
+        if node.style:
+            lines.append(f"style {node.id} {style_code(node.style)}")
+    return "\n".join(lines)
+
+
+# ---- layout ----------------------------------------------------------------
+
+
+def _wrap(text: str, width: int = WRAP_CHARS) -> list[str]:
+    lines = []
+    for paragraph in text.split("\n"):
+        current = ""
+        for word in paragraph.split():
+            if current and len(current) + 1 + len(word) > width:
+                lines.append(current)
+                current = word
+            else:
+                current = f"{current} {word}" if current else word
+        lines.append(current)
+    return lines or [""]
+
+
+@dataclass
+class _Box:
+    id: str
+    width: float
+    height: float
+    lines: list[str] = field(default_factory=list)
+    dummy: bool = False
+    x: float = 0.0  # centre
+    y: float = 0.0  # centre
+    rank: int = 0
+
+
+@dataclass
+class Layout:
+    chart: Flowchart
+    boxes: dict[str, _Box]
+    edge_points: list[list[tuple[float, float]]]
+    width: float
+    height: float
+
+
+def _node_box(node: Node) -> _Box:
+    lines = _wrap(node.label)
+    text_width = max(len(line) for line in lines) * CHAR_WIDTH
+    width = text_width + 2 * NODE_PADDING_X
+    height = len(lines) * LINE_HEIGHT + 2 * NODE_PADDING_Y
+    if node.shape in ("rhombus", "hexagon"):
+        # Leave room for the slanted sides
+        width += height if node.shape == "rhombus" else height / 2
+        height *= 1.4 if node.shape == "rhombus" else 1
+    width = max(width, 60)
+    if node.shape == "circle":
+        width = height = max(width, height)
+    return _Box(node.id, width, height, lines)
+
+
+def _rank(node_ids: list[str], edges: list[tuple[str, str]]) -> tuple[dict[str, int], set]:
+    """Longest-path ranks on the graph with back edges (found by DFS) reversed"""
+    successors = {n: [] for n in node_ids}
+    for source, target in edges:
+        if source != target:
+            successors[source].append(target)
+    state = {}
+    reversed_edges = set()
+    for root in node_ids:
+        if root in state:
+            continue
+        stack = [(root, iter(successors[root]))]
+        state[root] = "active"
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if state.get(child) == "active":
+                    reversed_edges.add((node, child))
+                elif child not in state:
+                    state[child] = "active"
+                    stack.append((child, iter(successors[child])))
+                    break
+            else:
+                state[node] = "done"
+                stack.pop()
+
+    dag = {n: [] for n in node_ids}
+    indegree = {n: 0 for n in node_ids}
+    for source, target in edges:
+        if source == target:
+            continue
+        if (source, target) in reversed_edges:
+            source, target = target, source
+        dag[source].append(target)
+        indegree[target] += 1
+    rank = {n: 0 for n in node_ids}
+    queue = [n for n in node_ids if indegree[n] == 0]
+    while queue:
+        node = queue.pop(0)
+        for child in dag[node]:
+            rank[child] = max(rank[child], rank[node] + 1)
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                queue.append(child)
+    return rank, reversed_edges
+
+
+def rank_nodes(chart: Flowchart) -> dict[str, int]:
+    """Layer of every node in the top-down layout"""
+    return _rank(list(chart.nodes), [(edge.source, edge.target) for edge in chart.edges])[0]
+
+
+def _place_layer(layer: list[_Box], desired: list[float]):
+    """Put boxes as close to `desired` centres as possible without overlaps, keeping order"""
+    if not layer:
+        return
+    xs = list(desired)
+    for i in range(1, len(layer)):
+        min_x = xs[i - 1] + (layer[i - 1].width + layer[i].width) / 2 + NODE_GAP
+        xs[i] = max(xs[i], min_x)
+    for i in range(len(layer) - 2, -1, -1):
+        max_x = xs[i + 1] - (layer[i].width + layer[i + 1].width) / 2 - NODE_GAP
+        xs[i] = min(xs[i], max_x)
+    # Both passes keep spacing; shift the whole layer to minimise total drift
+    shift = sum(d - x for d, x in zip(desired, xs)) / len(xs)
+    for box, x in zip(layer, xs):
+        box.x = x + shift
+
+
+def layout_flowchart(chart: Flowchart) -> Layout:
+    node_ids = list(chart.nodes)
+    edge_pairs = [(e.source, e.target) for e in chart.edges]
+    rank, reversed_edges = _rank(node_ids, edge_pairs)
+
+    horizontal = chart.direction == "LR"
+    boxes = {}
+    for node_id in node_ids:
+        box = _node_box(chart.nodes[node_id])
+        if horizontal:
+            box.width, box.height = box.height, box.width
+        box.rank = rank[node_id]
+        boxes[node_id] = box
+
+    # Long edges get a chain of dummy boxes, one per rank they cross
+    chains = []
+    for index, (source, target) in enumerate(edge_pairs):
+        if source == target:
+            chains.append([source, target])
+            continue
+        flipped = (source, target) in reversed_edges
+        top, bottom = (target, source) if flipped else (source, target)
+        chain = [top]
+        for r in range(rank[top] + 1, rank[bottom]):
+            dummy = _Box(f"__dummy{index}_{r}", DUMMY_WIDTH, 0, dummy=True, rank=r)
+            boxes[dummy.id] = dummy
+            chain.append(dummy.id)
+        chain.append(bottom)
+        chains.append(list(reversed(chain)) if flipped else chain)
+
+    ranks = max((b.rank for b in boxes.values()), default=0) + 1
+    layers: list[list[_Box]] = [[] for _ in range(ranks)]
+    # Start from first appearance, keeping subgraph members next to each other
+    group = {}
+    for gi, subgraph in enumerate(chart.subgraphs):
+        for member in subgraph.members:
+            group.setdefault(member, gi + 1)
+    for box in boxes.values():
+        layers[box.rank].append(box)
+    for layer in layers:
+        layer.sort(key=lambda b: group.get(b.id, 0))
+
+    neighbours = {box_id: ([], []) for box_id in boxes}  # (up, down)
+    for chain in chains:
+        for a, b in zip(chain, chain[1:]):
+            upper, lower = (a, b) if boxes[a].rank < boxes[b].rank else (b, a)
+            if upper != lower:
+                neighbours[lower][0].append(upper)
+                neighbours[upper][1].append(lower)
+
+    # Barycenter sweeps to reduce crossings
+    for sweep in range(4):
+        downward = sweep % 2 == 0
+        order = range(1, ranks) if downward else range(ranks - 2, -1, -1)
+        for r in order:
+            index = {b.id: i for i, b in enumerate(layers[r - 1 if downward else r + 1])}
+            def key(box, position):
+                linked = [index[n] for n in neighbours[box.id][0 if downward else 1] if n in index]
+                return (sum(linked) / len(linked) if linked else position, group.get(box.id, 0))
+            layers[r] = [b for _, b in sorted(
+                ((key(b, i), b) for i, b in enumerate(layers[r])), key=lambda pair: pair[0]
+            )]
+
+    # Coordinates: pack, then pull each box towards its neighbours' centres
+    for layer in layers:
+        _place_layer(layer, [0.0] * len(layer))
+    for sweep in range(6):
+        downward = sweep % 2 == 0
+        order = range(1, ranks) if downward else range(ranks - 2, -1, -1)
+        for r in order:
+            desired = []
+            for box in layers[r]:
+                linked = [boxes[n].x for n in neighbours[box.id][0 if downward else 1]]
+                desired.append(sum(linked) / len(linked) if linked else box.x)
+            _place_layer(layers[r], desired)
+
+    labelled_gap = any(e.label for e in chart.edges) and LINE_HEIGHT * 2 or 0
+    y = MARGIN
+    for layer in layers:
+        height = max((b.height for b in layer), default=0)
+        for box in layer:
+            box.y = y + height / 2
+        y += height + RANK_GAP + labelled_gap
+
+    min_x = min(b.x - b.width / 2 for b in boxes.values())
+    for box in boxes.values():
+        box.x += MARGIN - min_x
+    width = max(b.x + b.width / 2 for b in boxes.values()) + MARGIN
+    height = y - RANK_GAP - labelled_gap + MARGIN
+
+    if horizontal:
+        for box in boxes.values():
+            box.x, box.y = box.y, box.x
+            box.width, box.height = box.height, box.width
+        width, height = height, width
+
+    edge_points = []
+    for chain in chains:
+        edge_points.append([(boxes[b].x, boxes[b].y) for b in chain])
+    return Layout(chart, boxes, edge_points, width, height)
+
+
+# ---- SVG -------------------------------------------------------------------
+
+
+def _node_style(chart: Flowchart, node: Node) -> dict:
+    style = dict(DEFAULT_STYLE)
+    style.update(chart.class_defs.get("default", {}))
+    for name in node.classes:
+        style.update(chart.class_defs.get(name, {}))
+    style.update(node.style)
+    return style
+
+
+def _shape_svg(node: Node, box: _Box, style: dict) -> str:
+    attrs = (
+        f'fill="{escape(style.get("fill", "none"))}" stroke="{escape(style.get("stroke", "none"))}" '
+        f'stroke-width="{escape(style.get("stroke-width", "1px"))}"'
+    )
+    if "stroke-dasharray" in style:
+        attrs += f' stroke-dasharray="{escape(style["stroke-dasharray"])}"'
+    x, y, w, h = box.x - box.width / 2, box.y - box.height / 2, box.width, box.height
+    if node.shape == "rhombus":
+        points = f"{box.x},{y} {x + w},{box.y} {box.x},{y + h} {x},{box.y}"
+        return f'<polygon points="{points}" {attrs}/>'
+    if node.shape == "hexagon":
+        inset = h / 2
+        points = f"{x + inset},{y} {x + w - inset},{y} {x + w},{box.y} {x + w - inset},{y + h} {x + inset},{y + h} {x},{box.y}"
+        return f'<polygon points="{points}" {attrs}/>'
+    if node.shape == "circle":
+        return f'<circle cx="{box.x}" cy="{box.y}" r="{w / 2}" {attrs}/>'
+    radius = {"round": 8, "stadium": h / 2, "cylinder": 8}.get(node.shape, 0)
+    svg = f'<rect x="{x}" y="{y}" width="{w}" height="{h}" rx="{radius}" ry="{radius}" {attrs}/>'
+    if node.shape == "subroutine":
+        svg += (
+            f'<line x1="{x + 8}" y1="{y}" x2="{x + 8}" y2="{y + h}" {attrs}/>'
+            f'<line x1="{x + w - 8}" y1="{y}" x2="{x + w - 8}" y2="{y + h}" {attrs}/>'
+        )
+    return svg
+
+
+def _text_svg(lines: list[str], cx: float, cy: float, color: str) -> str:
+    top = cy - (len(lines) - 1) * LINE_HEIGHT / 2
+    spans = "".join(
+        f'<tspan x="{cx}" y="{top + i * LINE_HEIGHT}">{escape(line)}</tspan>'
+        for i, line in enumerate(lines)
+    )
+    return (
+        f'<text text-anchor="middle" dominant-baseline="central" fill="{escape(color)}" '
+        f'font-family="Arial, Helvetica, sans-serif" font-size="{FONT_SIZE}">{spans}</text>'
+    )
+
+
+def _edge_path(points: list[tuple[float, float]], horizontal: bool) -> str:
+    parts = [f"M {points[0][0]} {points[0][1]}"]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        if horizontal:
+            mid = (x0 + x1) / 2
+            parts.append(f"C {mid} {y0}, {mid} {y1}, {x1} {y1}")
+        else:
+            mid = (y0 + y1) / 2
+            parts.append(f"C {x0} {mid}, {x1} {mid}, {x1} {y1}")
+    return " ".join(parts)
+
+
+def _clip(box: _Box, toward: tuple[float, float], horizontal: bool) -> tuple[float, float]:
+    """Point on the box border where an edge towards `toward` leaves it"""
+    if box.dummy:
+        return box.x, box.y
+    if horizontal:
+        side = box.width / 2 if toward[0] >= box.x else -box.width / 2
+        return box.x + side, box.y
+    side = box.height / 2 if toward[1] >= box.y else -box.height / 2
+    return box.x, box.y + side
+
+
+def render_svg(code: str) -> str:
+    """Render mermaid flowchart code to an SVG document"""
+    chart = parse_flowchart(code)
+    layout = layout_flowchart(chart)
+    horizontal = chart.direction == "LR"
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout.width:.0f}" height="{layout.height:.0f}" '
+        f'viewBox="0 0 {layout.width:.0f} {layout.height:.0f}">',
+        "<defs>"
+        '<marker id="arrow" viewBox="0 0 10 10" refX="9" refY="5" markerWidth="8" markerHeight="8" orient="auto-start-reverse">'
+        '<path d="M 0 0 L 10 5 L 0 10 z" fill="#333333"/></marker>'
+        # --o and --x edges
+        '<marker id="circle" viewBox="0 0 10 10" refX="9" refY="5" markerWidth="8" markerHeight="8">'
+        '<circle cx="5" cy="5" r="4" fill="#ffffff" stroke="#333333" stroke-width="1.5"/></marker>'
+        '<marker id="cross" viewBox="0 0 10 10" refX="9" refY="5" markerWidth="8" markerHeight="8">'
+        '<path d="M 1 1 L 9 9 M 9 1 L 1 9" stroke="#333333" stroke-width="2"/></marker>'
+        "</defs>",
+        f'<rect width="100%" height="100%" fill="#ffffff"/>',
+    ]
+
+    for subgraph in chart.subgraphs:
+        members = [layout.boxes[m] for m in subgraph.members if m in layout.boxes]
+        if not members:
+            continue
+        x0 = min(b.x - b.width / 2 for b in members) - 15
+        y0 = min(b.y - b.height / 2 for b in members) - 15 - LINE_HEIGHT
+        x1 = max(b.x + b.width / 2 for b in members) + 15
+        y1 = max(b.y + b.height / 2 for b in members) + 15
+        out.append(
+            f'<rect x="{x0}" y="{y0}" width="{x1 - x0}" height="{y1 - y0}" fill="#ffffde" stroke="#aaaa33" stroke-width="1px"/>'
+        )
+        out.append(_text_svg([subgraph.title], (x0 + x1) / 2, y0 + LINE_HEIGHT / 2 + 4, "#333333"))
+
+    for edge, points in zip(chart.edges, layout.edge_points):
+        if edge.source == edge.target:
+            continue  # self loops are not drawn
+        source, target = layout.boxes[edge.source], layout.boxes[edge.target]
+        inner = points[1:-1]
+        start = _clip(source, inner[0] if inner else (target.x, target.y), horizontal)
+        end = _clip(target, inner[-1] if inner else (source.x, source.y), horizontal)
+        path = [start, *inner, end]
+        stroke = {"thick": 3, "dotted": 1.5, "solid": 1.5}[edge.line]
+        dash = ' stroke-dasharray="4 3"' if edge.line == "dotted" else ""
+        marker = f' marker-end="url(#{edge.head})"' if edge.arrow else ""
+        out.append(
+            f'<path d="{_edge_path(path, horizontal)}" fill="none" stroke="#333333" '
+            f'stroke-width="{stroke}"{dash}{marker}/>'
+        )
+        if edge.label:
+            a, b = path[len(path) // 2 - 1], path[len(path) // 2]
+            lx, ly = (a[0] + b[0]) / 2, (a[1] + b[1]) / 2
+            lines = _wrap(edge.label)
+            w = max(len(line) for line in lines) * CHAR_WIDTH + 8
+            h = len(lines) * LINE_HEIGHT + 4
+            out.append(f'<rect x="{lx - w / 2}" y="{ly - h / 2}" width="{w}" height="{h}" fill="#e8e8e8"/>')
+            out.append(_text_svg(lines, lx, ly, "#333333"))
+
+    for node_id, node in chart.nodes.items():
+        box = layout.boxes[node_id]
+        style = _node_style(chart, node)
+        out.append(_shape_svg(node, box, style))
+        out.append(_text_svg(box.lines, box.x, box.y, style.get("color", "#333333")))
+
+    out.append("</svg>")
+    return "\n".join(out)
+
+
+def svg_to_png(svg: str, scale: float = 2.0) -> bytes:
+    import cairosvg
+
+    return cairosvg.svg2png(bytestring=svg.encode("utf-8"), scale=scale)
+
+
+def svg_to_pdf(svg: str) -> bytes:
+    import cairosvg
+
+    return cairosvg.svg2pdf(bytestring=svg.encode("utf-8"))
@@ -0,0 +1,116 @@
+"""A minimal PDF writer that streams one raster image per page to a file.
+
+Large diagrams are exported as many page PNGs. A general-purpose PDF library
+keeps every page in memory until the document is saved, so this writer emits
+each page's objects as soon as the page is added and only remembers their
+byte offsets for the cross-reference table written at the end. Memory stays
+at one decoded page however long the document gets.
+"""
+
+import io
+import zlib
+
+A4 = (595.2756, 841.8898)
+FONT = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+_CATALOG, _PAGES, _FONT = 1, 2, 3
+
+
+def _decode_rgb(png: bytes):
+    """(width, height, raw RGB bytes) of a PNG, flattened onto white"""
+    try:
+        from PIL import Image
+    except ImportError as e:
+        raise ImportError("Multi-page PDF export needs the pillow package") from e
+    with Image.open(io.BytesIO(png)) as image:
+        image = image.convert("RGBA")
+        flat = Image.new("RGB", image.size, "white")
+        flat.paste(image, mask=image.getchannel("A"))
+    return flat.width, flat.height, flat.tobytes()
+
+
+def _text(value: str) -> bytes:
+    escaped = value.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return b"(" + escaped.encode("latin-1", "replace") + b")"
+
+
+class PagedPdfWriter:
+    """Write a PDF of fitted page images to the binary file `out`, one `add_page` at a time.
+
+    Pages are A4, turned landscape for wide images, with a small
+    "Page n of m" header. Call `close` to finish the document; it does not
+    close `out`.
+    """
+
+    def __init__(self, out, margin: float = 28, header: float = 16):
+        self.out = out
+        self.margin = margin
+        self.header = header
+        self._offsets = {}
+        self._pages = []
+        self._next_id = _FONT + 1
+        self._position = 0
+        self._emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(_FONT, FONT)
+
+    def _emit(self, data: bytes):
+        self.out.write(data)
+        self._position += len(data)
+
+    def _object(self, number: int, body: bytes, stream: bytes | None = None):
+        self._offsets[number] = self._position
+        self._emit(b"%d 0 obj\n" % number + body)
+        if stream is not None:
+            self._emit(b"\nstream\n" + stream + b"\nendstream")
+        self._emit(b"\nendobj\n")
+
+    def _allocate(self, count: int):
+        first = self._next_id
+        self._next_id += count
+        return range(first, first + count)
+
+    def add_page(self, png: bytes, max_ratio: float, number: int, total: int):
+        """Fit `png` on a new page, never enlarging it past `max_ratio` points per pixel"""
+        width, height, pixels = _decode_rgb(png)
+        page_width, page_height = (A4[1], A4[0]) if width > height else A4
+        room_width = page_width - 2 * self.margin
+        room_height = page_height - 2 * self.margin - self.header
+        ratio = min(room_width / width, room_height / height, max_ratio)
+        x = self.margin + (room_width - width * ratio) / 2
+        y = self.margin + room_height - height * ratio
+        content = b"q %.2f 0 0 %.2f %.2f %.2f cm /Im0 Do Q\nBT /F1 9 Tf %.2f %.2f Td %s Tj ET" % (
+            width * ratio,
+            height * ratio,
+            x,
+            y,
+            self.margin,
+            page_height - self.margin - 9,
+            _text(f"Page {number} of {total}"),
+        )
+        image_id, content_id, page_id = self._allocate(3)
+        data = zlib.compress(pixels, 6)
+        del pixels
+        self._object(
+            image_id,
+            b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace /DeviceRGB"
+            b" /BitsPerComponent 8 /Filter /FlateDecode /Length %d >>" % (width, height, len(data)),
+            data,
+        )
+        self._object(content_id, b"<< /Length %d >>" % len(content), content)
+        self._object(
+            page_id,
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %.2f %.2f] /Contents %d 0 R"
+            b" /Resources << /Font << /F1 %d 0 R >> /XObject << /Im0 %d 0 R >> >> >>"
+            % (_PAGES, page_width, page_height, content_id, _FONT, image_id),
+        )
+        self._pages.append(page_id)
+
+    def close(self):
+        kids = b" ".join(b"%d 0 R" % page for page in self._pages)
+        self._object(_PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._pages)))
+        self._object(_CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % _PAGES)
+        xref = self._position
+        size = self._next_id
+        entries = [b"0000000000 65535 f \n"]
+        entries += [b"%010d 00000 n \n" % self._offsets[number] for number in range(1, size)]
+        self._emit(b"xref\n0 %d\n" % size + b"".join(entries))
+        self._emit(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, _CATALOG, xref))
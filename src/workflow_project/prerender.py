@@ -0,0 +1,134 @@
+import asyncio
+import logging
+import os
+from contextlib import contextmanager
+
+from workflow_project.export import export_limiter, render_pages, render_pdf, render_png
+from workflow_project.tiling import needs_paging
+
+logger = logging.getLogger(__name__)
+
+# Formats rendered ahead of time once a diagram is generated ("" turns it off)
+PRERENDER_FORMATS = tuple(
+    f for f in os.environ.get("PRERENDER_FORMATS", "png,pdf").replace(" ", "").split(",") if f
+)
+# Background renders running at once, across all sessions
+PRERENDER_CONCURRENCY = int(os.environ.get("PRERENDER_CONCURRENCY", 1))
+# Give the final UI update a head start before rendering begins
+PRERENDER_DELAY = float(os.environ.get("PRERENDER_DELAY", 0.5))
+
+_RENDERERS = {"png": render_png, "pdf": render_pdf}
+# Large diagrams are downloaded as pages; both formats are assembled from the
+# same cached page PNGs, so warming those is all there is to do
+_PAGED_RENDERERS = {"png": render_pages, "pdf": render_pages}
+
+
+class Prerenderer:
+    """Speculatively renders a session's latest diagram into the render cache.
+
+    Downloads then become cache hits. Work here is low priority: it is
+    capped at `concurrency` renders, only runs while no diagram is being
+    generated and the export limiter has idle capacity, and is cancelled as
+    soon as the session clears or regenerates.
+    """
+
+    def __init__(
+        self,
+        formats=PRERENDER_FORMATS,
+        concurrency: int = PRERENDER_CONCURRENCY,
+        delay: float = PRERENDER_DELAY,
+    ):
+        self.formats = tuple(f for f in formats if f in _RENDERERS)
+        self.concurrency = max(1, concurrency)
+        self.delay = delay
+        self._semaphore = None
+        # session id -> (mermaid code, task)
+        self._tasks: dict[str, tuple[str, asyncio.Task]] = {}
+        self.generations = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.skipped = 0
+
+    def schedule(self, session_id: str | None, mermaid_code: str):
+        """Start pre-rendering `mermaid_code`, replacing whatever the session had queued"""
+        self.cancel(session_id)
+        if not self.formats or not mermaid_code:
+            return
+        task = asyncio.create_task(self._run(mermaid_code))
+        key = session_id or ""
+        self._tasks[key] = (mermaid_code, task)
+        task.add_done_callback(lambda t: self._forget(key, t))
+
+    def cancel(self, session_id: str | None):
+        """Drop the session's pre-render; like schedule, only call this on the event loop"""
+        entry = self._tasks.pop(session_id or "", None)
+        if entry and not entry[1].done():
+            entry[1].cancel()
+            self.cancelled += 1
+
+    async def wait(self, session_id: str | None, mermaid_code: str):
+        """Let a download join an in-progress pre-render of the same diagram instead of duplicating it"""
+        entry = self._tasks.get(session_id or "")
+        if entry and entry[0] == mermaid_code and not entry[1].done():
+            # shield: a cancelled download must not cancel the shared render
+            await asyncio.wait([asyncio.shield(entry[1])])
+
+    @contextmanager
+    def generating(self):
+        """Mark an interactive generation as running; pre-renders stand back meanwhile"""
+        self.generations += 1
+        try:
+            yield
+        finally:
+            self.generations -= 1
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._tasks.get(key, (None, None))[1] is task:
+            del self._tasks[key]
+
+    def _busy(self) -> bool:
+        stats = export_limiter.stats()
+        return (
+            self.generations > 0
+            or stats["queue_depth"] > 0
+            or stats["in_flight"] >= export_limiter.concurrency
+        )
+
+    async def _run(self, mermaid_code: str):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.sleep(self.delay)
+        async with self._semaphore:
+            renderers = _PAGED_RENDERERS if needs_paging(mermaid_code) else _RENDERERS
+            for fmt in self.formats:
+                if self._busy():
+                    # Interactive work comes first; the download will render on demand
+                    self.skipped += 1
+                    return
+                try:
+                    await renderers[fmt](mermaid_code)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.info("Pre-render of %s skipped: %s", fmt, e)
+                    return
+            self.completed += 1
+
+    def stats(self) -> dict:
+        return {
+            "generations": self.generations,
+            "pending": sum(1 for _, task in self._tasks.values() if not task.done()),
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "skipped": self.skipped,
+        }
+
+
+_prerenderer: Prerenderer | None = None
+
+
+def get_prerenderer() -> Prerenderer:
+    global _prerenderer
+    if _prerenderer is None:
+        _prerenderer = Prerenderer()
+    return _prerenderer
@@ -0,0 +1,54 @@
+import os
+
+from workflow_project.export import EXPORT_CONCURRENCY, EXPORT_MAX_QUEUE, export_limiter
+from workflow_project.metrics import IN_FLIGHT
+
+# Gradio concurrency groups: generation and export never wait on each other's slots
+GENERATE_CONCURRENCY_ID = "generate"
+EXPORT_CONCURRENCY_ID = "export"
+
+GENERATE_CONCURRENCY_LIMIT = int(os.environ.get("GENERATE_CONCURRENCY_LIMIT", 8))
+# Export handlers wait on export_limiter themselves (and cache hits skip it), so the
+# group admits as many events as the limiter can run plus hold
+EXPORT_CONCURRENCY_LIMIT = int(
+    os.environ.get("EXPORT_CONCURRENCY_LIMIT", EXPORT_CONCURRENCY + EXPORT_MAX_QUEUE)
+)
+# Every other event (clear, button visibility, ...)
+DEFAULT_CONCURRENCY_LIMIT = int(os.environ.get("DEFAULT_CONCURRENCY_LIMIT", 4))
+# Events Gradio holds before rejecting new ones straight away; 0 means unbounded
+QUEUE_MAX_SIZE = int(os.environ.get("QUEUE_MAX_SIZE", 64))
+# Seconds between refreshes of the queue indicator; 0 hides it
+QUEUE_STATUS_INTERVAL = float(os.environ.get("QUEUE_STATUS_INTERVAL", 2))
+
+
+def queue_depths(blocks) -> dict[str, int]:
+    """Events waiting in Gradio's queue per concurrency group.
+
+    Reads Gradio's queue internals, so an unknown Gradio version just reports nothing.
+    """
+    queue = getattr(blocks, "_queue", None)
+    event_queues = getattr(queue, "event_queue_per_concurrency_id", None) or {}
+    return {
+        concurrency_id: len(getattr(event_queue, "queue", ()))
+        for concurrency_id, event_queue in list(event_queues.items())
+    }
+
+
+def queue_status(blocks) -> dict:
+    depths = queue_depths(blocks)
+    limiter = export_limiter.stats()
+    return {
+        "generate_running": int(IN_FLIGHT.value(endpoint="generate")),
+        "generate_waiting": depths.get(GENERATE_CONCURRENCY_ID, 0),
+        "export_running": limiter["in_flight"],
+        # Queued in Gradio for a handler, or in a handler waiting for a render slot
+        "export_waiting": depths.get(EXPORT_CONCURRENCY_ID, 0) + limiter["queue_depth"],
+    }
+
+
+def queue_status_markdown(blocks) -> str:
+    status = queue_status(blocks)
+    return (
+        f"⏳ **Generation:** {status['generate_running']} running, {status['generate_waiting']} waiting"
+        f" &nbsp;·&nbsp; **Export:** {status['export_running']} rendering, {status['export_waiting']} waiting"
+    )
@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+RENDER_CACHE_MEMORY_ITEMS = int(os.environ.get("RENDER_CACHE_MEMORY_ITEMS", 64))
+RENDER_CACHE_MEMORY_BYTES = int(os.environ.get("RENDER_CACHE_MEMORY_BYTES", 64 * 1024 * 1024))
+RENDER_CACHE_DISK_BYTES = int(os.environ.get("RENDER_CACHE_DISK_BYTES", 512 * 1024 * 1024))
+RENDER_CACHE_TTL = float(os.environ.get("RENDER_CACHE_TTL", 24 * 60 * 60))
+# Set RENDER_CACHE_DIR to an empty string to keep the cache in memory only
+RENDER_CACHE_DIR = os.environ.get(
+    "RENDER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "workflow_project_render_cache")
+)
+
+
+def render_cache_key(mermaid_code: str, fmt: str, options: dict | None = None) -> str:
+    payload = json.dumps(
+        {"code": mermaid_code.strip(), "format": fmt, "options": options or {}},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """Two-tier cache of rendered diagram bytes.
+
+    The memory tier is an LRU bounded by entry count and total bytes. The
+    disk tier keeps one file per key, expires entries after `ttl` seconds and
+    evicts the least recently used files once `disk_bytes` is exceeded. Its
+    size and LRU order are tracked in memory, seeded from the directory once
+    at startup, so a put never has to list the directory.
+    """
+
+    def __init__(
+        self,
+        directory: str | None = RENDER_CACHE_DIR,
+        memory_items: int = RENDER_CACHE_MEMORY_ITEMS,
+        memory_bytes: int = RENDER_CACHE_MEMORY_BYTES,
+        disk_bytes: int = RENDER_CACHE_DISK_BYTES,
+        ttl: float = RENDER_CACHE_TTL,
+    ):
+        self.directory = Path(directory) if directory else None
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()  # key -> (created_at, data)
+        self._memory_size = 0
+        self._disk = OrderedDict()  # key -> (last used, size), least recently used first
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._disk_scan()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "memory_items": len(self._memory),
+                "memory_bytes": self._memory_size,
+                "disk_items": len(self._disk),
+                "disk_bytes": self._disk_size,
+            }
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, data = entry
+                if now - created_at <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return data
+                self._drop_memory(key)
+
+        data = self._disk_get(key, now)
+        with self._lock:
+            if data is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._memory_put(key, data, now)
+        return data
+
+    def put(self, key: str, data: bytes):
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, data, now)
+        self._disk_put(key, data)
+
+    # ---- memory tier ------------------------------------------------------
+
+    def _drop_memory(self, key: str):
+        _, data = self._memory.pop(key)
+        self._memory_size -= len(data)
+
+    def _memory_put(self, key: str, data: bytes, created_at: float):
+        if len(data) > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._drop_memory(key)
+        self._memory[key] = (created_at, data)
+        self._memory_size += len(data)
+        while self._memory and (
+            len(self._memory) > self.memory_items or self._memory_size > self.memory_bytes
+        ):
+            self._drop_memory(next(iter(self._memory)))
+
+    # ---- disk tier --------------------------------------------------------
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.bin"
+
+    def _disk_scan(self):
+        """Seed the disk index from the files left by earlier runs"""
+        now = time.time()
+        entries = []
+        for path in self.directory.glob("*.bin"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if now - stat.st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path.stem))
+        for mtime, size, key in sorted(entries):
+            self._disk[key] = (mtime, size)
+            self._disk_size += size
+        self._disk_evict(now)
+
+    def _disk_forget(self, key: str):
+        # Caller holds the lock
+        entry = self._disk.pop(key, None)
+        if entry is not None:
+            self._disk_size -= entry[1]
+
+    def _disk_get(self, key: str, now: float) -> bytes | None:
+        if self.directory is None:
+            return None
+        path = self._path(key)
+        try:
+            if now - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
+                with self._lock:
+                    self._disk_forget(key)
+                return None
+            data = path.read_bytes()
+            # Refresh the timestamp so eviction is least-recently-used across restarts
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._disk_forget(key)
+            return None
+        except OSError:
+            logger.warning("Could not read render cache entry %s", path, exc_info=True)
+            return None
+        with self._lock:
+            self._disk_forget(key)
+            self._disk[key] = (now, len(data))
+            self._disk_size += len(data)
+        return data
+
+    def _disk_put(self, key: str, data: bytes):
+        if self.directory is None:
+            return
+        path = self._path(key)
+        try:
+            with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp", delete=False) as f:
+                f.write(data)
+            os.replace(f.name, path)
+        except OSError:
+            logger.warning("Could not write render cache entry %s", path, exc_info=True)
+            return
+        now = time.time()
+        with self._lock:
+            self._disk_forget(key)
+            self._disk[key] = (now, len(data))
+            self._disk_size += len(data)
+        self._disk_evict(now)
+
+    def _disk_evict(self, now: float):
+        """Drop expired and least recently used files until the size budget holds"""
+        victims = []
+        with self._lock:
+            while self._disk:
+                key, (last_used, _) = next(iter(self._disk.items()))
+                if self._disk_size <= self.disk_bytes and now - last_used <= self.ttl:
+                    break
+                self._disk_forget(key)
+                victims.append(key)
+        for key in victims:
+            self._path(key).unlink(missing_ok=True)
+
+
+_render_cache: RenderCache | None = None
+
+
+def get_render_cache() -> RenderCache:
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache()
+    return _render_cache
@@ -0,0 +1,73 @@
+import json
+import os
+from dataclasses import dataclass, replace
+
+# JSON list of routes, or a path to a JSON file holding one. The first route whose
+# request type matches and whose max_input_chars (if any) covers the input wins.
+# Routes without a model use the default one. Cheaper models are opt-in, e.g. to
+# send short As-Is-only descriptions to a small model:
+# [{"name": "as_is_small", "type": "as_is", "max_input_chars": 3000, "model": "gpt-4o-mini",
+#   "provider": "openai"}, {"name": "default", "type": "*"}]
+MODEL_ROUTES = os.environ.get("MODEL_ROUTES", "")
+
+# Every request on the default model unless MODEL_ROUTES says otherwise
+DEFAULT_ROUTES = [
+    {"name": "as_is", "type": "as_is"},
+    {"name": "comparison", "type": "comparison"},
+]
+
+
+@dataclass(frozen=True)
+class Route:
+    name: str
+    type: str  # "as_is", "comparison" or "*"
+    model: str
+    provider: str
+    max_input_chars: int | None = None
+
+    def matches(self, request_type: str, input_chars: int) -> bool:
+        return self.type in (request_type, "*") and (
+            self.max_input_chars is None or input_chars <= self.max_input_chars
+        )
+
+
+def request_type(state) -> str:
+    return "comparison" if state["proposed_solution"].strip() else "as_is"
+
+
+def input_chars(state) -> int:
+    return len(state["as_is_solution"]) + len(state["proposed_solution"])
+
+
+def load_routes(spec: str = MODEL_ROUTES, model: str = "", provider: str = "") -> list[Route]:
+    """Routes from spec (or DEFAULT_ROUTES); entries without a model get `model` and `provider`"""
+    if not spec.strip():
+        entries = DEFAULT_ROUTES
+    elif spec.lstrip().startswith("["):
+        entries = json.loads(spec)
+    else:
+        with open(spec) as f:
+            entries = json.load(f)
+    return [Route(**{"model": model, "provider": provider, **entry}) for entry in entries]
+
+
+class ModelRouter:
+    """Picks the model for a request from a route table, with a catch-all fallback."""
+
+    def __init__(self, routes: list[Route], fallback: Route):
+        self.routes = routes
+        self.fallback = fallback
+
+    def select(self, state) -> Route:
+        kind, size = request_type(state), input_chars(state)
+        for route in self.routes:
+            if route.matches(kind, size):
+                return route
+        return self.fallback
+
+    def is_fallback_model(self, route: Route) -> bool:
+        return (route.model, route.provider) == (self.fallback.model, self.fallback.provider)
+
+    def escalate(self, route: Route) -> Route:
+        """The same route on the fallback model, so its latency stays attributed to the route"""
+        return replace(route, model=self.fallback.model, provider=self.fallback.provider)
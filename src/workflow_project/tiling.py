@@ -0,0 +1,135 @@
+"""Split very large flowcharts into pages for multi-page PDF and tiled PNG export.
+
+A page is a subgraph of the diagram, or a run of nodes in top-down layout
+order when a subgraph (or the whole diagram) is too big. Every page is a
+standalone mermaid flowchart. Edges that leave a page end in a connector
+node naming the page they continue on, and the target page starts them from
+a matching connector. Rendering one page at a time keeps the cost of a
+render independent of the size of the diagram.
+"""
+
+import os
+from dataclasses import dataclass
+
+from workflow_project.native_render import (
+    Flowchart,
+    UnsupportedDiagram,
+    edge_arrow,
+    node_code,
+    parse_flowchart,
+    quote_label,
+    rank_nodes,
+    style_code,
+)
+
+# Diagrams with more nodes than this are exported as pages; 0 disables paging
+EXPORT_PAGED_NODES = int(os.environ.get("EXPORT_PAGED_NODES", 60))
+# Upper bound on the nodes of one page (connectors not counted)
+EXPORT_PAGE_NODES = int(os.environ.get("EXPORT_PAGE_NODES", 30))
+
+CONNECTOR_CLASS = "pageConnector"
+CONNECTOR_STYLE = "fill:#ffffff,stroke:#888888,stroke-width:1px,stroke-dasharray:4 2,color:#555555"
+
+
+@dataclass
+class Page:
+    number: int
+    code: str
+    node_ids: list[str]
+
+
+def _is_legend(subgraph) -> bool:
+    return "legend" in (subgraph.id.lower(), subgraph.title.lower())
+
+
+def page_node_groups(chart: Flowchart, max_nodes: int = EXPORT_PAGE_NODES) -> list[list[str]]:
+    """Node ids per page: one page per subgraph, the rest chunked in layout order"""
+    rank = rank_nodes(chart)
+    order = {node_id: index for index, node_id in enumerate(sorted(chart.nodes, key=lambda n: rank[n]))}
+    legend = {m for s in chart.subgraphs if _is_legend(s) for m in s.members}
+
+    groups = []
+    grouped = set(legend)
+    for subgraph in chart.subgraphs:
+        if _is_legend(subgraph):
+            continue
+        members = [m for m in subgraph.members if m not in grouped]
+        grouped.update(members)
+        if members:
+            groups.append(sorted(members, key=order.get))
+    rest = sorted((n for n in chart.nodes if n not in grouped), key=order.get)
+    if rest:
+        groups.append(rest)
+
+    pages = []
+    for group in groups:
+        pages += [group[i : i + max(1, max_nodes)] for i in range(0, len(group), max(1, max_nodes))]
+    # Follow the flow: pages holding earlier layers come first
+    return sorted(pages, key=lambda ids: min(order[n] for n in ids))
+
+
+def _page_code(chart: Flowchart, ids: list[str], page_of: dict[str, int], legend: list[str]) -> str:
+    members = set(ids) | set(legend)
+    lines = [f"flowchart {chart.direction}"]
+    lines += [f"classDef {name} {style_code(style)}" for name, style in chart.class_defs.items()]
+    lines.append(f"classDef {CONNECTOR_CLASS} {CONNECTOR_STYLE}")
+
+    declared = set()
+    for subgraph in chart.subgraphs:
+        inside = [m for m in subgraph.members if m in members and m not in declared]
+        if not inside:
+            continue
+        lines.append(f"subgraph {subgraph.id}[{quote_label(subgraph.title)}]")
+        lines += [node_code(chart.nodes[m]) for m in inside]
+        lines.append("end")
+        declared.update(inside)
+    lines += [node_code(chart.nodes[m]) for m in ids if m not in declared]
+
+    connectors = {}
+    for edge in chart.edges:
+        source_here, target_here = edge.source in members, edge.target in members
+        if not (source_here or target_here):
+            continue
+        arrow = edge_arrow(edge)
+        source, target = edge.source, edge.target
+        if source_here and not target_here:
+            target = f"pg_to_{edge.target}"
+            text = f"To page {page_of[edge.target]}: {chart.nodes[edge.target].label}"
+            connectors[target] = f"{target}([{quote_label(text)}])"
+        elif target_here and not source_here:
+            source = f"pg_from_{edge.source}"
+            text = f"From page {page_of[edge.source]}: {chart.nodes[edge.source].label}"
+            connectors[source] = f"{source}([{quote_label(text)}])"
+        lines.append(f"{source} {arrow} {target}")
+    lines += connectors.values()
+    if connectors:
+        lines.append(f"class {','.join(connectors)} {CONNECTOR_CLASS}")
+
+    for node_id in sorted(members):
+        node = chart.nodes[node_id]
+        lines += [f"class {node_id} {name}" for name in node.classes]
+        if node.style:
+            lines.append(f"style {node_id} {style_code(node.style)}")
+    return "\n".join(lines)
+
+
+def split_flowchart(mermaid_code: str, max_nodes: int = EXPORT_PAGE_NODES) -> list[Page]:
+    """The diagram as standalone pages joined by connector nodes"""
+    chart = parse_flowchart(mermaid_code)
+    groups = page_node_groups(chart, max_nodes)
+    page_of = {node_id: number for number, ids in enumerate(groups, 1) for node_id in ids}
+    # The legend is repeated on every page
+    legend = [m for s in chart.subgraphs if _is_legend(s) for m in s.members]
+    for node_id in legend:
+        page_of.setdefault(node_id, 0)
+    return [Page(number, _page_code(chart, ids, page_of, legend), ids) for number, ids in enumerate(groups, 1)]
+
+
+def needs_paging(mermaid_code: str, threshold: int = EXPORT_PAGED_NODES) -> bool:
+    """Whether the diagram is too large for a single page; diagrams that cannot be split are not"""
+    if threshold <= 0 or mermaid_code.count("\n") < threshold // 2:
+        return False
+    try:
+        return len(parse_flowchart(mermaid_code).nodes) > threshold
+    except UnsupportedDiagram:
+        return False
@@ -1,43 +1,220 @@
 import re
+from dataclasses import dataclass, field
+
+MERMAID_FENCE = "```mermaid"
+CODE_FENCE = "```"
+DEFAULT_MERMAID_CODE = "flowchart TD\nA[No Mermaid diagram found]:::common"
+
+# classDef styles must use `:`; models sometimes write `fill=#fff`
+_CLASSDEF_LINE = re.compile(r"^.*classDef.*$", re.MULTILINE)
+_CLASSDEF_ASSIGNMENT = re.compile(r"(fill|stroke|color)=")
+# A single-line `[...]` label; nested `[[...]]` labels match their inner part
+_BRACKET_LABEL = re.compile(r"\[([^\[\]\n]*)\]")
+_PARENS = str.maketrans("()", "--")
+
+
+def _clean_label(match: re.Match) -> str:
+    return "[" + match.group(1).translate(_PARENS) + "]"
 
 
 def fix_mermaid(code: str) -> str:
-    fixed = []
+    # Fix classDef = to :
+    if "classDef" in code:
+        code = _CLASSDEF_LINE.sub(
+            lambda m: _CLASSDEF_ASSIGNMENT.sub(r"\1:", m.group(0)), code
+        )
+    # Replace parentheses inside every square-bracket label with dashes
+    if "(" in code or ")" in code:
+        code = _BRACKET_LABEL.sub(_clean_label, code)
+    return code
+
+
+@dataclass(slots=True)
+class MermaidBlock:
+    raw: str  # code as written by the model
+    code: str  # code after fix_mermaid
+    span: tuple[int, int]  # start/end of the whole fenced block in the source text
+
+    @property
+    def markdown(self) -> str:
+        return f"{MERMAID_FENCE}\n{self.code}\n{CODE_FENCE}"
+
+
+@dataclass(slots=True)
+class MermaidParseResult:
+    source: str
+    blocks: list[MermaidBlock] = field(default_factory=list)
+
+    @property
+    def last_block(self) -> MermaidBlock | None:
+        return self.blocks[-1] if self.blocks else None
+
+    @property
+    def fixed_text(self) -> str:
+        """The source text with every mermaid block replaced by its fixed version"""
+        parts = []
+        pos = 0
+        for block in self.blocks:
+            start, end = block.span
+            parts.append(self.source[pos:start])
+            parts.append(block.markdown)
+            pos = end
+        parts.append(self.source[pos:])
+        return "".join(parts)
+
+
+class MermaidStreamParser:
+    """Single-pass, line-oriented scanner for ```mermaid blocks.
+
+    Text can be fed in arbitrary chunks. Every complete line is looked at
+    once and fixed once, so the cost over a streamed response is linear in
+    its length. The chunks are only joined when `text` or `result()` asks
+    for them; per-chunk callers should look at `length` and `lines` instead.
+    """
+
+    def __init__(self):
+        self.blocks: list[MermaidBlock] = []
+        self._chunks: list[str] = []
+        self.length = 0  # characters fed so far
+        self.lines = 0  # complete lines scanned so far
+        self._pending = ""  # incomplete last line
+        self._pending_offset = 0
+        self._open_start: int | None = None  # offset of the open block's fence
+        self._open_raw: list[str] = []
+        self._open_fixed: list[str] = []
+        self._open_drawable: list[str] = []  # fixed, non-blank lines
+        self._preview: str | None = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far; joins the pending chunks, so ask once per line, not per chunk"""
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def feed(self, chunk: str) -> list[MermaidBlock]:
+        """Add a chunk of text; returns the blocks completed by it"""
+        self._chunks.append(chunk)
+        self.length += len(chunk)
+        data = self._pending + chunk
+        completed = []
+        start = 0
+        while True:
+            newline = data.find("\n", start)
+            if newline == -1:
+                break
+            self._scan_line(data[start:newline], self._pending_offset + start, completed)
+            self.lines += 1
+            start = newline + 1
+        self._pending = data[start:]
+        self._pending_offset += start
+        return completed
+
+    def _scan_line(self, line: str, offset: int, completed: list):
+        pos = 0
+        while True:
+            if self._open_start is None:
+                start = line.rfind(MERMAID_FENCE, pos)
+                # Only a fence with nothing but whitespace after it opens a block
+                if start != -1 and not line[start + len(MERMAID_FENCE) :].strip():
+                    self._open_start = offset + start
+                    self._open_raw, self._open_fixed, self._open_drawable = [], [], []
+                    self._preview = None
+                return
+            end = line.find(CODE_FENCE, pos)
+            if end == -1:
+                self._add_open_line(line[pos:])
+                return
+            self._add_open_line(line[pos:end])
+            block = self._close_block(offset + end + len(CODE_FENCE))
+            self.blocks.append(block)
+            completed.append(block)
+            pos = end + len(CODE_FENCE)
+
+    def _add_open_line(self, line: str):
+        fixed = fix_mermaid(line)
+        self._open_raw.append(line)
+        self._open_fixed.append(fixed)
+        if fixed.strip():
+            self._open_drawable.append(fixed.strip())
+            self._preview = None
+
+    def _close_block(self, end: int) -> MermaidBlock:
+        # fix_mermaid works line by line, so fixing each line equals fixing the block
+        block = MermaidBlock(
+            "\n".join(self._open_raw).strip(),
+            "\n".join(self._open_fixed).strip(),
+            (self._open_start, end),
+        )
+        self._open_start = None
+        self._open_raw, self._open_fixed, self._open_drawable = [], [], []
+        return block
+
+    def partial_code(self) -> str | None:
+        """Fixed code of the newest block, limited to whole lines while it is still open.
+
+        Returns None until there is something beyond the diagram header to draw.
+        """
+        if self._open_start is not None:
+            if len(self._open_drawable) < 2:
+                return None
+            if self._preview is None:
+                self._preview = "\n".join(self._open_drawable)
+            return self._preview
+        if self.blocks:
+            lines = [line.strip() for line in self.blocks[-1].code.splitlines() if line.strip()]
+            if len(lines) >= 2:
+                return "\n".join(lines)
+        return None
+
+    def result(self) -> MermaidParseResult:
+        """Blocks found so far, including one closed on a final line without a newline"""
+        blocks = list(self.blocks)
+        if self._open_start is not None:
+            end = self._pending.find(CODE_FENCE)
+            if end != -1:
+                tail = self._pending[:end]
+                raw = "\n".join(self._open_raw + [tail]).strip()
+                fixed = "\n".join(self._open_fixed + [fix_mermaid(tail)]).strip()
+                span = (self._open_start, self._pending_offset + end + len(CODE_FENCE))
+                blocks.append(MermaidBlock(raw, fixed, span))
+        return MermaidParseResult(self.text, blocks)
+
+
+def close_subgraphs(code: str) -> str:
+    """Append an `end` for every subgraph the (partial) code leaves open"""
+    depth = 0
     for line in code.splitlines():
-        # Fix classDef = to :
-        if "classDef" in line:
-            line = (
-                line.replace("fill=", "fill:")
-                .replace("stroke=", "stroke:")
-                .replace("color=", "color:")
-            )
-        # Replace parentheses inside square brackets with dashes
-        if "[" in line and "]" in line:
-            inside = line[line.find("[") + 1 : line.find("]")]
-            if "(" in inside or ")" in inside:
-                cleaned = inside.replace("(", "-").replace(")", "-")
-                line = line[: line.find("[") + 1] + cleaned + line[line.find("]") :]
-        fixed.append(line)
-    return "\n".join(fixed)
-
-
-def get_fixed_mermaid_data(text: str) -> str:
-    # Regex to capture code block between ```mermaid ... ``` (handles newlines)
-    pattern = r"```mermaid\s*\n([\s\S]*?)```"
-
-    def replacer(match):
-        original_code = match.group(1).strip()
-        fixed_code = fix_mermaid(original_code)
-        return f"```mermaid\n{fixed_code}\n```"
-
-    fixed_text, count = re.subn(pattern, replacer, text)
+        line = line.strip()
+        if line == "subgraph" or line.startswith("subgraph "):
+            depth += 1
+        elif depth and line.rstrip(";") == "end":
+            depth -= 1
+    return code + "\nend" * depth
+
+
+def parse_mermaid(text: str) -> MermaidParseResult:
+    parser = MermaidStreamParser()
+    parser.feed(text)
+    return parser.result()
+
+
+def extract_mermaid_code(text: str) -> str:
+    """The (unfixed) code of the first mermaid block, or the whole text if there is none"""
+    start = text.find(MERMAID_FENCE)
+    if start == -1:
+        return text.strip()
+    body_start = start + len(MERMAID_FENCE)
+    end = text.find(CODE_FENCE, body_start)
+    return text[body_start : end if end != -1 else len(text)].strip()
+
+
+def get_fixed_mermaid_data(text: str) -> tuple[str, str]:
+    result = parse_mermaid(text)
 
     # If no diagrams found, return a default diagram
-    if count == 0:
-        default_code = """flowchart TD\nA[No Mermaid diagram found]:::common"""
-        return text, f"```mermaid\n{default_code}\n```"
+    if not result.blocks:
+        return text, f"{MERMAID_FENCE}\n{DEFAULT_MERMAID_CODE}\n{CODE_FENCE}"
 
     # Return the fixed text and the last fixed diagram (for compatibility)
-    last_fixed = re.findall(pattern, fixed_text)
-    last_code = last_fixed[-1] if last_fixed else ""
-    return fixed_text, f"```mermaid\n{last_code}\n```"
+    return result.fixed_text, result.last_block.markdown
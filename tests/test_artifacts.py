@@ -0,0 +1,40 @@
+import os
+import time
+from pathlib import Path
+
+from workflow_project.artifacts import ArtifactStore
+
+
+def _age(path: str, seconds: float):
+    then = time.time() - seconds
+    os.utime(path, (then, then))
+
+
+def test_files_are_written_per_session(tmp_path):
+    store = ArtifactStore(root=tmp_path)
+    path = Path(store.write("session/1", b"png", ".png"))
+    assert path.parent == tmp_path / "session_1"
+    assert path.suffix == ".png" and path.read_bytes() == b"png"
+    assert Path(store.write(None, "flowchart TD", ".mmd")).parent.name == "anonymous"
+    assert store.usage() == {"files": 2, "bytes": 15}
+
+
+def test_gc_removes_expired_files_and_empty_sessions(tmp_path):
+    store = ArtifactStore(root=tmp_path, ttl=60)
+    old = store.write("a", b"x", ".png")
+    fresh = store.write("b", b"x", ".png")
+    _age(old, 120)
+    assert store.gc() == 1
+    assert not os.path.exists(old) and os.path.exists(fresh)
+    assert [p.name for p in tmp_path.iterdir()] == ["b"]
+
+
+def test_gc_removes_the_oldest_files_while_over_budget(tmp_path):
+    store = ArtifactStore(root=tmp_path, ttl=3600, max_bytes=25)
+    paths = [store.write("s", b"x" * 10, ".png") for _ in range(3)]
+    for index, path in enumerate(paths):
+        _age(path, 30 - index)  # paths[0] is the oldest
+    assert store.gc() == 1
+    assert [os.path.exists(p) for p in paths] == [False, True, True]
+    assert store.usage()["bytes"] == 20
+    assert store.removed_files == 1
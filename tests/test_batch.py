@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from workflow_project import batch
+
+DIAGRAM = "Done.\n\n```mermaid\nflowchart TD\nA[Start] --> B[Done]\n```"
+
+
+class Message:
+    def __init__(self, content):
+        self.content = content
+
+
+class FakeApp:
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+    async def ainvoke(self, state, config=None):
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(0.01)
+            if "boom" in state["as_is_solution"]:
+                raise RuntimeError("model failed")
+            return {"messages": [Message(DIAGRAM)]}
+        finally:
+            self.running -= 1
+
+
+@pytest.fixture
+def fake_app(monkeypatch):
+    app = FakeApp()
+    monkeypatch.setattr(batch, "get_batch_app", lambda: app)
+    monkeypatch.setattr(batch, "get_langfuse_handler", lambda: None)
+    return app
+
+
+def _run(items, **kwargs):
+    async def collect():
+        return [result async for result in batch.generate_batch(items, **kwargs)]
+
+    return sorted(asyncio.run(collect()), key=lambda result: result["index"])
+
+
+def test_a_failing_item_does_not_affect_the_others(fake_app):
+    results = _run(
+        [
+            ("Manual steps.", "Automated."),
+            {"as_is_solution": "boom", "proposed_solution": ""},
+            ("  ", "Automated."),
+            {"as_is_solution": "More manual steps."},
+        ]
+    )
+    assert [result["ok"] for result in results] == [True, False, False, True]
+    assert results[0]["code"].startswith("```mermaid\nflowchart TD")
+    assert results[1]["error"] == "model failed"
+    assert results[2]["error"] == "As-Is solution cannot be blank"
+
+
+def test_concurrency_is_capped(fake_app, monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_CONCURRENCY", 3)
+    _run([("Manual steps.", "")] * 8, concurrency=10)
+    assert fake_app.peak == 3
+    fake_app.peak = 0
+    _run([("Manual steps.", "")] * 8, concurrency=2)
+    assert fake_app.peak == 2
+
+
+def test_rejects_oversized_batches(fake_app, monkeypatch):
+    monkeypatch.setattr(batch, "BATCH_MAX_ITEMS", 2)
+    with pytest.raises(ValueError, match="at most 2 items"):
+        _run([("a", "")] * 3)
@@ -0,0 +1,128 @@
+import asyncio
+import sys
+from types import ModuleType
+
+import pytest
+
+from workflow_project.browser_pool import BrowserPool
+
+
+class FakePage:
+    def __init__(self):
+        self.closed = False
+        self.viewports = []
+
+    def is_closed(self):
+        return self.closed
+
+    async def set_viewport_size(self, viewport):
+        self.viewports.append(viewport)
+
+
+class FakeContext:
+    def __init__(self):
+        self.pages = []
+        self.closed = False
+
+    async def new_page(self):
+        self.pages.append(FakePage())
+        return self.pages[-1]
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self):
+        self.contexts.append(FakeContext())
+        return self.contexts[-1]
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.browsers = []
+        self.chromium = self
+
+    async def launch(self, headless=True):
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    fake = FakePlaywright()
+    module = ModuleType("playwright.async_api")
+    module.async_playwright = lambda: fake
+    monkeypatch.setitem(sys.modules, "playwright", ModuleType("playwright"))
+    monkeypatch.setitem(sys.modules, "playwright.async_api", module)
+    return fake
+
+
+@pytest.fixture
+def pool():
+    pool = BrowserPool(size=1, max_uses=2)
+    yield pool
+    pool.shutdown()
+
+
+async def _page(page):
+    return page
+
+
+def test_the_warm_page_is_reused_until_its_context_is_recycled(playwright, pool):
+    first = pool.run_sync(_page)
+    assert pool.run_sync(_page, viewport={"width": 10, "height": 10}) is first
+    assert first.viewports == [{"width": 1280, "height": 720}, {"width": 10, "height": 10}]
+    third = pool.run_sync(_page)  # max_uses reached: a fresh context and page
+    assert third is not first
+    browser = playwright.browsers[0]
+    assert [context.closed for context in browser.contexts] == [True, False]
+
+
+def test_a_failed_render_discards_its_context(playwright, pool):
+    async def fail(page):
+        raise RuntimeError("render crashed")
+
+    first = pool.run_sync(_page)
+    with pytest.raises(RuntimeError):
+        pool.run_sync(fail)
+    assert pool.run_sync(_page) is not first
+    assert len(playwright.browsers[0].contexts) == 2
+
+
+def test_a_disconnected_browser_is_relaunched(playwright, pool):
+    first = pool.run_sync(_page)
+    playwright.browsers[0].connected = False
+    assert pool.run_sync(_page) is not first
+    assert len(playwright.browsers) == 2
+
+
+def test_run_can_be_awaited_from_another_loop(playwright, pool):
+    async def caller():
+        return await pool.run(_page)
+
+    assert isinstance(asyncio.run(caller()), FakePage)
+
+
+def test_a_shut_down_pool_refuses_work(playwright, pool):
+    pool.run_sync(_page)
+    pool.shutdown()
+    assert not playwright.browsers[0].connected
+    with pytest.raises(RuntimeError, match="shut down"):
+        pool.run_sync(_page)
@@ -0,0 +1,79 @@
+"""Simultaneous chat_fn calls must overlap instead of queueing behind each other.
+
+The chat model is swapped for a fake one that takes LATENCY seconds per call.
+With the async graph node the wall time of SESSIONS calls stays close to a
+single call; a blocking node would take about SESSIONS times as long.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("gradio")
+pytest.importorskip("langgraph")
+language_models = pytest.importorskip("langchain_core.language_models")
+
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+
+import workflow_project.app as app_module  # noqa: E402
+import workflow_project.graph as graph_module  # noqa: E402
+import workflow_project.llm_cache as llm_cache_module  # noqa: E402
+
+SESSIONS = 6
+LATENCY = 0.5
+DIAGRAM = "```mermaid\nflowchart TD\nA[Start]:::common --> B[Done]:::tobe\n```"
+
+
+class SlowFakeChatModel(language_models.BaseChatModel):
+    latency: float = LATENCY
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=DIAGRAM))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=DIAGRAM))])
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    fake = SlowFakeChatModel()
+    monkeypatch.setattr(graph_module, "get_llm", lambda: fake)
+    monkeypatch.setattr(graph_module, "get_chat_model", lambda *args, **kwargs: fake)
+    monkeypatch.setattr(app_module, "get_langfuse_handler", BaseCallbackHandler)
+    # Identical prompts must not be answered from the cache, nor trigger export renders
+    monkeypatch.setattr(llm_cache_module, "get_llm_cache", lambda: None)
+    monkeypatch.setattr(app_module.get_prerenderer(), "formats", ())
+    # Compile the graph up front so the timed run measures only the sessions
+    graph_module.get_app()
+    return fake
+
+
+async def _one_session(index: int) -> str:
+    content = None
+    async for update in app_module.chat_fn(
+        f"Manual process number {index}", f"Automated process {index}", lambda *a, **k: None
+    ):
+        content = update[0]
+    return content
+
+
+def test_overlapping_sessions_finish_concurrently(fake_llm):
+    async def run():
+        return await asyncio.gather(*(_one_session(i) for i in range(SESSIONS)))
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    wall = time.perf_counter() - start
+
+    assert all("flowchart TD" in content for content in results)
+    # Serialised calls would take SESSIONS * LATENCY
+    assert wall < 2 * LATENCY, f"{SESSIONS} sessions took {wall:.2f}s"
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langgraph")
+
+from workflow_project.checkpoint import BoundedMemorySaver, _sqlite_saver  # noqa: E402
+
+
+def _config(thread_id):
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+def _savers(tmp_path):
+    yield BoundedMemorySaver(max_threads=2, ttl=60)
+    try:
+        yield _sqlite_saver(str(tmp_path / "checkpoints.sqlite3"), 2, 60)
+    except ImportError:
+        pass
+
+
+def test_threads_are_evicted_least_recently_used_first(tmp_path):
+    for saver in _savers(tmp_path):
+        for thread_id in ("a", "b", "a", "c"):
+            saver.get_tuple(_config(thread_id))
+        assert list(saver._threads) == ["a", "c"]
+        assert saver.evicted_threads == 1
+
+
+def test_deleting_a_thread_forgets_it(tmp_path):
+    for saver in _savers(tmp_path):
+        for thread_id in ("a", "b"):
+            saver.get_tuple(_config(thread_id))
+        saver.delete_thread("a")
+        asyncio.run(saver.adelete_thread("b"))
+        assert saver.thread_count == 0
+        saver.get_tuple(_config("c"))
+        saver.get_tuple(_config("d"))
+        # Deleted threads neither take a slot nor count as evictions
+        assert saver.thread_count == 2 and saver.evicted_threads == 0
@@ -0,0 +1,67 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from workflow_project.diagram import (  # noqa: E402
+    DiagramEdge,
+    DiagramNode,
+    WorkflowDiagram,
+    compile_mermaid,
+    diagram_markdown,
+)
+from workflow_project.native_render import parse_flowchart  # noqa: E402
+
+
+def _diagram(nodes, edges=()) -> WorkflowDiagram:
+    return WorkflowDiagram(summary="A process.", nodes=nodes, edges=list(edges))
+
+
+def test_compiles_nodes_edges_styles_and_legend():
+    code = compile_mermaid(
+        _diagram(
+            [
+                DiagramNode(id="A", label="Receive order", kind="asis"),
+                DiagramNode(id="B", label="Valid?", kind="tobe", shape="decision"),
+            ],
+            [DiagramEdge(source="A", target="B", label="checked")],
+        )
+    )
+    chart = parse_flowchart(code)
+    assert chart.nodes["A"].classes == ["asis"]
+    assert chart.nodes["B"].shape == "hexagon"
+    assert [(e.source, e.target, e.label) for e in chart.edges] == [("A", "B", "checked")]
+    assert set(chart.class_defs) == {"asis", "tobe"}
+    assert [(s.id, s.members) for s in chart.subgraphs] == [("Legend", ["Legend_asis", "Legend_tobe"])]
+
+
+def test_drops_edges_to_undeclared_nodes():
+    code = compile_mermaid(
+        _diagram(
+            [DiagramNode(id="A", label="Start", kind="common")],
+            [DiagramEdge(source="A", target="Z"), DiagramEdge(source="Y", target="A")],
+        )
+    )
+    chart = parse_flowchart(code)
+    assert chart.edges == [] and list(chart.nodes) == ["A"]
+
+
+def test_sanitises_ids_and_labels():
+    nodes = [
+        DiagramNode(id="1 step", label='Check (and "log")', kind="asis"),
+        DiagramNode(id="end", label="Done", kind="asis"),
+        DiagramNode(id="1_step", label="Clash", kind="asis"),
+        DiagramNode(id="Legend_asis", label="Not the legend", kind="asis"),
+    ]
+    code = compile_mermaid(_diagram(nodes, [DiagramEdge(source="1 step", target="end")]))
+    chart = parse_flowchart(code)
+    assert list(chart.nodes) == ["N1_step", "Nend", "N1_step_2", "NLegend_asis"]
+    assert chart.nodes["N1_step"].label == "Check -and log -"
+    assert [(e.source, e.target) for e in chart.edges] == [("N1_step", "Nend")]
+
+
+def test_as_is_only_diagrams_have_no_legend():
+    diagram = _diagram(
+        [DiagramNode(id="A", label="Start", kind="asis"), DiagramNode(id="B", label="End", kind="common")]
+    )
+    assert "subgraph" not in compile_mermaid(diagram, as_is_only=True)
+    assert diagram_markdown(diagram).startswith("A process.\n\n```mermaid\nflowchart TD")
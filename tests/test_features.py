@@ -0,0 +1,34 @@
+from workflow_project.features import (
+    FEATURE_CATALOG,
+    FeatureIndex,
+    format_features,
+    select_features,
+    tokenize,
+)
+
+
+def test_tokenize_drops_stopwords_and_stems():
+    assert tokenize("The notifications are sent by email") == tokenize("notification sent email")
+    assert tokenize("Prioritization of urgent tasks") == tokenize("prioritize urgent task")
+    assert tokenize("it is on the") == []
+
+
+def test_search_ranks_the_best_match_first():
+    index = FeatureIndex()
+    assert index.search("send an email reminder when the deadline is overdue", k=2)[0].name == "Notification"
+    assert index.search("quality audit with pass/fail checklist", k=1)[0].name == "Quality Checklist"
+    assert index.search("recurring weekly schedule")[0].name == "Template Setup"
+
+
+def test_search_returns_at_most_k_and_nothing_for_unknown_words():
+    index = FeatureIndex()
+    assert len(index.search("assign work to the team", k=3)) == 3
+    assert index.search("zzz qqq") == []
+
+
+def test_select_features_falls_back_to_the_whole_catalog():
+    everything = format_features(FEATURE_CATALOG)
+    assert select_features("zzz qqq") == everything
+    assert select_features("email", k=0) == everything
+    selected = select_features("email alert", k=1)
+    assert selected == "PROCESS DEFINTION:\n    14. Notification: " + FEATURE_CATALOG[13].description
@@ -0,0 +1,163 @@
+import pytest
+
+pytest.importorskip("pydantic")
+
+from workflow_project.diagram import DiagramEdge, DiagramNode, WorkflowDiagram  # noqa: E402
+from workflow_project.incremental import (  # noqa: E402
+    DiagramPatch,
+    apply_patch,
+    diagram_from_mermaid,
+    diagram_outline,
+    input_changes,
+    patch_mermaid,
+)
+
+
+def _diagram() -> WorkflowDiagram:
+    return WorkflowDiagram(
+        summary="Orders are checked and shipped.",
+        nodes=[
+            DiagramNode(id="A", label="Receive order", kind="asis"),
+            DiagramNode(id="B", label="Valid?", kind="common", shape="decision"),
+            DiagramNode(id="C", label="Ship", kind="tobe"),
+        ],
+        edges=[
+            DiagramEdge(source="A", target="B"),
+            DiagramEdge(source="B", target="C", label="yes"),
+        ],
+    )
+
+
+def test_apply_patch_adds_replaces_and_removes():
+    patch = DiagramPatch(
+        summary="Orders are checked, invoiced and shipped.",
+        add_nodes=[
+            DiagramNode(id="D", label="Send invoice", kind="tobe"),
+            DiagramNode(id="A", label="Receive order by email", kind="asis"),
+        ],
+        remove_edges=[DiagramEdge(source="B", target="C")],
+        add_edges=[DiagramEdge(source="B", target="D", label="yes"), DiagramEdge(source="D", target="C")],
+    )
+    updated = apply_patch(_diagram(), patch)
+    assert updated.summary == "Orders are checked, invoiced and shipped."
+    assert [(n.id, n.label) for n in updated.nodes] == [
+        ("A", "Receive order by email"),
+        ("B", "Valid?"),
+        ("C", "Ship"),
+        ("D", "Send invoice"),
+    ]
+    assert [(e.source, e.target, e.label) for e in updated.edges] == [
+        ("A", "B", ""),
+        ("B", "D", "yes"),
+        ("D", "C", ""),
+    ]
+    assert patch.size == 5
+
+
+def test_apply_patch_drops_dangling_edges_and_keeps_the_summary():
+    patch = DiagramPatch(
+        summary="  ",
+        remove_nodes=["B"],
+        add_edges=[DiagramEdge(source="A", target="missing")],
+    )
+    updated = apply_patch(_diagram(), patch)
+    assert updated.summary == "Orders are checked and shipped."
+    assert [n.id for n in updated.nodes] == ["A", "C"]
+    assert updated.edges == []
+
+
+def test_input_changes_reports_changed_sentences():
+    previous = {"as_is_solution": "Receive order. Check it. Ship it.", "proposed_solution": ""}
+    current = {"as_is_solution": "Receive order. Check it twice. Ship it.", "proposed_solution": ""}
+    diff, share = input_changes(previous, current)
+    assert diff == "AS-IS - Check it.\nAS-IS + Check it twice."
+    assert share == pytest.approx(1 / 3)
+    assert input_changes(previous, previous) == ("", 0.0)
+
+
+def test_diagram_outline():
+    assert diagram_outline(_diagram()) == (
+        "A: Receive order [asis]\nB: Valid? [common, decision]\nC: Ship [tobe]\nA -> B\nB -> C (yes)"
+    )
+
+
+def test_diagram_from_mermaid_reads_a_free_form_answer():
+    text = (
+        "Orders are checked.\n\n```mermaid\nflowchart TD\n"
+        "A[Receive order]:::asis --> B{Valid?}:::common\n"
+        "subgraph legend[Legend]\nL1[As-Is]:::asis\nend\n```"
+    )
+    diagram = diagram_from_mermaid(text)
+    assert diagram.summary == "Orders are checked."
+    assert [(n.id, n.kind, n.shape) for n in diagram.nodes] == [
+        ("A", "asis", "process"),
+        ("B", "common", "decision"),
+    ]
+    assert [(e.source, e.target) for e in diagram.edges] == [("A", "B")]
+    assert diagram_from_mermaid("no diagram") is None
+    assert diagram_from_mermaid("```mermaid\nsequenceDiagram\nA->>B: hi\n```") is None
+
+
+FREE_FORM = """flowchart LR
+classDef asis fill:#fdd,stroke:#b00
+classDef tobe fill:#dfd
+subgraph intake[Order intake]
+A[Receive order]:::asis --> B{Valid?}:::asis
+subgraph checks[Checks]
+C[Check stock]:::asis
+end
+end
+B -->|yes| C
+C -.-> D[Ship]:::tobe
+style D stroke-width:4px
+subgraph legend[Legend]
+L1[As-Is]:::asis
+end"""
+
+
+def test_patching_a_free_form_diagram_keeps_its_subgraphs_and_styles():
+    from workflow_project.native_render import parse_flowchart
+
+    text = f"Orders.\n\n```mermaid\n{FREE_FORM}\n```"
+    previous = diagram_from_mermaid(text)
+    patch = DiagramPatch(
+        summary="Orders are invoiced.",
+        add_nodes=[
+            DiagramNode(id="C", label="Check stock twice", kind="asis"),
+            DiagramNode(id="E", label="Send invoice", kind="common"),
+        ],
+        add_edges=[DiagramEdge(source="D", target="E")],
+    )
+    code = patch_mermaid(FREE_FORM, apply_patch(previous, patch))
+    chart = parse_flowchart(code)
+
+    assert chart.direction == "LR"
+    assert {(s.id, s.parent, tuple(s.members)) for s in chart.subgraphs} == {
+        ("intake", "", ("A", "B")),
+        ("checks", "intake", ("C",)),
+        ("legend", "", ("L1",)),
+    }
+    assert chart.nodes["B"].shape == "rhombus"
+    assert chart.nodes["C"].label == "Check stock twice"
+    assert chart.nodes["D"].style == {"stroke-width": "4px"}
+    assert chart.nodes["E"].classes == ["common"]
+    assert set(chart.class_defs) == {"asis", "tobe", "common"}
+    assert chart.class_defs["asis"] == {"fill": "#fdd", "stroke": "#b00"}
+    assert [(e.source, e.target, e.label, e.line) for e in chart.edges] == [
+        ("A", "B", "", "solid"),
+        ("B", "C", "yes", "solid"),
+        ("C", "D", "", "dotted"),
+        ("D", "E", "", "solid"),
+    ]
+    # Read back, the patched code is the patched diagram
+    reread = diagram_from_mermaid(f"```mermaid\n{code}\n```")
+    expected = apply_patch(previous, patch).nodes
+    assert {n.id: n.model_dump() for n in reread.nodes} == {n.id: n.model_dump() for n in expected}
+
+
+def test_patching_drops_emptied_subgraphs():
+    previous = diagram_from_mermaid(f"```mermaid\n{FREE_FORM}\n```")
+    patch = DiagramPatch(summary="", remove_nodes=["C"])
+    code = patch_mermaid(FREE_FORM, apply_patch(previous, patch))
+    assert "subgraph checks" not in code and "subgraph intake" in code
+    assert patch_mermaid("sequenceDiagram\nA->>B: hi", previous) is None
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from workflow_project.limiter import ConcurrencyLimiter, QueueFullError
+
+
+def test_runs_at_most_concurrency_holders_at_once():
+    limiter = ConcurrencyLimiter("test", concurrency=2, max_queue=10)
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        async with limiter.slot():
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(work() for _ in range(6)))
+
+    asyncio.run(run())
+    assert peak == 2
+    stats = limiter.stats()
+    assert (stats["completed"], stats["in_flight"], stats["queue_depth"]) == (6, 0, 0)
+    assert stats["max_wait_s"] > 0
+
+
+def test_rejects_once_the_queue_is_full():
+    limiter = ConcurrencyLimiter("export", concurrency=1, max_queue=1)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def hold():
+            async with limiter.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert (limiter.in_flight, limiter.waiting) == (1, 1)
+
+        with pytest.raises(QueueFullError, match="export queue is full"):
+            async with limiter.slot():
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+
+    asyncio.run(run())
+    assert limiter.stats()["rejected"] == 1
+    assert limiter.stats()["completed"] == 2
+
+
+def test_no_queue_still_admits_while_a_slot_is_free():
+    limiter = ConcurrencyLimiter("test", concurrency=1, max_queue=0)
+
+    async def run():
+        async with limiter.slot() as wait:
+            assert wait >= 0
+            with pytest.raises(QueueFullError):
+                async with limiter.slot():
+                    pass
+
+    asyncio.run(run())
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+from workflow_project.llm_cache import InMemoryLLMCache, SQLiteLLMCache, llm_cache_key
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "memory":
+            return InMemoryLLMCache(**kwargs)
+        return SQLiteLLMCache(path=str(tmp_path / "llm_cache.sqlite3"), **kwargs)
+
+    return make
+
+
+def test_key_depends_on_inputs_model_and_prompt_version():
+    inputs = {"as_is_solution": "Manual steps.", "proposed_solution": ""}
+    key = llm_cache_key(inputs, "gpt-4o", "openai", "v1")
+    assert key == llm_cache_key({**inputs, "as_is_solution": " Manual steps.\r\n"}, "gpt-4o", "openai", "v1")
+    assert key != llm_cache_key(inputs, "gpt-4o-mini", "openai", "v1")
+    assert key != llm_cache_key(inputs, "gpt-4o", "openai", "v2")
+    assert key != llm_cache_key({**inputs, "as_is_solution": "manual  steps."}, "gpt-4o", "openai", "v1")
+
+
+def test_fuzzy_keys_ignore_whitespace_and_case():
+    a = llm_cache_key({"as_is_solution": "Manual  steps."}, "m", "p", "v1", fuzzy=True)
+    b = llm_cache_key({"as_is_solution": "manual steps."}, "m", "p", "v1", fuzzy=True)
+    assert a == b
+
+
+def test_hits_and_misses_are_counted(make_cache):
+    cache = make_cache()
+    assert cache.get("a") is None
+    cache.set("a", "answer")
+    assert cache.get("a") == "answer"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_entries_expire_after_the_ttl(make_cache):
+    cache = make_cache(ttl=0.05)
+    cache.set("a", "answer")
+    assert cache.get("a") == "answer"
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_entries_are_evicted(make_cache):
+    cache = make_cache(max_items=2)
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    assert cache.get("a") == "1"  # "b" is now least recently used
+    time.sleep(0.01)
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+
+
+def test_sqlite_cache_survives_a_restart(tmp_path):
+    path = str(tmp_path / "llm_cache.sqlite3")
+    SQLiteLLMCache(path=path).set("a", "answer")
+    assert SQLiteLLMCache(path=path).get("a") == "answer"
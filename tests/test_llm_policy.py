@@ -0,0 +1,148 @@
+import asyncio
+import contextvars
+import time
+
+import pytest
+
+from workflow_project import llm_policy
+from workflow_project.llm_policy import ainvoke_with_policy, backoff, invoke_with_policy, is_retryable
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class RateLimitError(Exception):
+    pass
+
+
+class FakeLLM:
+    """Answers after `delay` seconds, failing with the queued errors first"""
+
+    def __init__(self, answer="ok", delay=0.0, errors=()):
+        self.answer = answer
+        self.delay = delay
+        self.errors = list(errors)
+        self.calls = 0
+        self.cancelled = False
+
+    def _next(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.answer
+
+    async def ainvoke(self, messages):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return self._next()
+
+    def invoke(self, messages):
+        time.sleep(self.delay)
+        return self._next()
+
+
+@pytest.fixture(autouse=True)
+def fast_policy(monkeypatch):
+    monkeypatch.setattr(llm_policy, "LLM_RETRY_BACKOFF", 0)
+    monkeypatch.setattr(llm_policy, "LLM_RETRIES_MAX", 2)
+    monkeypatch.setattr(llm_policy, "LLM_ATTEMPT_TIMEOUT", 5)
+    monkeypatch.setattr(llm_policy, "LLM_HEDGE_AFTER", 0.05)
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (TimeoutError(), True),
+        (ConnectionError(), True),
+        (StatusError(429), True),
+        (StatusError(503), True),
+        (StatusError(400), False),
+        (StatusError(401), False),
+        (RateLimitError(), True),
+        (ValueError("bad schema"), False),
+    ],
+)
+def test_is_retryable(error, expected):
+    assert is_retryable(error) is expected
+
+
+def test_backoff_is_capped_full_jitter(monkeypatch):
+    monkeypatch.setattr(llm_policy, "LLM_RETRY_BACKOFF", 0.5)
+    monkeypatch.setattr(llm_policy, "LLM_RETRY_BACKOFF_MAX", 2)
+    for attempt in range(6):
+        assert 0 <= backoff(attempt) <= min(2, 0.5 * 2**attempt)
+
+
+def test_retries_transient_errors():
+    llm = FakeLLM(errors=[TimeoutError(), StatusError(502)])
+    assert asyncio.run(ainvoke_with_policy(llm, [])) == "ok"
+    assert llm.calls == 3
+
+    llm = FakeLLM(errors=[TimeoutError(), StatusError(502)])
+    assert invoke_with_policy(llm, []) == "ok"
+    assert llm.calls == 3
+
+
+def test_gives_up_after_the_retry_budget():
+    llm = FakeLLM(errors=[StatusError(500)] * 5)
+    with pytest.raises(StatusError):
+        asyncio.run(ainvoke_with_policy(llm, []))
+    assert llm.calls == 3
+
+
+def test_does_not_retry_client_errors():
+    llm = FakeLLM(errors=[StatusError(400)])
+    with pytest.raises(StatusError):
+        invoke_with_policy(llm, [])
+    assert llm.calls == 1
+
+
+def test_attempt_timeout(monkeypatch):
+    monkeypatch.setattr(llm_policy, "LLM_ATTEMPT_TIMEOUT", 0.05)
+    monkeypatch.setattr(llm_policy, "LLM_RETRIES_MAX", 0)
+    llm = FakeLLM(delay=1)
+    with pytest.raises(TimeoutError):
+        asyncio.run(ainvoke_with_policy(llm, []))
+    assert llm.cancelled
+
+
+def test_hedge_wins_when_the_first_request_is_slow():
+    slow, hedge = FakeLLM("slow", delay=1), FakeLLM("hedge")
+    assert asyncio.run(ainvoke_with_policy(slow, [], hedge)) == "hedge"
+    assert slow.cancelled
+
+    slow, hedge = FakeLLM("slow", delay=0.5), FakeLLM("hedge")
+    assert invoke_with_policy(slow, [], hedge) == "hedge"
+
+
+def test_hedge_is_not_sent_when_the_first_request_is_fast():
+    fast, hedge = FakeLLM("fast"), FakeLLM("hedge")
+    assert asyncio.run(ainvoke_with_policy(fast, [], hedge)) == "fast"
+    assert invoke_with_policy(fast, [], hedge) == "fast"
+    assert hedge.calls == 0
+
+
+def test_a_failed_hedge_falls_back_to_the_first_request():
+    slow, hedge = FakeLLM("slow", delay=0.2), FakeLLM(errors=[StatusError(400)])
+    assert asyncio.run(ainvoke_with_policy(slow, [], hedge)) == "slow"
+
+
+def test_sync_attempts_run_in_the_callers_context():
+    request_id = contextvars.ContextVar("request_id", default=None)
+    seen = []
+
+    class ContextLLM(FakeLLM):
+        def invoke(self, messages):
+            seen.append(request_id.get())
+            return super().invoke(messages)
+
+    request_id.set("r1")
+    slow, hedge = ContextLLM("slow", delay=0.5), ContextLLM("hedge")
+    assert invoke_with_policy(slow, [], hedge) == "hedge"
+    assert seen == ["r1", "r1"]
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from workflow_project import export
+from workflow_project.native_render import (
+    UnsupportedDiagram,
+    layout_flowchart,
+    parse_flowchart,
+    rank_nodes,
+    render_svg,
+)
+
+CODE = """flowchart TD
+classDef asis fill:#f9d,stroke:#333
+subgraph lane[Back office]
+A["Receive order; log it"]:::asis --> B{Valid?}
+end
+B -->|yes| C([Ship])
+B -. no .-> D[(Archive)]
+C --o E & F
+style C fill:#fff
+"""
+
+
+def test_parse_nodes_shapes_and_classes():
+    chart = parse_flowchart(CODE)
+    assert chart.direction == "TD"
+    assert list(chart.nodes) == ["A", "B", "C", "D", "E", "F"]
+    assert chart.nodes["A"].label == "Receive order; log it"
+    assert chart.nodes["A"].classes == ["asis"]
+    assert [chart.nodes[n].shape for n in "BCD"] == ["rhombus", "stadium", "cylinder"]
+    assert chart.nodes["C"].style == {"fill": "#fff"}
+    assert chart.class_defs["asis"] == {"fill": "#f9d", "stroke": "#333"}
+    assert [(s.id, s.title, s.members) for s in chart.subgraphs] == [("lane", "Back office", ["A", "B"])]
+
+
+def test_parse_edges():
+    edges = {(e.source, e.target): e for e in parse_flowchart(CODE).edges}
+    assert edges[("B", "C")].label == "yes"
+    assert edges[("B", "D")].line == "dotted" and edges[("B", "D")].label == "no"
+    assert edges[("C", "E")].head == edges[("C", "F")].head == "circle"
+    assert parse_flowchart("graph LR\nA --x B").edges[0].head == "cross"
+
+
+def test_semicolons_split_statements_outside_quotes_and_entities():
+    chart = parse_flowchart('flowchart LR; A["a; b"] --> B; B --> C[say #quot;hi#quot;]')
+    assert chart.direction == "LR"
+    assert chart.nodes["A"].label == "a; b"
+    assert chart.nodes["C"].label == 'say "hi"'
+    assert len(chart.edges) == 2
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "",
+        "sequenceDiagram\nA->>B: hi",
+        "flowchart RL\nA --> B",
+        "flowchart TD\nA --> B\nclick A callback",
+        "flowchart TD\nsubgraph one\nA --> B",
+    ],
+)
+def test_unsupported_diagrams_raise(code):
+    with pytest.raises(UnsupportedDiagram):
+        parse_flowchart(code)
+
+
+def test_layout_follows_edge_direction():
+    chart = parse_flowchart(CODE)
+    rank = rank_nodes(chart)
+    assert rank["A"] < rank["B"] < rank["C"] < rank["E"]
+
+    layout = layout_flowchart(chart)
+    assert layout.boxes["A"].y < layout.boxes["B"].y < layout.boxes["C"].y
+    for box in layout.boxes.values():
+        assert 0 <= box.x - box.width / 2 and box.x + box.width / 2 <= layout.width
+    assert len(layout.edge_points) == len(chart.edges)
+
+    horizontal = layout_flowchart(parse_flowchart("flowchart LR\nA --> B"))
+    assert horizontal.boxes["A"].x < horizontal.boxes["B"].x
+
+
+def test_render_svg_draws_every_node_and_marker():
+    svg = render_svg(CODE)
+    assert svg.startswith("<svg") and svg.rstrip().endswith("</svg>")
+    for text in ("Receive order; log it", "Back office", "Archive"):
+        assert text in svg
+    assert 'marker-end="url(#circle)"' in svg and 'marker-end="url(#arrow)"' in svg
+    assert 'stroke-dasharray="4 3"' in svg
+
+
+def test_export_falls_back_to_the_browser_for_unsupported_diagrams(monkeypatch):
+    monkeypatch.setattr(export, "EXPORT_RENDERER", "auto")
+    assert asyncio.run(export._render_native("sequenceDiagram\nA->>B: hi")) is None
+    assert asyncio.run(export._render_native("flowchart TD\nA --> B")).startswith("<svg")
+
+    monkeypatch.setattr(export, "EXPORT_RENDERER", "native")
+    with pytest.raises(UnsupportedDiagram):
+        asyncio.run(export._render_native("sequenceDiagram\nA->>B: hi"))
+
+    monkeypatch.setattr(export, "EXPORT_RENDERER", "browser")
+    assert asyncio.run(export._render_native("flowchart TD\nA --> B")) is None
@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import io
+import zipfile
+
+import pytest
+
+from workflow_project import export
+from workflow_project.artifacts import ArtifactStore
+from workflow_project.pdf_pages import PagedPdfWriter
+from workflow_project.tiling import split_flowchart
+
+Image = pytest.importorskip("PIL.Image")
+PdfParser = pytest.importorskip("PIL.PdfParser")
+
+
+def _png(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGBA", (width, height), (0, 0, 255, 128)).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def _chain(count: int) -> str:
+    return "\n".join(["flowchart TD"] + [f"N{i}[Step {i}] --> N{i + 1}[Step {i + 1}]" for i in range(count - 1)])
+
+
+@pytest.fixture
+def fake_pages(monkeypatch):
+    rendered = []
+
+    async def render_png(code, scale=2):
+        rendered.append(code)
+        return _png(40, 20)
+
+    monkeypatch.setattr(export, "render_png", render_png)
+    monkeypatch.setattr(export, "EXPORT_CONCURRENCY", 2)
+    return rendered
+
+
+def test_pdf_writer_streams_pages_with_a_valid_xref():
+    out = io.BytesIO()
+    pdf = PagedPdfWriter(out)
+    pdf.add_page(_png(300, 100), 0.75, 1, 2)
+    pdf.add_page(_png(100, 300), 0.75, 2, 2)
+    pdf.close()
+    data = out.getvalue()
+
+    assert data.startswith(b"%PDF-1.4") and data.endswith(b"%%EOF\n")
+    assert b"/Count 2" in data and b"(Page 2 of 2)" in data
+    assert b"/MediaBox [0 0 841.89 595.28]" in data  # wide page turned landscape
+    parsed = PdfParser.PdfParser(buf=data)
+    assert len(parsed.pages) == 2
+    assert parsed.read_indirect(parsed.pages[1])[b"MediaBox"] == [0, 0, 595.28, 841.89]
+
+
+def test_paged_exports_are_written_straight_into_the_artifact_file(tmp_path, fake_pages, monkeypatch):
+    monkeypatch.setattr(export, "split_flowchart", functools.partial(split_flowchart, max_nodes=3))
+    store = ArtifactStore(root=tmp_path)
+    code = _chain(7)
+
+    async def run():
+        with store.open("s1", ".zip") as (out, path):
+            await export.render_png_tiles(code, out)
+        return path
+
+    path = asyncio.run(run())
+    with zipfile.ZipFile(path) as tiles:
+        assert tiles.namelist() == [
+            "workflow.mmd",
+            "workflow-page01.png",
+            "workflow-page02.png",
+            "workflow-page03.png",
+        ]
+    assert len(fake_pages) == 3
+    assert not list(tmp_path.glob("*/*.part"))
+
+
+def test_a_failed_export_leaves_no_file(tmp_path, monkeypatch):
+    async def broken(code, scale=2):
+        raise RuntimeError("render failed")
+
+    monkeypatch.setattr(export, "render_png", broken)
+    store = ArtifactStore(root=tmp_path)
+
+    async def run():
+        with store.open("s1", ".pdf") as (out, _):
+            await export.render_paged_pdf(_chain(3), out)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert not list(tmp_path.glob("*/*"))
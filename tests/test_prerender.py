@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from workflow_project import prerender
+from workflow_project.prerender import Prerenderer
+
+CODE = "flowchart TD\nA --> B"
+
+
+class FakeRenderer:
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.started = []
+        self.finished = []
+        self.cancelled = []
+
+    async def __call__(self, mermaid_code):
+        self.started.append(mermaid_code)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled.append(mermaid_code)
+            raise
+        self.finished.append(mermaid_code)
+
+
+@pytest.fixture
+def renderer(monkeypatch):
+    fake = FakeRenderer()
+    monkeypatch.setitem(prerender._RENDERERS, "png", fake)
+    return fake
+
+
+def _prerenderer():
+    return Prerenderer(formats=("png",), concurrency=1, delay=0)
+
+
+def test_renders_the_scheduled_diagram(renderer):
+    async def run():
+        p = _prerenderer()
+        p.schedule("s1", CODE)
+        await p.wait("s1", CODE)
+        return p
+
+    p = asyncio.run(run())
+    assert renderer.finished == [CODE]
+    assert p.stats()["completed"] == 1 and p.stats()["pending"] == 0
+
+
+def test_cancel_and_reschedule_stop_the_running_render(renderer):
+    async def run():
+        p = _prerenderer()
+        p.schedule("s1", CODE)
+        await asyncio.sleep(0.01)
+        p.cancel("s1")
+        p.schedule("s2", CODE)
+        await asyncio.sleep(0.01)
+        p.schedule("s2", CODE + "\nB --> C")  # supersedes the first s2 render
+        await p.wait("s2", CODE + "\nB --> C")
+        return p
+
+    p = asyncio.run(run())
+    assert renderer.cancelled == [CODE, CODE]
+    assert renderer.finished == [CODE + "\nB --> C"]
+    assert p.stats()["cancelled"] == 2
+
+
+def test_a_cancelled_download_does_not_cancel_the_shared_render(renderer):
+    async def run():
+        p = _prerenderer()
+        p.schedule("s1", CODE)
+        download = asyncio.create_task(p.wait("s1", CODE))
+        await asyncio.sleep(0.01)
+        download.cancel()
+        await asyncio.sleep(0.1)
+
+    asyncio.run(run())
+    assert renderer.finished == [CODE] and renderer.cancelled == []
+
+
+def test_stands_back_while_a_diagram_is_being_generated(renderer):
+    async def run():
+        p = _prerenderer()
+        with p.generating():
+            p.schedule("s1", CODE)
+            await asyncio.sleep(0.01)
+        return p
+
+    p = asyncio.run(run())
+    assert renderer.started == []
+    assert p.stats()["skipped"] == 1
@@ -0,0 +1,54 @@
+import asyncio
+from types import SimpleNamespace
+
+from workflow_project import queues
+from workflow_project.limiter import ConcurrencyLimiter
+from workflow_project.metrics import IN_FLIGHT
+
+
+def _blocks(**depths):
+    event_queues = {group: SimpleNamespace(queue=[object()] * depth) for group, depth in depths.items()}
+    return SimpleNamespace(_queue=SimpleNamespace(event_queue_per_concurrency_id=event_queues))
+
+
+def test_queue_depths_per_concurrency_group():
+    blocks = _blocks(generate=3, export=1)
+    assert queues.queue_depths(blocks) == {"generate": 3, "export": 1}
+    # Unknown Gradio internals report nothing rather than fail
+    assert queues.queue_depths(SimpleNamespace()) == {}
+    assert queues.queue_depths(SimpleNamespace(_queue=None)) == {}
+
+
+def test_queue_status_combines_gradio_queues_and_the_export_limiter(monkeypatch):
+    limiter = ConcurrencyLimiter("export", concurrency=1, max_queue=4)
+    monkeypatch.setattr(queues, "export_limiter", limiter)
+
+    async def run():
+        release = asyncio.Event()
+
+        async def export():
+            async with limiter.slot():
+                await release.wait()
+
+        tasks = [asyncio.create_task(export()) for _ in range(3)]
+        await asyncio.sleep(0)
+        with IN_FLIGHT.track(endpoint="generate"):
+            status = queues.queue_status(_blocks(generate=2, export=1))
+        release.set()
+        await asyncio.gather(*tasks)
+        return status
+
+    assert asyncio.run(run()) == {
+        "generate_running": 1,
+        "generate_waiting": 2,
+        "export_running": 1,
+        # one queued in Gradio, two holding a handler while waiting for a render slot
+        "export_waiting": 3,
+    }
+
+
+def test_export_group_admits_what_the_limiter_can_run_and_hold():
+    assert queues.EXPORT_CONCURRENCY_LIMIT == queues.EXPORT_CONCURRENCY + queues.EXPORT_MAX_QUEUE
+    assert queues.GENERATE_CONCURRENCY_ID != queues.EXPORT_CONCURRENCY_ID
+    markdown = queues.queue_status_markdown(_blocks())
+    assert "**Generation:** 0 running, 0 waiting" in markdown
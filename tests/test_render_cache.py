@@ -0,0 +1,65 @@
+import time
+
+from workflow_project.render_cache import RenderCache, render_cache_key
+
+
+def test_key_depends_on_code_format_and_options():
+    key = render_cache_key("flowchart TD\nA --> B", "png", {"scale": 2})
+    assert key == render_cache_key("  flowchart TD\nA --> B\n", "png", {"scale": 2})
+    assert key != render_cache_key("flowchart TD\nA --> B", "pdf", {"scale": 2})
+    assert key != render_cache_key("flowchart TD\nA --> B", "png", {"scale": 3})
+
+
+def test_memory_tier_is_lru_bounded_by_items_and_bytes():
+    cache = RenderCache(directory=None, memory_items=2, memory_bytes=100)
+    cache.put("a", b"1")
+    cache.put("b", b"2")
+    assert cache.get("a") == b"1"  # "b" is now least recently used
+    cache.put("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+
+    cache.put("big", b"x" * 99)
+    assert cache.stats()["memory_bytes"] <= 100
+    cache.put("huge", b"x" * 101)  # larger than the whole tier: not kept in memory
+    assert cache.get("huge") is None
+
+
+def test_entries_expire_after_the_ttl(tmp_path):
+    cache = RenderCache(directory=tmp_path, ttl=0.05)
+    cache.put("a", b"data")
+    assert cache.get("a") == b"data"
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert list(tmp_path.glob("*.bin")) == []
+    assert cache.stats()["disk_items"] == 0
+
+
+def test_disk_tier_survives_a_restart(tmp_path):
+    RenderCache(directory=tmp_path).put("a", b"data")
+    cache = RenderCache(directory=tmp_path)
+    assert cache.stats()["disk_items"] == 1
+    assert cache.get("a") == b"data"
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get("a") == b"data"
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_disk_tier_evicts_least_recently_used_files(tmp_path):
+    cache = RenderCache(directory=tmp_path, memory_items=1, disk_bytes=25)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 10)
+    assert cache.get("a") == b"x" * 10  # "b" is now least recently used on disk
+    cache.put("c", b"x" * 10)
+    assert sorted(path.stem for path in tmp_path.glob("*.bin")) == ["a", "c"]
+    assert cache.stats()["disk_bytes"] == 20
+
+
+def test_startup_scan_applies_the_disk_budget(tmp_path):
+    writer = RenderCache(directory=tmp_path, disk_bytes=1000)
+    for key in "abc":
+        writer.put(key, b"x" * 10)
+        time.sleep(0.01)  # distinct mtimes
+    cache = RenderCache(directory=tmp_path, disk_bytes=15)
+    assert cache.stats()["disk_items"] == 1
+    assert [path.stem for path in tmp_path.glob("*.bin")] == ["c"]
@@ -0,0 +1,59 @@
+import pytest
+
+from workflow_project.router import ModelRouter, Route, load_routes
+
+FALLBACK = Route("default", "*", "big-model", "openai")
+
+
+def _state(as_is="Manual steps.", proposed=""):
+    return {"as_is_solution": as_is, "proposed_solution": proposed, "messages": []}
+
+
+def test_default_routes_use_the_default_model():
+    routes = load_routes("", model="big-model", provider="openai")
+    assert {(route.model, route.provider) for route in routes} == {("big-model", "openai")}
+
+
+def test_routes_match_request_type_and_size():
+    routes = load_routes(
+        '[{"name": "small", "type": "as_is", "max_input_chars": 20, "model": "mini", "provider": "openai"},'
+        ' {"name": "rest", "type": "*"}]',
+        model="big-model",
+        provider="openai",
+    )
+    router = ModelRouter(routes, FALLBACK)
+    assert router.select(_state()).name == "small"
+    assert router.select(_state(as_is="x" * 21)).name == "rest"
+    assert router.select(_state(proposed="Automated.")).name == "rest"
+    assert router.select(_state()).model == "mini"
+    assert router.select(_state(as_is="x" * 21)).model == "big-model"
+
+
+def test_escalate_keeps_the_route_name():
+    router = ModelRouter([], FALLBACK)
+    small = Route("small", "as_is", "mini", "openai")
+    escalated = router.escalate(small)
+    assert (escalated.name, escalated.model) == ("small", "big-model")
+    assert router.is_fallback_model(escalated) and not router.is_fallback_model(small)
+
+
+def test_escalated_answers_are_cached_under_the_routed_key(monkeypatch):
+    pytest.importorskip("pydantic")
+    from workflow_project import graph
+
+    class Cache(dict):
+        def set(self, key, value):
+            self[key] = value
+
+    class Response:
+        content = "no diagram"
+        usage_metadata = None
+
+    state = _state()
+    small = Route("small", "as_is", "mini", "openai")
+    escalated = ModelRouter([], FALLBACK).escalate(small)
+    cache = Cache()
+    graph._finish(Response(), cache, state, small, escalated)
+    # The next identical request looks up the routed key and must hit
+    assert cache[graph._cache_key(state, small)] == "no diagram"
+    assert cache[graph._cache_key(state, escalated)] == "no diagram"
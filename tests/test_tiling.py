@@ -0,0 +1,64 @@
+from workflow_project.native_render import parse_flowchart
+from workflow_project.tiling import needs_paging, page_node_groups, split_flowchart
+
+
+def _chain(count: int) -> str:
+    lines = ["flowchart TD", "classDef asis fill:#f9d"]
+    lines += [f"N{i}[Step {i}]:::asis --> N{i + 1}[Step {i + 1}]:::asis" for i in range(count - 1)]
+    return "\n".join(lines)
+
+
+def test_chunks_follow_the_layout_order():
+    groups = page_node_groups(parse_flowchart(_chain(7)), max_nodes=3)
+    assert groups == [["N0", "N1", "N2"], ["N3", "N4", "N5"], ["N6"]]
+
+
+def test_subgraphs_get_their_own_page_and_the_legend_is_repeated():
+    code = "\n".join(
+        [
+            "flowchart TD",
+            "subgraph legend[Legend]",
+            "L1[As-Is]",
+            "end",
+            "subgraph one[First]",
+            "A --> B",
+            "end",
+            "B --> C",
+            "C --> D",
+        ]
+    )
+    pages = split_flowchart(code, max_nodes=5)
+    assert [page.node_ids for page in pages] == [["A", "B"], ["C", "D"]]
+    for page in pages:
+        assert "L1[" in page.code
+
+
+def test_pages_are_standalone_and_linked_by_connectors():
+    pages = split_flowchart(_chain(5), max_nodes=3)
+    assert [page.number for page in pages] == [1, 2]
+
+    first, second = (parse_flowchart(page.code) for page in pages)
+    assert "pg_to_N3" in first.nodes and first.nodes["pg_to_N3"].label == "To page 2: Step 3"
+    assert "pg_from_N2" in second.nodes and second.nodes["pg_from_N2"].label == "From page 1: Step 2"
+    assert first.class_defs["asis"] == {"fill": "#f9d"}
+    assert first.nodes["N0"].classes == ["asis"]
+
+
+def test_page_code_keeps_labels_and_edge_kinds():
+    code = 'flowchart TD\nA["say #quot;hi#quot;; ok"] --o B\nB -. maybe .-> C\nC --x D'
+    pages = split_flowchart(code, max_nodes=2)
+    edges = [edge for page in pages for edge in parse_flowchart(page.code).edges]
+    assert parse_flowchart(pages[0].code).nodes["A"].label == 'say "hi"; ok'
+    assert [(e.line, e.head, e.label) for e in edges] == [
+        ("solid", "circle", ""),
+        ("dotted", "arrow", "maybe"),
+        ("dotted", "arrow", "maybe"),
+        ("solid", "cross", ""),
+    ]
+
+
+def test_needs_paging():
+    assert needs_paging(_chain(10), threshold=5)
+    assert not needs_paging(_chain(4), threshold=5)
+    assert not needs_paging(_chain(10), threshold=0)
+    assert not needs_paging("sequenceDiagram\n" + "A->>B: hi\n" * 20, threshold=5)
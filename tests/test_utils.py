@@ -0,0 +1,96 @@
+from workflow_project.utils import (
+    MermaidStreamParser,
+    close_subgraphs,
+    extract_mermaid_code,
+    fix_mermaid,
+    get_fixed_mermaid_data,
+    parse_mermaid,
+)
+
+TEXT = (
+    "Summary of the process.\n\n"
+    "```mermaid\n"
+    "flowchart TD\n"
+    "classDef asis fill=#fff,stroke=#000\n"
+    "A[Receive order (email)] --> B[Ship]\n"
+    "```\n"
+    "Trailing notes."
+)
+
+
+def test_fix_mermaid_repairs_classdef_and_label_parentheses():
+    code = "classDef asis fill=#fff,stroke=#000\nA[Receive (email)] --> B((Round))"
+    assert fix_mermaid(code) == "classDef asis fill:#fff,stroke:#000\nA[Receive -email-] --> B((Round))"
+
+
+def test_parse_mermaid_finds_and_fixes_blocks():
+    result = parse_mermaid(TEXT)
+    assert len(result.blocks) == 1
+    block = result.last_block
+    assert "fill=#fff" in block.raw
+    assert block.code == "flowchart TD\nclassDef asis fill:#fff,stroke:#000\nA[Receive order -email-] --> B[Ship]"
+    start, end = block.span
+    assert TEXT[start:end].startswith("```mermaid") and TEXT[start:end].endswith("```")
+    assert result.fixed_text == TEXT[:start] + block.markdown + TEXT[end:]
+
+
+def test_parse_mermaid_without_blocks():
+    result = parse_mermaid("no diagram here")
+    assert result.blocks == [] and result.last_block is None
+    assert result.fixed_text == "no diagram here"
+
+
+def test_parse_mermaid_block_closed_on_last_line_without_newline():
+    result = parse_mermaid("```mermaid\nflowchart TD\nA --> B```")
+    assert result.last_block.code == "flowchart TD\nA --> B"
+
+
+def test_fence_followed_by_text_does_not_open_a_block():
+    assert parse_mermaid("use ```mermaid blocks\nA --> B\n```").blocks == []
+
+
+def test_stream_parser_matches_parse_mermaid_for_any_chunking():
+    expected = parse_mermaid(TEXT)
+    for size in (1, 3, 7, len(TEXT)):
+        parser = MermaidStreamParser()
+        for i in range(0, len(TEXT), size):
+            parser.feed(TEXT[i : i + size])
+        assert (parser.length, parser.lines) == (len(TEXT), TEXT.count("\n"))
+        result = parser.result()
+        assert result.blocks == expected.blocks
+        assert parser.text == TEXT
+
+
+def test_stream_parser_reports_completed_blocks():
+    parser = MermaidStreamParser()
+    assert parser.feed("```mermaid\nflowchart TD\nA --> B\n") == []
+    completed = parser.feed("```\n")
+    assert [block.code for block in completed] == ["flowchart TD\nA --> B"]
+
+
+def test_partial_code_grows_line_by_line():
+    parser = MermaidStreamParser()
+    parser.feed("Intro\n```mermaid\nflowchart TD\n")
+    assert parser.partial_code() is None
+    parser.feed("A --> B\nB --")
+    assert parser.partial_code() == "flowchart TD\nA --> B"
+    parser.feed("> C\n```\n")
+    assert parser.partial_code() == "flowchart TD\nA --> B\nB --> C"
+
+
+def test_close_subgraphs_appends_missing_ends():
+    code = "flowchart TD\nsubgraph one[One]\nsubgraph two\nA --> B\nend"
+    assert close_subgraphs(code) == code + "\nend"
+    closed = "flowchart TD\nsubgraph one\nA\nend"
+    assert close_subgraphs(closed) == closed
+
+
+def test_extract_mermaid_code():
+    assert extract_mermaid_code(TEXT).startswith("flowchart TD\nclassDef asis fill=#fff")
+    assert extract_mermaid_code("  flowchart TD\nA --> B  ") == "flowchart TD\nA --> B"
+
+
+def test_get_fixed_mermaid_data_falls_back_to_a_default_diagram():
+    text, code = get_fixed_mermaid_data("no diagram")
+    assert text == "no diagram"
+    assert code.startswith("```mermaid\nflowchart TD\nA[No Mermaid diagram found]")